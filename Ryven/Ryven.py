@@ -1,26 +1,81 @@
+import argparse
+from contextlib import redirect_stdout, redirect_stderr
 import os
 import sys
+import time
 
-from custom_src.Console.MainConsole import init_main_console
+# before the other imports, so the startup timeline covers them (see LoadTiming)
+from custom_src.LoadTiming import load_phase, trace_phase, enable_trace, add_trace_event, write_trace
 
-from custom_src.startup_dialog.StartupDialog import StartupDialog
-from custom_src.MainWindow import MainWindow
-from PySide2.QtWidgets import QApplication
-from contextlib import redirect_stdout, redirect_stderr
+
+def parse_args(args):
+    """Returns the parsed arguments and the remaining ones, which are passed to Qt."""
+
+    parser = argparse.ArgumentParser(description='The Ryven editor.')
+    parser.add_argument('--project', metavar='FILE',
+                        help='opens the project without the startup dialog, the required packages get imported from '
+                             '../packages')
+    parser.add_argument('--trace', metavar='FILE',
+                        help='writes the timeline of the startup phases to the file in the Chrome trace event format '
+                             '(chrome://tracing, ui.perfetto.dev) once the window is shown')
+    parser.add_argument('--quit-after-startup', action='store_true',
+                        help='quits once the window is shown, f.ex. for measuring the startup time')
+    return parser.parse_known_args(args)
+
+
+def project_startup_configuration(project_file):
+    """The editor startup configuration for opening the project like the startup dialog does, with the required
+    packages searched in ../packages (folder <name> containing <name>.rpc)."""
+
+    from custom_src.ProjectFile import read_project
+    from custom_src.startup_dialog.StartupDialog import StartupDialog
+
+    j_obj = read_project(project_file)
+    required_packages = StartupDialog.required_packages(j_obj)
+
+    package_file_paths = []
+    for folder, dirs, files in os.walk('../packages'):
+        package_name = os.path.basename(os.path.normpath(folder))
+        if package_name in required_packages and package_name+'.rpc' in files:
+            package_file_paths.append(os.path.normpath(os.path.join(folder, package_name+'.rpc')))
+            required_packages.remove(package_name)
+    if len(required_packages) > 0:
+        print('couldn\'t find the required packages:', ', '.join(required_packages), file=sys.stderr)
+
+    return {'config': 'open project', 'required packages': package_file_paths, 'content': j_obj}
 
 
 if __name__ == '__main__':
+    args, qt_args = parse_args(sys.argv[1:])
+    if args.trace is not None:
+        enable_trace(os.path.abspath(args.trace))
+    project_file = os.path.abspath(args.project) if args.project is not None else None
 
     # change directory to current to this file's location
     os.chdir(os.path.dirname(os.path.realpath(__file__)))
 
+    with load_phase('importing PySide2'):
+        from PySide2.QtCore import QTimer
+        from PySide2.QtWidgets import QApplication
+    with load_phase('importing Ryven'):
+        from custom_src.Console.MainConsole import init_main_console
+        from custom_src.startup_dialog.StartupDialog import StartupDialog
+        from custom_src.MainWindow import MainWindow
+
     # init application, StartupDialog
-    app = QApplication(sys.argv)
-    sw = StartupDialog()
-    sw.exec_()
+    with load_phase('application'):
+        app = QApplication(sys.argv[:1] + qt_args)
+    if project_file is None:
+        with load_phase('startup dialog'):
+            sw = StartupDialog()
+            sw.exec_()
+        editor_startup_configuration = sw.editor_startup_configuration
+    else:
+        with load_phase('reading project'):
+            editor_startup_configuration = project_startup_configuration(project_file)
 
     # return if dialog couldn't initialize
-    if sw.editor_startup_configuration == {}:
+    if editor_startup_configuration == {}:
         sys.exit()
 
     # init console and redirect all output
@@ -28,7 +83,21 @@ if __name__ == '__main__':
     with redirect_stdout(console_stdout_redirect), \
          redirect_stderr(console_errout_redirect):
 
-        mw = MainWindow(sw.editor_startup_configuration)
-        mw.show()
+        # the MainWindow prints the load times of the phases so far, these two only appear in the trace
+        with trace_phase('main window'):
+            mw = MainWindow(editor_startup_configuration)
+        with trace_phase('showing main window'):
+            mw.show()
+
+        # the timer fires once the event loop processed the events of showing the window
+        t0 = time.perf_counter()
+
+        def started():
+            add_trace_event('first event loop iteration', t0, time.perf_counter() - t0)
+            write_trace()
+            if args.quit_after_startup:
+                app.quit()
+
+        QTimer.singleShot(0, started)
 
         sys.exit(app.exec_())
@@ -0,0 +1,44 @@
+import asyncio
+
+from PySide2.QtCore import QTimer
+
+
+class AsyncLoop:
+    """Runs the async update_event()s of NodeInstances. The asyncio event loop is driven by the Qt event loop: while
+    there are pending tasks, a QTimer runs one iteration of the asyncio loop every few milliseconds, so everything
+    happens in the main thread and the GUI never waits for I/O."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.tasks = set()
+
+        self.timer = QTimer()
+        self.timer.setInterval(5)
+        self.timer.timeout.connect(self.step)
+
+    def run(self, coroutine):
+        task = self.loop.create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def step(self):
+        if self.loop.is_running():  # Qt events can get processed during an update, f.ex. by a dialog a NI opens
+            return
+
+        self.loop.call_soon(self.loop.stop)
+        self.loop.run_forever()
+
+        if len(self.tasks) == 0:
+            self.timer.stop()
+
+
+async_loop: AsyncLoop = None
+
+
+def get_async_loop() -> AsyncLoop:
+    global async_loop
+    if async_loop is None:
+        async_loop = AsyncLoop()
+    return async_loop
@@ -0,0 +1,332 @@
+import json
+import os
+import shutil
+import tempfile
+import uuid
+
+from PySide2.QtCore import QObject, QTimer
+
+from custom_src.AutosaveJournal import AUTOSAVE_DIR, SNAPSHOT_FILE, JOURNAL_FILE
+from custom_src.global_tools.Debugger import Debugger
+from custom_src.ProjectFile import write_project
+from custom_src.script_variables.Variable import VariableStorage
+
+
+# after this many journal entries, the next autosave writes a new snapshot instead
+COMPACT_AFTER = 1000
+
+
+class Autosave(QObject):
+    """Saves the project periodically to the autosave directory, so it can be recovered after a crash (see
+    AutosaveJournal). Changes to the flows are recorded while they are made (the Flow and the NIs call the methods
+    below) and appended to the journal with every autosave, so an autosave costs proportional to what changed, not to
+    the size of the project. The state data of the NIs (get_data()) and the drawings don't report changes, the places
+    which might change them (updates, special actions, user input in the flow, ports, connections, moves) mark them as
+    changed instead, and only those get compared to their last saved state. Once the journal got long, the whole
+    project gets written as a new snapshot and the journal starts over.
+    Variables, settings and the scripts themselves are not journaled, changing them makes the next autosave write a
+    snapshot. Nothing gets written before the first change since start() or discard()."""
+
+    def __init__(self, main_window, interval=10000):
+        super(Autosave, self).__init__()
+
+        self.main_window = main_window
+        self.needs_snapshot = False
+        self.snapshot_exists = False  # a journal can only be written once there is a snapshot it belongs to
+        self.pending_entries = []
+        self.journal_entries = 0  # number of entries written since the last snapshot
+        self.node_states = {}  # {NI: JSON string of its config data without the position}
+        self.drawing_states = {}  # {drawing: JSON string of its config data}
+        self.changed_nodes = set()  # NIs whose state might differ from node_states, see node_changed()
+        self.changed_drawings = set()
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.save)
+
+    def start(self):
+        """Called once the project has been loaded, the changes get compared to its current state."""
+
+        self.needs_snapshot = False
+        self.pending_entries.clear()
+        self.changed_nodes.clear()
+        self.changed_drawings.clear()
+        self.scan_states()
+        self.timer.start()
+
+    def save(self):
+        try:
+            if self.needs_snapshot or self.journal_entries >= COMPACT_AFTER:
+                self.write_snapshot()
+            else:
+                self.record_changed_states()
+                if self.snapshot_exists:
+                    self.write_journal()
+                elif len(self.pending_entries) > 0:  # the first change since start() or discard()
+                    self.write_snapshot()
+        except OSError as e:
+            Debugger.debug('autosave failed:', e)
+            self.needs_snapshot = True  # the journal might be incomplete now
+
+    def discard(self):
+        """Removes the autosave, f.ex. after the project has been saved. The next change writes a snapshot again."""
+
+        shutil.rmtree(AUTOSAVE_DIR, ignore_errors=True)
+        self.snapshot_exists = False
+        self.pending_entries.clear()
+
+    def write_snapshot(self):
+        os.makedirs(AUTOSAVE_DIR, exist_ok=True)
+
+        # the generation connects the journal to the snapshot, a journal of an earlier snapshot is never replayed
+        generation = uuid.uuid4().hex
+
+        storage = VariableStorage(SNAPSHOT_FILE)
+        try:
+            write_project(SNAPSHOT_FILE, self.main_window.project_data(storage, {'autosave generation': generation}))
+        except BaseException:
+            storage.discard()
+            raise
+        storage.commit()
+
+        fd, temp_file_name = tempfile.mkstemp(dir=AUTOSAVE_DIR, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(json.dumps({'generation': generation})+'\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file_name, JOURNAL_FILE)
+        except BaseException:
+            os.remove(temp_file_name)
+            raise
+
+        self.pending_entries.clear()
+        self.journal_entries = 0
+        self.node_states.clear()
+        self.drawing_states.clear()
+        self.changed_nodes.clear()
+        self.changed_drawings.clear()
+        self.scan_states()
+        self.needs_snapshot = False
+        self.snapshot_exists = True
+
+    def write_journal(self):
+        if len(self.pending_entries) == 0:
+            return
+
+        with open(JOURNAL_FILE, 'a') as f:
+            for entry in self.pending_entries:
+                f.write(json.dumps(entry)+'\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.journal_entries += len(self.pending_entries)
+        self.pending_entries.clear()
+
+    def scan_states(self):
+        """Stores the states of all NIs and drawings of the loaded flows as their last saved states."""
+
+        for script in self.main_window.scripts:
+            if script.flow is not None:  # unloaded flows don't change
+                self.scan_flow_states(script.flow)
+
+    def scan_flow_states(self, flow):
+        for ni in flow.all_node_instances:
+            self.node_states[ni] = json.dumps(node_state_config(ni.config_data()))
+        for drawing in flow.drawings:
+            self.drawing_states[drawing] = json.dumps(drawing.config_data())
+
+    def record_changed_states(self):
+        """Compares the NIs and drawings marked as changed to their last saved states and records the ones that actually
+        changed."""
+
+        # updates in other threads might mark NIs while this runs, they stay marked for the next autosave
+        changed_nodes, self.changed_nodes = self.changed_nodes, set()
+        changed_drawings, self.changed_drawings = self.changed_drawings, set()
+
+        for ni in changed_nodes:
+            if ni not in self.node_states:  # removed, or its flow got unloaded
+                continue
+            script_index = self.script_index(ni.flow)
+            if script_index is None:
+                continue
+            config = node_state_config(ni.config_data())
+            state = json.dumps(config)
+            if self.node_states[ni] != state:
+                self.node_states[ni] = state
+                self.record(script_index, 'node state', node=ni.flow.all_node_instances.index(ni), config=config)
+
+        for drawing in changed_drawings:
+            if drawing not in self.drawing_states:
+                continue
+            script_index = self.script_index(drawing.flow)
+            if script_index is None:
+                continue
+            config = drawing.config_data()
+            state = json.dumps(config)
+            if self.drawing_states[drawing] != state:
+                self.drawing_states[drawing] = state
+                self.record(script_index, 'drawing', drawing=drawing.flow.drawings.index(drawing), config=config)
+
+    def node_changed(self, ni):
+        """Called when the state of the NI might have changed, it gets compared to its last saved state with the next
+        autosave. Might get called from other threads (updates)."""
+
+        self.changed_nodes.add(ni)
+
+    def drawing_changed(self, drawing):
+        self.changed_drawings.add(drawing)
+
+    # RECORDING CHANGES
+    def record(self, script_index, op, **data):
+        entry = {'op': op, 'script': script_index}
+        entry.update(data)
+        self.pending_entries.append(entry)
+
+    def script_index(self, flow):
+        """The index of the flow's script, None if changes of the flow don't need to be recorded (yet)."""
+
+        if self.needs_snapshot:  # the snapshot will contain the change
+            return None
+        if flow.parent_script.flow is not flow:  # the flow is being loaded (see Script.load_flow())
+            return None
+        try:
+            return self.main_window.scripts.index(flow.parent_script)
+        except ValueError:  # the script is being created
+            return None
+
+    def scripts_changed(self):
+        self.needs_snapshot = True
+
+    def variables_changed(self):
+        self.needs_snapshot = True
+
+    def settings_changed(self):
+        self.needs_snapshot = True
+
+    def flow_loaded(self, flow):
+        """Called after a flow has been loaded from its config data, its NIs and drawings are in their saved states."""
+
+        if self.script_index(flow) is not None:
+            self.scan_flow_states(flow)
+
+    def flow_unloaded(self, flow):
+        for ni in flow.all_node_instances:
+            self.node_states.pop(ni, None)
+            self.changed_nodes.discard(ni)
+        for drawing in flow.drawings:
+            self.drawing_states.pop(drawing, None)
+            self.changed_drawings.discard(drawing)
+
+    def node_added(self, flow, ni):
+        """Called after the NI has been added to the flow."""
+
+        script_index = self.script_index(flow)
+        if script_index is None:
+            return
+
+        config = ni.config_data()
+        self.node_states[ni] = json.dumps(node_state_config(config))
+        self.record(script_index, 'add node', config=config)
+
+        # the NI can still be connected to NIs in the flow, f.ex. when the removal of components gets undone
+        for inp in ni.inputs:
+            for out in inp.connected_port_instances:
+                self.connection_changed(flow, out, inp, True)
+        for out in ni.outputs:
+            for inp in out.connected_port_instances:
+                self.connection_changed(flow, out, inp, True)
+
+    def node_removed(self, flow, ni):
+        """Called before the NI gets removed from the flow."""
+
+        script_index = self.script_index(flow)
+        if script_index is None or ni not in flow.all_node_instances:
+            return
+
+        self.node_states.pop(ni, None)
+        self.changed_nodes.discard(ni)
+        self.record(script_index, 'remove node', node=flow.all_node_instances.index(ni))
+
+    def connection_changed(self, flow, output_port_instance, input_port_instance, connected):
+        script_index = self.script_index(flow)
+        if script_index is None:
+            return
+
+        output_ni = output_port_instance.parent_node_instance
+        input_ni = input_port_instance.parent_node_instance
+        try:
+            output = [flow.all_node_instances.index(output_ni), output_ni.outputs.index(output_port_instance)]
+            input = [flow.all_node_instances.index(input_ni), input_ni.inputs.index(input_port_instance)]
+        except ValueError:  # one of the NIs is not in the flow (yet)
+            return
+
+        self.record(script_index, 'connect' if connected else 'disconnect', output=output, input=input)
+        # f.ex. the widget of the input gets hidden
+        self.node_changed(output_ni)
+        self.node_changed(input_ni)
+
+    def components_moved(self, flow, items):
+        script_index = self.script_index(flow)
+        if script_index is None:
+            return
+
+        ni_indices = {id(flow.all_node_instances[i]): i for i in range(len(flow.all_node_instances))}
+        nodes = [[ni_indices[id(i)], i.pos().x(), i.pos().y()] for i in items if id(i) in ni_indices]
+        if len(nodes) > 0:
+            self.record(script_index, 'move', nodes=nodes)
+        # the positions of the drawings are part of their config data
+        for item in items:
+            if item in self.drawing_states:
+                self.drawing_changed(item)
+
+    def port_added(self, flow, ni, ports, index):
+        """Called after a port has been inserted at index into ni.inputs or ni.outputs (ports: 'inputs' or
+        'outputs')."""
+
+        script_index = self.script_index(flow)
+        if script_index is None or ni not in flow.all_node_instances:
+            return
+
+        config = getattr(ni, ports)[index].config_data()
+        self.record(script_index, 'add port', node=flow.all_node_instances.index(ni), ports=ports, index=index,
+                    config=config)
+        self.node_changed(ni)
+
+    def port_removed(self, flow, ni, ports, index):
+        """Called before the disconnected port at index gets removed from ni.inputs or ni.outputs."""
+
+        script_index = self.script_index(flow)
+        if script_index is None or ni not in flow.all_node_instances:
+            return
+
+        self.record(script_index, 'remove port', node=flow.all_node_instances.index(ni), ports=ports, index=index)
+        self.node_changed(ni)
+
+    def drawing_added(self, flow, drawing):
+        """Called after the drawing has been added to the flow."""
+
+        script_index = self.script_index(flow)
+        if script_index is None:
+            return
+
+        config = drawing.config_data()
+        self.drawing_states[drawing] = json.dumps(config)
+        self.record(script_index, 'add drawing', config=config)
+
+    def drawing_removed(self, flow, drawing):
+        """Called before the drawing gets removed from the flow."""
+
+        script_index = self.script_index(flow)
+        if script_index is None or drawing not in flow.drawings:
+            return
+
+        self.drawing_states.pop(drawing, None)
+        self.changed_drawings.discard(drawing)
+        self.record(script_index, 'remove drawing', drawing=flow.drawings.index(drawing))
+
+
+def node_state_config(config: dict) -> dict:
+    """The NI's config data without its position, moves are recorded separately."""
+
+    return {key: val for key, val in config.items() if key not in ('position x', 'position y')}
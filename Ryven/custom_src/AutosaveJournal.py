@@ -0,0 +1,158 @@
+"""The files of the autosave (see Autosave) and how a project gets recovered from them.
+
+The autosave consists of a snapshot, a normal project file, and a journal of the changes made since the snapshot was
+written. The journal is a text file with one JSON object per line. The first line refers to the snapshot it belongs to:
+
+    {"generation": "<the 'autosave generation' in the general info of the snapshot>"}
+
+every following line is one change of a flow, the script is referenced by its index, NIs, ports and drawings by their
+indices at the time of the change:
+
+    {"op": "add node", "script": 0, "config": {<config data of the NI>}}
+    {"op": "remove node", "script": 0, "node": 3}
+    {"op": "connect", "script": 0, "output": [<NI index>, <output index>], "input": [<NI index>, <input index>]}
+    {"op": "disconnect", "script": 0, "output": [3, 0], "input": [5, 1]}
+    {"op": "move", "script": 0, "nodes": [[<NI index>, <x>, <y>]]}
+    {"op": "node state", "script": 0, "node": 3, "config": {<config data of the NI without the position>}}
+    {"op": "add port", "script": 0, "node": 3, "ports": "inputs", "index": 1, "config": {<config data of the port>}}
+    {"op": "remove port", "script": 0, "node": 3, "ports": "outputs", "index": 0}
+    {"op": "add drawing", "script": 0, "config": {<config data of the drawing>}}
+    {"op": "remove drawing", "script": 0, "drawing": 2}
+    {"op": "drawing", "script": 0, "drawing": 2, "config": {<config data of the drawing>}}
+
+recover_project() applies the journal to the snapshot. A journal of another generation (the snapshot was replaced but
+the journal not yet) is ignored, the snapshot already contains its changes. Replaying stops at the first line that is
+incomplete or can't be applied, everything before it gets recovered."""
+
+import json
+import os
+
+from custom_src.ProjectFile import read_project
+
+
+AUTOSAVE_DIR = 'autosave'
+SNAPSHOT_FILE = os.path.join(AUTOSAVE_DIR, 'autosave.rpo')
+JOURNAL_FILE = os.path.join(AUTOSAVE_DIR, 'autosave.journal')
+
+
+def autosave_exists() -> bool:
+    return os.path.isfile(SNAPSHOT_FILE)
+
+
+def recover_project(snapshot_file=SNAPSHOT_FILE, journal_file=JOURNAL_FILE):
+    """Returns the autosaved project as dict like read_project(). Raises OSError and ValueError like read_project() if
+    the snapshot can't be read."""
+
+    project = read_project(snapshot_file)
+    generation = project['general info'].get('autosave generation')
+
+    try:
+        f = open(journal_file)
+    except OSError:
+        return project
+
+    with f:
+        try:
+            header = json.loads(f.readline())
+        except ValueError:
+            return project
+        if not isinstance(header, dict) or generation is None or header.get('generation') != generation:
+            return project
+
+        for line in f:
+            if not line.endswith('\n'):  # the last line might have been written only partly
+                break
+            try:
+                apply_journal_entry(project, json.loads(line))
+            except (ValueError, LookupError, TypeError):
+                break
+
+    return project
+
+
+def apply_journal_entry(project: dict, entry: dict):
+    flow = project['scripts'][entry['script']]['flow']
+    nodes = flow['nodes']
+    op = entry['op']
+
+    if op == 'add node':
+        nodes.append(entry['config'])
+
+    elif op == 'remove node':
+        remove_node(flow, entry['node'])
+
+    elif op == 'connect':
+        flow['connections'].append(connection_config(entry))
+
+    elif op == 'disconnect':
+        flow['connections'].remove(connection_config(entry))
+
+    elif op == 'move':
+        for i, x, y in entry['nodes']:
+            nodes[i]['position x'] = x
+            nodes[i]['position y'] = y
+
+    elif op == 'node state':
+        node = nodes[entry['node']]
+        config = dict(entry['config'])
+        config['position x'] = node['position x']
+        config['position y'] = node['position y']
+        nodes[entry['node']] = config
+
+    elif op == 'add port':
+        nodes[entry['node']][entry['ports']].insert(entry['index'], entry['config'])
+        shift_port_indices(flow, entry['node'], entry['ports'], entry['index'], 1)
+
+    elif op == 'remove port':
+        del nodes[entry['node']][entry['ports']][entry['index']]
+        shift_port_indices(flow, entry['node'], entry['ports'], entry['index'], -1)
+
+    elif op == 'add drawing':
+        flow['drawings'].append(entry['config'])
+
+    elif op == 'remove drawing':
+        del flow['drawings'][entry['drawing']]
+
+    elif op == 'drawing':
+        flow['drawings'][entry['drawing']] = entry['config']
+
+    else:
+        raise ValueError('unknown journal entry '+repr(op))
+
+
+def connection_config(entry) -> dict:
+    """The connection of a 'connect' or 'disconnect' entry as it appears in the flow's config data."""
+
+    return {'parent node instance index': entry['output'][0],
+            'output port index': entry['output'][1],
+            'connected node instance': entry['input'][0],
+            'connected input port index': entry['input'][1]}
+
+
+def remove_node(flow, index):
+    del flow['nodes'][index]
+
+    connections = []
+    for c in flow['connections']:
+        if c['parent node instance index'] == index or c['connected node instance'] == index:
+            continue
+        if c['parent node instance index'] > index:
+            c['parent node instance index'] -= 1
+        if c['connected node instance'] > index:
+            c['connected node instance'] -= 1
+        connections.append(c)
+    flow['connections'] = connections
+
+
+def shift_port_indices(flow, node_index, ports, index, shift):
+    """Updates the connections of a node whose port list changed at index. The connections of a removed port are
+    already gone, the port got disconnected before."""
+
+    if ports == 'inputs':
+        node_key, port_key = 'connected node instance', 'connected input port index'
+    else:
+        node_key, port_key = 'parent node instance index', 'output port index'
+
+    for c in flow['connections']:
+        if c[node_key] == node_index and c[port_key] >= index + (1 if shift < 0 else 0):
+            c[port_key] += shift
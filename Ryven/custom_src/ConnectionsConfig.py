@@ -0,0 +1,47 @@
+def connections_config_data(node_instances, only_with_connections_to=None) -> list:
+    """Returns the config data of the connections going out of the given NIs, the NIs and their input ports are
+    referenced by their indices. Connections to NIs that aren't in the list get None as indices (f.ex. when copying
+    components). With only_with_connections_to, only connections from or to these NIs are included."""
+
+    # index lookups by identity, list.index() in the loop over all connections would make saving quadratic
+    ni_indices = {}
+    input_indices = {}
+    for i in range(len(node_instances)):
+        ni = node_instances[i]
+        ni_indices[id(ni)] = i
+        for j in range(len(ni.inputs)):
+            input_indices[id(ni.inputs[j])] = j
+    if only_with_connections_to is not None:
+        only_with_connections_to = {id(ni) for ni in only_with_connections_to}
+
+    script_ni_connections_list = []
+    for ni in node_instances:
+        ni_index = ni_indices[id(ni)]
+        for out_index in range(len(ni.outputs)):
+            out = ni.outputs[out_index]
+            for connected_port in out.connected_port_instances:
+                connected_ni = connected_port.parent_node_instance
+
+                # this only applies when saving config data through deleting node instances:
+                if only_with_connections_to is not None and \
+                        id(connected_ni) not in only_with_connections_to and \
+                        id(ni) not in only_with_connections_to:
+                    continue
+                # because I am not allowed to save connections between nodes connected to each other and both
+                # connected to the deleted node, only the connections to the deleted node shall be saved
+
+                connection_dict = {'parent node instance index': ni_index,
+                                   'output port index': out_index}
+
+                # yes, very important: when copying components, there might be connections going outside the
+                # selected lists, these should be ignored. When saving a project, all components are considered,
+                # so then the index values will never be none
+                connected_ni_index = ni_indices.get(id(connected_ni))
+                connection_dict['connected node instance'] = connected_ni_index
+
+                connected_ip_index = input_indices[id(connected_port)] if connected_ni_index is not None else None
+                connection_dict['connected input port index'] = connected_ip_index
+
+                script_ni_connections_list.append(connection_dict)
+
+    return script_ni_connections_list
@@ -7,19 +7,23 @@ from PySide2.QtWidgets import QGraphicsView, QGraphicsScene, QListWidgetItem, QS
 import json
 import math
 
+from custom_src.ConnectionsConfig import connections_config_data
 from custom_src.DrawingObject import DrawingObject
 from custom_src.FlowCommands import MoveComponents_Command, PlaceNodeInstanceInScene_Command, \
     PlaceDrawingObject_Command, RemoveComponents_Command, ConnectGates_Command, Paste_Command
+from custom_src.FlowExecutor import FlowExecutor
 from custom_src.FlowProxyWidget import FlowProxyWidget
 from custom_src.FlowStylusModesWidget import FlowStylusModesWidget
 from custom_src.FlowZoomWidget import FlowZoomWidget
 from custom_src.GlobalAttributes import Flow_AlgorithmMode, Flow_ViewportUpdateMode
+from custom_src.LoadTiming import load_phase
 from custom_src.Node import Node
 from custom_src.builtin_nodes.GetVar_Node import GetVar_Node
 from custom_src.builtin_nodes.SetVar_Node import SetVar_Node
 from custom_src.node_choice_widget.NodeChoiceWidget import NodeChoiceWidget
 from custom_src.NodeInstance import NodeInstance
 from custom_src.PortInstance import PortInstance, PortInstanceGate
+from custom_src.ProjectFile import StreamedDict, StreamedList
 from custom_src.global_tools.Debugger import Debugger
 from custom_src.global_tools.class_inspection import find_type_in_object, find_type_in_objects
 from custom_src.global_tools.math import pythagoras
@@ -67,14 +71,18 @@ class Flow(QGraphicsView):
         self.all_node_instances: [NodeInstance] = []
         self.all_node_instance_classes = main_window.all_node_instance_classes  # ref
         self.all_nodes = main_window.all_nodes  # ref
+        self.nodes_index = main_window.nodes_index  # ref
+        self.autosave = main_window.autosave  # ref
         self.gate_selected: PortInstanceGate = None
         self.dragging_connection = False
         self.hovered_port_inst_gate = None  # see drawing connections
+        self.connection_paths = {}  # {(output PI, input PI): (path, bounding rect)}, see drawForeground
         self.ignore_mouse_event = False  # for stylus - see tablet event
         self.last_mouse_move_pos: QPointF = None
         self.node_place_pos = QPointF()
         self.left_mouse_pressed_in_flow = False
         self.mouse_press_pos: QPointF = None
+        self.node_instance_pressed = None  # NI which received the last mouse press, see user_input_received()
         self.auto_connection_gate = None  # stores the gate that we may try to auto connect to a newly placed NI
         self.panning = False
         self.pan_last_x = None
@@ -86,6 +94,9 @@ class Flow(QGraphicsView):
         self.algorithm_mode = Flow_AlgorithmMode()
         self.viewport_update_mode = Flow_ViewportUpdateMode()
 
+        # EXECUTION
+        self.executor = FlowExecutor(self)
+
         # CREATE UI
         scene = QGraphicsScene(self)
         scene.setItemIndexMethod(QGraphicsScene.NoIndex)
@@ -153,6 +164,11 @@ class Flow(QGraphicsView):
                     self.parent_script.widget.ui.algorithm_exec_flow_radioButton.setChecked(True)
                     self.algorithm_mode.mode_data_flow = False
 
+            # parallel data flow
+            if config.keys().__contains__('parallel data flow'):
+                self.parent_script.widget.ui.algorithm_parallel_checkBox.setChecked(config['parallel data flow'])
+                self.executor.parallel = config['parallel data flow']
+
             # viewport update mode
             if config.keys().__contains__('viewport update mode'):
                 if config['viewport update mode'] == 'sync':
@@ -162,10 +178,13 @@ class Flow(QGraphicsView):
                     self.parent_script.widget.ui.viewport_update_mode_async_radioButton.setChecked(True)
                     self.viewport_update_mode.sync = False
 
-            node_instances = self.place_nodes_from_config(config['nodes'])
-            self.connect_nodes_from_config(node_instances, config['connections'])
+            with load_phase('node instances'):
+                node_instances = self.place_nodes_from_config(config['nodes'])
+            with load_phase('connections'):
+                self.connect_nodes_from_config(node_instances, config['connections'])
             if list(config.keys()).__contains__('drawings'):  # not all (old) project files have drawings arr
-                self.place_drawings_from_config(config['drawings'])
+                with load_phase('drawings'):
+                    self.place_drawings_from_config(config['drawings'])
             self.undo_stack.clear()
 
     def theme_changed(self, t):
@@ -174,9 +193,15 @@ class Flow(QGraphicsView):
 
     def algorithm_mode_data_flow_toggled(self, checked):
         self.algorithm_mode.mode_data_flow = checked
+        self.autosave.settings_changed()
+
+    def algorithm_mode_parallel_toggled(self, checked):
+        self.executor.parallel = checked
+        self.autosave.settings_changed()
 
     def viewport_update_mode_sync_toggled(self, checked):
         self.viewport_update_mode.sync = checked
+        self.autosave.settings_changed()
 
     def selection_changed(self):
         selected_items = self.scene().selectedItems()
@@ -219,6 +244,7 @@ class Flow(QGraphicsView):
 
         # there might be a proxy widget meant to receive the event instead of the flow
         QGraphicsView.mousePressEvent(self, event)
+        self.node_instance_pressed = self.user_input_received(self.itemAt(event.pos()))
 
         # to catch any Proxy that received the event. Checking for event.isAccepted() or what is returned by
         # QGraphicsView.mousePressEvent(...) both didn't work so far, so I do it manually
@@ -265,6 +291,11 @@ class Flow(QGraphicsView):
     def mouseReleaseEvent(self, event):
         # there might be a proxy widget meant to receive the event instead of the flow
         QGraphicsView.mouseReleaseEvent(self, event)
+        # f.ex. a slider of an NI that got dragged and released somewhere else
+        if self.node_instance_pressed is not None:
+            self.autosave.node_changed(self.node_instance_pressed)
+            self.node_instance_pressed = None
+        self.user_input_received(self.itemAt(event.pos()))
 
         if self.ignore_mouse_event or \
                 (event.button() == Qt.LeftButton and not self.left_mouse_pressed_in_flow):
@@ -304,6 +335,7 @@ class Flow(QGraphicsView):
 
     def keyPressEvent(self, event):
         QGraphicsView.keyPressEvent(self, event)
+        self.user_input_received(self.scene().focusItem())
 
         if event.isAccepted():
             return
@@ -323,6 +355,17 @@ class Flow(QGraphicsView):
             return True
 
         QGraphicsView.wheelEvent(self, event)
+        self.user_input_received(self.itemAt(event.pos()))
+
+    def user_input_received(self, item):
+        """Tells the autosave that the state of the NI containing the item (f.ex. the widget that received a mouse or key
+        event) might have changed. Returns the NI, None if the item isn't part of one."""
+
+        while item is not None and not find_type_in_object(item, NodeInstance):
+            item = item.parentItem()
+        if item is not None:
+            self.autosave.node_changed(item)
+        return item
 
     def tabletEvent(self, event):
         """tabletEvent gets called by stylus operations.
@@ -376,6 +419,7 @@ class Flow(QGraphicsView):
             if self.stylus_mode == 'comment' and self.drawing:
                 Debugger.debug('drawing obj finished')
                 self.current_drawing.finished()
+                self.autosave.drawing_changed(self.current_drawing)
                 self.current_drawing = None
                 self.drawing = False
 
@@ -431,14 +475,24 @@ class Flow(QGraphicsView):
         """Draws all connections and borders around selected items."""
 
         # DRAW CONNECTIONS
+        # The paths are cached until one of their gates moves (see invalidate_connection_paths()), connections
+        # outside the exposed rect are skipped.
         for ni in self.all_node_instances:
             for o in ni.outputs:
                 for cpi in o.connected_port_instances:
-                    path = self.connection_path(o.gate.get_scene_center_pos(),
-                                                cpi.gate.get_scene_center_pos())
-                    w = path.boundingRect().width()
-                    h = path.boundingRect().height()
-                    gradient = QRadialGradient(path.boundingRect().center(),
+                    cached = self.connection_paths.get((o, cpi))
+                    if cached is None:
+                        path = self.connection_path(o.gate.get_scene_center_pos(), cpi.gate.get_scene_center_pos())
+                        cached = self.connection_paths[(o, cpi)] = (path, path.boundingRect())
+                    path, bounding_rect = cached
+
+                    # the margin covers the pen width
+                    if not bounding_rect.adjusted(-10, -10, 10, 10).intersects(rect):
+                        continue
+
+                    w = bounding_rect.width()
+                    h = bounding_rect.height()
+                    gradient = QRadialGradient(bounding_rect.center(),
                                                pythagoras(w, h) / 2)
 
                     pen = Design.flow_theme.get_flow_conn_pen_inst(o.type_)
@@ -647,7 +701,11 @@ class Flow(QGraphicsView):
         - The brackets around node, self, config create a tuple (node, self, config). See NodeInstance constructor.
         - The initialized() method needs to be called after all manual constructing has been done. This was once called
         at the end of every custom NI's constructor, which can lead to problems when using custom NI class hierarchies.
-        That's why I moved it here."""
+        That's why I moved it here.
+        Returns None if the node's classes couldn't be imported."""
+
+        if not self.parent_script.main_window.import_node_classes(node):
+            return None
 
         new_NI = self.get_node_instance_class_from_node(node)((node, self, config))
         new_NI.initialized()
@@ -664,6 +722,8 @@ class Flow(QGraphicsView):
         ni.setSelected(True)
 
         self.all_node_instances.append(ni)
+        self.executor.node_instances_changed()
+        self.autosave.node_added(self, ni)
 
     def add_node_instances(self, node_instances):
         for ni in node_instances:
@@ -671,10 +731,12 @@ class Flow(QGraphicsView):
 
     def remove_node_instance(self, ni):
         ni.about_to_remove_from_scene()  # to stop running threads
+        self.autosave.node_removed(self, ni)
 
         self.scene().removeItem(ni)
 
         self.all_node_instances.remove(ni)
+        self.executor.node_instances_changed()
 
     def place_new_node_by_shortcut(self):  # Shift+P
         point_in_viewport = None
@@ -697,26 +759,21 @@ class Flow(QGraphicsView):
         new_node_instances = []
 
         for n_c in nodes_config:
-            # find parent node by title, type, package name and description as identifiers
-            parent_node_title = n_c['parent node title']
-            parent_node_package_name = n_c['parent node package']
-            parent_node = None
-            for pn in self.all_nodes:
-                pn: Node = pn
-                if pn.title == parent_node_title and \
-                        pn.package == parent_node_package_name:
-                    parent_node = pn
-                    break
+            # find parent node by package name and title as identifiers
+            parent_node = self.nodes_index.get((n_c['parent node package'], n_c['parent node title']))
 
             new_NI = self.create_node_instance(parent_node, n_c)
-            self.add_node_instance(new_NI, QPoint(n_c['position x'], n_c['position y']) + offset_pos)
-            new_node_instances.append(new_NI)
+            if new_NI is not None:
+                self.add_node_instance(new_NI, QPoint(n_c['position x'], n_c['position y']) + offset_pos)
+            new_node_instances.append(new_NI)  # None if the NI couldn't be created, the indices must stay intact
 
         return new_node_instances
 
     def place_node__cmd(self, node: Node, config=None):
 
         new_NI = self.create_node_instance(node, config)
+        if new_NI is None:
+            return None
 
         place_command = PlaceNodeInstanceInScene_Command(self, new_NI, self.node_place_pos)
 
@@ -750,6 +807,8 @@ class Flow(QGraphicsView):
             if c_connected_node_instance is not None:  # which can be the case when pasting
                 parent_node_instance = node_instances[c_parent_node_instance_index]
                 connected_node_instance = node_instances[c_connected_node_instance]
+                if parent_node_instance is None or connected_node_instance is None:  # see place_nodes_from_config()
+                    continue
 
                 self.connect_gates(parent_node_instance.outputs[c_output_port_index].gate,
                                    connected_node_instance.inputs[c_connected_input_port_index].gate)
@@ -764,12 +823,14 @@ class Flow(QGraphicsView):
         if posF:
             drawing_obj.setPos(posF)
         self.drawings.append(drawing_obj)
+        self.autosave.drawing_added(self, drawing_obj)
 
     def add_drawings(self, drawings):
         for d in drawings:
             self.add_drawing(d)
 
     def remove_drawing(self, drawing):
+        self.autosave.drawing_removed(self, drawing)
         self.scene().removeItem(drawing)
         self.drawings.remove(drawing)
 
@@ -950,12 +1011,20 @@ class Flow(QGraphicsView):
         if parent_port_instance.direction != child_port_instance.direction and \
                 parent_port_instance.parent_node_instance != child_port_instance.parent_node_instance and \
                 parent_port_instance.type_ == child_port_instance.type_:
+            if parent_port_instance.direction == 'input':
+                input_port_instance, output_port_instance = parent_port_instance, child_port_instance
+            else:
+                input_port_instance, output_port_instance = child_port_instance, parent_port_instance
+
             try:  # remove connection if port instances are already connected
                 index = parent_port_instance.connected_port_instances.index(child_port_instance)
                 parent_port_instance.connected_port_instances.remove(child_port_instance)
                 parent_port_instance.disconnected()
                 child_port_instance.connected_port_instances.remove(parent_port_instance)
                 child_port_instance.disconnected()
+                self.executor.connection_removed(output_port_instance, input_port_instance)
+                self.autosave.connection_changed(self, output_port_instance, input_port_instance, False)
+                self.connection_paths.pop((output_port_instance, input_port_instance), None)
 
             except ValueError:  # connect port instances
                 # remove all connections from parent port instance if it's a data input
@@ -970,9 +1039,15 @@ class Flow(QGraphicsView):
 
                 parent_port_instance.connected_port_instances.append(child_port_instance)
                 child_port_instance.connected_port_instances.append(parent_port_instance)
+                # mark it as feedback connection if it closes a cycle, before the input updates its NI
+                self.executor.connection_added(output_port_instance, input_port_instance)
+                self.autosave.connection_changed(self, output_port_instance, input_port_instance, True)
                 parent_port_instance.connected()
                 child_port_instance.connected()
 
+            # the cached output values of the input's NI (exec-flow mode) might depend on the changed connection
+            self.executor.invalidate([input_port_instance.parent_node_instance])
+
         self.viewport().repaint()
 
     def try_conn_gate_and_ni(self, parent_gate: PortInstanceGate, child_ni: NodeInstance):
@@ -989,6 +1064,16 @@ class Flow(QGraphicsView):
                     self.connect_gates__cmd(parent_gate, out.gate)
                     return
 
+    def invalidate_connection_paths(self, port_instance):
+        """Drops the cached paths of the connections of the port instance (see drawForeground()), called when its gate
+        moved."""
+
+        for cpi in port_instance.connected_port_instances:
+            if port_instance.direction == 'output':
+                self.connection_paths.pop((port_instance, cpi), None)
+            else:
+                self.connection_paths.pop((cpi, port_instance), None)
+
     @staticmethod
     def connection_path(p1: QPointF, p2: QPointF):
         """Returns the nice looking QPainterPath of a connection for two given points."""
@@ -1017,8 +1102,18 @@ class Flow(QGraphicsView):
                          p2.x(), p2.y())
         return path
 
-    def config_data(self):
+    def config_data(self, streamed=False):
+        if streamed:  # the NIs' config data gets created one by one while it is written (see ProjectFile)
+            return StreamedDict([
+                ('algorithm mode', 'data flow' if self.algorithm_mode.mode_data_flow else 'exec flow'),
+                ('parallel data flow', self.executor.parallel),
+                ('viewport update mode', 'sync' if self.viewport_update_mode.sync else 'async'),
+                ('nodes', StreamedList(ni.config_data() for ni in self.all_node_instances)),
+                ('connections', self.get_connections_config_data(self.all_node_instances)),
+                ('drawings', self.get_drawings_config_data(self.drawings))])
+
         flow_dict = {'algorithm mode': 'data flow' if self.algorithm_mode.mode_data_flow else 'exec flow',
+                     'parallel data flow': self.executor.parallel,
                      'viewport update mode': 'sync' if self.viewport_update_mode.sync else 'async',
                      'nodes': self.get_node_instances_config_data(self.all_node_instances),
                      'connections': self.get_connections_config_data(self.all_node_instances),
@@ -1034,38 +1129,7 @@ class Flow(QGraphicsView):
         return script_node_instances_list
 
     def get_connections_config_data(self, node_instances, only_with_connections_to=None):
-        script_ni_connections_list = []
-        for ni in node_instances:
-            for out in ni.outputs:
-                if len(out.connected_port_instances) > 0:
-                    for connected_port in out.connected_port_instances:
-
-                        # this only applies when saving config data through deleting node instances:
-                        if only_with_connections_to is not None and \
-                                connected_port.parent_node_instance not in only_with_connections_to and \
-                                ni not in only_with_connections_to:
-                            continue
-                        # because I am not allowed to save connections between nodes connected to each other and both
-                        # connected to the deleted node, only the connections to the deleted node shall be saved
-
-                        connection_dict = {'parent node instance index': node_instances.index(ni),
-                                           'output port index': ni.outputs.index(out)}
-
-                        # yes, very important: when copying components, there might be connections going outside the
-                        # selected lists, these should be ignored. When saving a project, all components are considered,
-                        # so then the index values will never be none
-                        connected_ni_index = node_instances.index(connected_port.parent_node_instance) if \
-                            node_instances.__contains__(connected_port.parent_node_instance) else \
-                            None
-                        connection_dict['connected node instance'] = connected_ni_index
-
-                        connected_ip_index = connected_port.parent_node_instance.inputs.index(connected_port) if \
-                            connected_ni_index is not None else None
-                        connection_dict['connected input port index'] = connected_ip_index
-
-                        script_ni_connections_list.append(connection_dict)
-
-        return script_ni_connections_list
+        return connections_config_data(node_instances, only_with_connections_to)
 
     def get_drawings_config_data(self, drawings):
         drawings_list = []
@@ -19,11 +19,13 @@ class MoveComponents_Command(QUndoCommand):
         items_group.setPos(self.p_from)
         self.last_item_group_pos = items_group.pos()
         self.destroy_items_group(items_group)
+        self.flow.autosave.components_moved(self.flow, self.items_list)
 
     def redo(self):
         items_group = self.items_group()
         items_group.setPos(self.p_to - self.last_item_group_pos)
         self.destroy_items_group(items_group)
+        self.flow.autosave.components_moved(self.flow, self.items_list)
 
 
     def items_group(self):
@@ -153,6 +155,7 @@ class Paste_Command(QUndoCommand):
                                                                    offset_pos=self.offset_for_middle_pos.toPoint())
 
             self.flow.connect_nodes_from_config(new_node_instances, self.data['connections'])
+            new_node_instances = [ni for ni in new_node_instances if ni is not None]
 
             new_drawing_objects = self.flow.place_drawings_from_config(self.data['drawings'],
                                                                        offset_pos=self.offset_for_middle_pos.toPoint())
@@ -0,0 +1,153 @@
+class FlowExecutionPlan:
+    """The compiled graph structure of a Flow used by the FlowExecutor. It assigns integer ids to the NodeInstances and
+    holds everything the executor would otherwise have to look up on every hop (port indices, which NIs are active,
+    which NIs get updated by an output, topological orders of data waves). A plan is only valid as long as the
+    structure of the graph doesn't change, the executor drops it on every change (NIs, ports or connections added or
+    removed) and compiles a new one on the next execution.
+    The tables get filled on first access, so compiling only costs as much as is actually executed afterwards - this
+    matters when a flow is being loaded and every new connection invalidates the plan."""
+
+    def __init__(self):
+        self.node_instances = []  # [NodeInstance], index = id
+        self.node_ids = {}  # {NodeInstance: id}
+        self.active = []  # [bool] by NI id
+        self.input_indices = {}  # {InputPortInstance: index}
+        self.targets = {}  # {OutputPortInstance: [(NodeInstance, input index)]}
+        self.feedback_targets = {}  # {OutputPortInstance: [(NodeInstance, input index)]} see FlowReachability
+        self.successors = []  # [[NodeInstance]] by NI id, NIs updated when data outputs of the NI change
+        self.consumers = []  # [[NodeInstance]] by NI id, NIs connected to data outputs of the NI
+        self.downstream_orders = {}  # {(NI id, ...): ([NodeInstance], {NodeInstance: position})}
+        self.predecessor_counts = {}  # {(NI id, ...): {NodeInstance: number of data predecessors in the wave}}
+
+    def node_id(self, ni):
+        ni_id = self.node_ids.get(ni)
+        if ni_id is None:
+            ni_id = len(self.node_instances)
+            self.node_ids[ni] = ni_id
+            self.node_instances.append(ni)
+            self.active.append(ni.is_active())
+            self.successors.append(None)
+            self.consumers.append(None)
+            for i in range(len(ni.inputs)):
+                self.input_indices[ni.inputs[i]] = i
+        return ni_id
+
+    def is_active(self, ni):
+        return self.active[self.node_id(ni)]
+
+    def input_index(self, input_port):
+        index = self.input_indices.get(input_port)
+        if index is None:
+            self.node_id(input_port.parent_node_instance)
+            index = self.input_indices[input_port]
+        return index
+
+    def output_targets(self, output_port):
+        """Returns the (NI, input index) pairs that get updated by output_port. Exec outputs update all connected NIs,
+        data outputs only passive ones connected through non-feedback connections."""
+
+        targets = self.targets.get(output_port)
+        if targets is None:
+            targets = []
+            feedback_targets = []
+            exec_output = output_port.type_ == 'exec'
+            for cpi in output_port.connected_port_instances:
+                ni = cpi.parent_node_instance
+                if exec_output:
+                    targets.append((ni, self.input_index(cpi)))
+                elif not self.is_active(ni):
+                    if cpi.feedback:
+                        feedback_targets.append((ni, self.input_index(cpi)))
+                    else:
+                        targets.append((ni, self.input_index(cpi)))
+            self.targets[output_port] = targets
+            self.feedback_targets[output_port] = feedback_targets
+        return targets
+
+    def output_feedback_targets(self, output_port):
+        """Returns the (NI, input index) pairs of passive NIs connected to the data output_port through feedback
+        connections."""
+
+        if output_port not in self.feedback_targets:
+            self.output_targets(output_port)
+        return self.feedback_targets[output_port]
+
+    def data_successors(self, ni):
+        """Returns all NIs that get updated when a data output of ni changes."""
+
+        ni_id = self.node_id(ni)
+        successors = self.successors[ni_id]
+        if successors is None:
+            successors = []
+            for o in ni.outputs:
+                if o.type_ == 'data':
+                    for target, input_index in self.output_targets(o):
+                        successors.append(target)
+            self.successors[ni_id] = successors
+        return successors
+
+    def data_consumers(self, ni):
+        """Returns all NIs that are connected to a data output of ni through non-feedback connections, active or
+        not."""
+
+        ni_id = self.node_id(ni)
+        consumers = self.consumers[ni_id]
+        if consumers is None:
+            consumers = []
+            for o in ni.outputs:
+                if o.type_ == 'data':
+                    for cpi in o.connected_port_instances:
+                        if not cpi.feedback:
+                            consumers.append(cpi.parent_node_instance)
+            self.consumers[ni_id] = consumers
+        return consumers
+
+    def downstream_order(self, node_instances):
+        """Returns the given NIs and all NIs that can be reached from them through data connections in topological
+        order (reverse DFS postorder), together with a dict of their positions in that order. The DFS is iterative,
+        so arbitrarily deep graphs don't hit the recursion limit."""
+
+        key = tuple([self.node_id(ni) for ni in node_instances])
+        cached = self.downstream_orders.get(key)
+        if cached is not None:
+            return cached
+
+        order = []
+        visited = set()
+        for root in node_instances:
+            if root in visited:
+                continue
+            visited.add(root)
+            stack = [(root, iter(self.data_successors(root)))]
+            while len(stack) > 0:
+                ni, successors = stack[-1]
+                for s in successors:
+                    if s not in visited:
+                        visited.add(s)
+                        stack.append((s, iter(self.data_successors(s))))
+                        break
+                else:
+                    stack.pop()
+                    order.append(ni)
+
+        order.reverse()
+        positions = {order[i]: i for i in range(len(order))}
+        self.downstream_orders[key] = (order, positions)
+        return order, positions
+
+    def wave_predecessor_counts(self, node_instances):
+        """Returns for every NI of the downstream_order() of the given NIs how many of the data connections leading
+        to it come from NIs of the same wave. Used for scheduling parallel waves, the dict must not be modified."""
+
+        key = tuple([self.node_id(ni) for ni in node_instances])
+        counts = self.predecessor_counts.get(key)
+        if counts is not None:
+            return counts
+
+        order, positions = self.downstream_order(node_instances)
+        counts = {ni: 0 for ni in order}
+        for ni in order:
+            for s in self.data_successors(ni):
+                counts[s] += 1
+        self.predecessor_counts[key] = counts
+        return counts
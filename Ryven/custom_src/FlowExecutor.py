@@ -0,0 +1,537 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from queue import Queue
+import threading
+
+from custom_src.AsyncLoop import get_async_loop
+from custom_src.FlowExecutionPlan import FlowExecutionPlan
+from custom_src.FlowReachability import FlowReachability
+from custom_src.global_tools.Debugger import Debugger
+from custom_src.NodeOffloading import OffloadedUpdate, get_process_pool, run_offloaded_update
+
+
+class FlowExecutor:
+    """Owned by a Flow. Schedules the updates of NodeInstances that are caused by changed data outputs in data-flow
+    mode. Instead of recursively pushing every new value through the graph (which updates a NodeInstance once for
+    every path it can be reached on and quickly exceeds the recursion limit in deep graphs), the downstream subgraph of
+    the triggered NodeInstances gets sorted topologically once and every affected NodeInstance is updated exactly once
+    per wave, after all its predecessors in the wave have been updated.
+    In exec-flow mode, data is pulled instead. The values of data outputs are cached then, so a NI that is requested
+    multiple times during one exec wave (f.ex. inside the body of a loop) doesn't recompute its whole upstream chain
+    every time, as long as nothing upstream changed in between.
+    Exec signals are processed by a work loop (see run_execs()) instead of calling the connected NIs directly, so long
+    exec chains and loops driving deep bodies run at constant Python stack depth.
+    All structural lookups go through a FlowExecutionPlan which is reused until the graph changes.
+    Data connections closing a cycle are feedback connections (see FlowReachability). They don't belong to the
+    waves, a NI receiving new data through one gets updated in the next step instead: once a wave and all waves
+    caused by it are finished, the NIs triggered through feedback connections form the next wave. So every iteration
+    of a loop costs one wave, and the number of steps is limited.
+    Data outputs set during a NI update are committed together when the update is finished (or before the NI sends an
+    exec signal), so a NI setting several outputs causes only one wave and its consumers get updated only once.
+    In parallel mode, data waves are not processed in topological order but dispatched to a thread pool: every NI of
+    the wave is started as soon as all its predecessors in the wave are finished, so independent branches run
+    concurrently (which pays off for nodes releasing the GIL, like OpenCV or NumPy ones). Everything touching Qt has
+    to run in the main thread then, so the workers pass such calls to the main thread (see call_in_main_thread()).
+    NIs with an async update_event() are run by an asyncio loop (see run_async_update()), so waiting for I/O doesn't
+    block the flow. The same loop waits for the updates offloaded to worker processes (see offload_update())."""
+
+    def __init__(self, flow):
+        self.flow = flow
+        self.plan: FlowExecutionPlan = None
+        self.reachability = FlowReachability(flow)
+
+        # current wave
+        self.wave_running = False
+        self.wave_positions = {}  # {NodeInstance: index in the wave's topological order}
+        self.wave_pos = -1  # index of the NI that is currently being updated
+        self.marked = {}  # {NodeInstance: input index} NIs that received new data in the current wave
+        self.next_wave = {}  # {NodeInstance: input index} NIs the current wave can't reach anymore
+        self.next_step = {}  # {NodeInstance: input index} NIs that received new data through feedback connections
+        self.feedback_steps_limit = 1000  # max number of steps caused by feedback connections per data change
+        self.output_batches = 0  # number of open output batches (running NI updates), triggered NIs wait meanwhile
+
+        # exec-flow mode: requested data outputs get pulled, their values are reused within one exec wave
+        self.exec_wave = 0  # everything that happens during one top-level NI update belongs to the same exec wave
+        self.update_depth = 0
+
+        # async updates (see run_async_update()), {NodeInstance: number of its async updates that haven't finished}
+        self.async_updates = {}
+        self.offloaded_updates = 0  # number of updates currently running in worker processes
+
+        # exec signals sent by the NI that is currently run by run_execs(), None outside of run_execs()
+        self.deferred_execs = None
+
+        # parallel data-flow mode
+        self.parallel = False
+        self.thread_pool: ThreadPoolExecutor = None
+        self.parallel_wave_running = False
+        self.wave_started = set()  # NIs of the current parallel wave that have been dispatched or skipped already
+        self.wave_lock = threading.Lock()
+        self.main_thread_queue = Queue()  # calls passed to the main thread and finished NIs, sent by the workers
+
+        # held while the flow is being executed, needed if async updates are run by a loop in another thread
+        self.lock = threading.RLock()
+
+    def get_plan(self) -> FlowExecutionPlan:
+        if self.plan is None:
+            self.plan = FlowExecutionPlan()
+        return self.plan
+
+    def graph_changed(self):
+        """Called whenever NIs, ports or connections get added or removed. The current plan is outdated then."""
+
+        self.plan = None
+
+    def node_instances_changed(self):
+        self.reachability.node_instances_changed()
+        self.graph_changed()
+
+    def connection_added(self, output_port, input_port):
+        if output_port.type_ == 'data':
+            self.reachability.connection_added(output_port, input_port)
+        self.graph_changed()
+
+    def connection_removed(self, output_port, input_port):
+        if output_port.type_ == 'data':
+            self.reachability.connection_removed(output_port, input_port)
+        self.graph_changed()
+
+    def data_output_updated(self, output_port):
+        """Called by a data OutputPortInstance when its value has been set in data-flow mode."""
+
+        # active NIs only get updated through exec inputs, the plan only lists passive targets for data outputs
+        plan = self.get_plan()
+        for ni, input_index in plan.output_targets(output_port):
+            self.trigger(ni, input_index)
+        for ni, input_index in plan.output_feedback_targets(output_port):
+            self.trigger_feedback(ni, input_index)
+
+        if self.wave_running or self.output_batches > 0:
+            return  # the current wave or the commit of the batch will handle it
+
+        self.run_waves()
+
+    def begin_outputs(self):
+        self.output_batches += 1
+
+    def commit_outputs(self):
+        self.output_batches -= 1
+        self.run_waves()
+
+    @contextmanager
+    def output_batch(self):
+        """Data outputs set inside the with block cause only one wave, at its end."""
+
+        self.begin_outputs()
+        try:
+            yield
+        finally:
+            self.commit_outputs()
+
+    def run_waves(self):
+        """Updates all NIs that have been triggered by data outputs since the last waves."""
+
+        if self.wave_running:
+            return
+
+        steps = 0
+        while len(self.next_wave) > 0 or len(self.next_step) > 0:  # no recursion here
+            if len(self.next_wave) == 0:
+                steps += 1
+                if steps > self.feedback_steps_limit:
+                    Debugger.debug('feedback loop stopped after', self.feedback_steps_limit, 'steps')
+                    self.next_step = {}
+                    break
+                self.next_wave = self.next_step
+                self.next_step = {}
+
+            # every wave might leave work for another one
+            triggered = self.next_wave
+            self.next_wave = {}
+            self.run_wave(triggered)
+
+    def input_updated(self, input_port):
+        """Called by an InputPortInstance that received a new value directly (f.ex. from its widget or through a new
+        connection). Active NIs only get updated through exec inputs."""
+
+        plan = self.get_plan()
+        ni = input_port.parent_node_instance
+        if input_port.type_ == 'exec' or not plan.is_active(ni):
+            ni.update(plan.input_index(input_port))
+
+    def trigger(self, ni, input_index):
+        """Marks the NI to get updated in the current wave if it still lies ahead, otherwise in the next one."""
+
+        if self.parallel_wave_running:
+            with self.wave_lock:
+                if ni in self.wave_positions and ni not in self.wave_started:
+                    self.marked.setdefault(ni, input_index)
+                else:
+                    self.next_wave.setdefault(ni, input_index)
+            return
+
+        pos = self.wave_positions.get(ni)
+        if self.wave_running and pos is not None and pos > self.wave_pos:
+            self.marked.setdefault(ni, input_index)
+        else:
+            self.next_wave.setdefault(ni, input_index)
+
+    def trigger_feedback(self, ni, input_index):
+        if self.parallel_wave_running:
+            with self.wave_lock:
+                self.next_step.setdefault(ni, input_index)
+        else:
+            self.next_step.setdefault(ni, input_index)
+
+    def run_wave(self, triggered: dict):
+        if self.parallel:
+            self.run_wave_parallel(triggered)
+            return
+
+        order, self.wave_positions = self.get_plan().downstream_order(list(triggered.keys()))
+
+        self.marked = triggered
+        self.wave_running = True
+        try:
+            for i in range(len(order)):
+                ni = order[i]
+                if ni in self.marked:
+                    self.wave_pos = i
+                    ni.update(self.marked.pop(ni))
+        finally:
+            self.wave_running = False
+            self.wave_positions = {}
+            self.wave_pos = -1
+            self.marked = {}
+
+    def run_wave_parallel(self, triggered: dict):
+        plan = self.get_plan()
+        order, self.wave_positions = plan.downstream_order(list(triggered.keys()))
+        pending = dict(plan.wave_predecessor_counts(list(triggered.keys())))
+
+        if self.thread_pool is None:
+            self.thread_pool = ThreadPoolExecutor(thread_name_prefix='FlowExecutor')
+
+        ready = [ni for ni in order if pending[ni] == 0]
+        running = 0
+
+        # passive NIs don't send exec signals, they must not flush the ones of an active NI that caused the wave
+        outer_deferred_execs = self.deferred_execs
+        self.deferred_execs = None
+
+        self.marked = triggered
+        self.wave_started = set()
+        self.wave_running = True
+        self.parallel_wave_running = True
+        try:
+            while True:
+                while len(ready) > 0:
+                    ni = ready.pop()
+                    with self.wave_lock:
+                        self.wave_started.add(ni)
+                        input_index = self.marked.pop(ni, None)
+                    if input_index is not None:
+                        self.thread_pool.submit(self.update_in_worker, ni, input_index)
+                        running += 1
+                    else:  # nothing changed for ni, so its successors only wait for their other predecessors
+                        self.release_successors(ni, pending, ready)
+
+                if running == 0:
+                    break
+
+                func, args, kwargs, result = self.main_thread_queue.get()
+                if func is None:  # a NI has finished
+                    running -= 1
+                    self.release_successors(args, pending, ready)
+                else:
+                    try:
+                        result['value'] = func(*args, **kwargs)
+                    except Exception as e:
+                        result['exception'] = e
+                    result['done'].set()
+        finally:
+            self.parallel_wave_running = False
+            self.wave_running = False
+            self.wave_positions = {}
+            self.wave_started = set()
+            self.marked = {}
+            self.deferred_execs = outer_deferred_execs
+
+    def release_successors(self, ni, pending: dict, ready: list):
+        for s in self.get_plan().data_successors(ni):
+            if s in pending:
+                pending[s] -= 1
+                if pending[s] == 0:
+                    ready.append(s)
+
+    def update_in_worker(self, ni, input_index):
+        main_widget = ni.main_widget
+        if main_widget is not None:
+            ni.main_widget = MainThreadProxy(self, main_widget)
+        try:
+            ni.update(input_index)
+        finally:
+            ni.main_widget = main_widget
+            self.main_thread_queue.put((None, ni, None, None))
+
+    def call_in_main_thread(self, func, *args, **kwargs):
+        """Calls func in the main thread and returns its result. Outside of a parallel wave or in the main thread
+        itself, func is just called directly."""
+
+        if not self.parallel_wave_running or threading.current_thread() is threading.main_thread():
+            return func(*args, **kwargs)
+
+        result = {'done': threading.Event()}
+        self.main_thread_queue.put((func, args, kwargs, result))
+        result['done'].wait()
+        if 'exception' in result:
+            raise result['exception']
+        return result['value']
+
+    def exec_output(self, output_port):
+        """Sends an exec signal to all exec inputs connected to output_port. Inside a NI run by run_execs(), the
+        signal gets deferred until the NI interacts with the flow again or returns, so a chain of exec connections is
+        processed by the loop in run_execs() instead of nesting Python frames for every hop."""
+
+        self.run_waves()  # the data outputs set before must arrive first
+
+        entries = self.get_plan().output_targets(output_port)
+
+        if self.deferred_execs is not None:
+            self.deferred_execs.extend(entries)
+        else:
+            self.run_execs(entries)
+
+    def run_execs(self, entries):
+        """Updates the NIs of the given (NI, input index) entries and everything they execute, depth first like
+        the recursive execution did, but using an explicit stack."""
+
+        stack = list(reversed(entries))
+        while len(stack) > 0:
+            ni, input_index = stack.pop()
+
+            outer_deferred_execs = self.deferred_execs
+            self.deferred_execs = []
+            try:
+                ni.update(input_index)
+            finally:
+                deferred_execs = self.deferred_execs
+                self.deferred_execs = outer_deferred_execs
+
+            stack.extend(reversed(deferred_execs))
+
+    def flush_execs(self):
+        """Processes the deferred exec signals of the currently running NI. This gets called whenever the NI accesses
+        data or variables again, so it observes the same state as if the signals had been processed immediately
+        (f.ex. a ForEach NI setting the next value only after its loop body has been executed)."""
+
+        if self.deferred_execs:
+            entries = self.deferred_execs
+            self.deferred_execs = []
+            self.run_execs(entries)
+
+    def node_update_started(self):
+        if self.parallel_wave_running:
+            return  # exec waves are only needed in exec-flow mode, parallel waves only happen in data-flow mode
+
+        if self.update_depth == 0:
+            self.exec_wave += 1
+        self.update_depth += 1
+        self.begin_outputs()
+
+    def node_update_finished(self):
+        if self.parallel_wave_running:
+            return
+
+        self.update_depth -= 1
+        self.commit_outputs()
+
+    def offload_update(self, ni, input_called):
+        """Runs the update_event() of ni in a worker process. Falls back to calling it directly if ni's data can't
+        be sent to the worker, update_event() needs something the worker doesn't have or the worker fails.
+        Returns what update_event() returns, or a coroutine which waits for the worker and applies its result. It
+        gets run like the one of an async update_event() (see run_async_update()), so the main thread doesn't wait
+        for the worker. In exec-flow mode, that only happens for updates triggered by an exec input, the outputs of
+        other updates could get pulled right away (see pull_output()), so they happen in-process. Updates in other
+        threads (f.ex. the workers of parallel waves) wait for the worker process themselves."""
+
+        if not self.flow.algorithm_mode.mode_data_flow and \
+                (input_called < 0 or ni.inputs[input_called].type_ != 'exec'):
+            return ni.update_event(input_called)
+
+        task = OffloadedUpdate.prepare(ni, input_called)
+        if task is None:
+            return ni.update_event(input_called)
+
+        with self.wave_lock:  # workers of parallel waves offload too
+            self.offloaded_updates += 1
+        try:
+            future = get_process_pool().submit(run_offloaded_update, task)
+        except Exception:  # broken pool, ...
+            with self.wave_lock:
+                self.offloaded_updates -= 1
+            return ni.update_event(input_called)
+
+        if threading.current_thread() is not threading.main_thread():
+            try:
+                result = future.result()
+            except Exception:  # pickling errors, broken pool, ...
+                result = None
+            finally:
+                with self.wave_lock:
+                    self.offloaded_updates -= 1
+            return self.apply_offloaded_update(ni, input_called, task, result)
+
+        return self.finish_offloaded_update(ni, input_called, task, future)
+
+    async def finish_offloaded_update(self, ni, input_called, task, future):
+        try:
+            result = await asyncio.wrap_future(future)
+        except Exception:  # pickling errors, broken pool, ...
+            result = None
+        finally:
+            with self.wave_lock:
+                self.offloaded_updates -= 1
+
+        result = self.apply_offloaded_update(ni, input_called, task, result)
+        if asyncio.iscoroutine(result):  # the fallback ran an async update_event()
+            await result
+
+    def apply_offloaded_update(self, ni, input_called, task, result):
+        if result is None:
+            return ni.update_event(input_called)
+        task.apply(ni, result)
+
+    def run_async_update(self, ni, coroutine):
+        """Schedules the coroutine returned by the async update_event() of ni on the asyncio loop and returns
+        immediately. Every step of the coroutine (up to the next await) counts as a NI update of its own."""
+
+        self.async_updates[ni] = self.async_updates.get(ni, 0) + 1
+        get_async_loop().run(SteppedCoroutine(self, coroutine, ni).run())
+
+    def async_update_finished(self, ni):
+        self.async_updates[ni] -= 1
+        if self.async_updates[ni] == 0:
+            del self.async_updates[ni]
+
+    def busy(self) -> bool:
+        """Whether the flow is running anything, a wave, an update, an async update that hasn't finished yet or an
+        offloaded update."""
+
+        return self.wave_running or self.update_depth > 0 or len(self.async_updates) > 0 or \
+            self.offloaded_updates > 0
+
+    def pull_output(self, output_port):
+        """exec-flow mode: Makes sure the value of a requested data output is up to date. The parent NI only gets
+        updated if its outputs haven't been computed in the current exec wave yet or got invalidated since then.
+        An async update_event() sets the outputs later, so the current values get returned and are not marked as
+        computed in this wave. The NI doesn't get updated again while its async update is still running, setting the
+        outputs then invalidates the NIs depending on them."""
+
+        if self.output_current(output_port):
+            return
+
+        ni = output_port.parent_node_instance
+        if ni in self.async_updates:
+            return
+        ni.update()
+        if ni in self.async_updates:
+            return
+        for o in ni.outputs:
+            o.val_wave = self.exec_wave
+
+    def output_current(self, output_port) -> bool:
+        """exec-flow mode: Whether the value of the data output can be used without updating its NI."""
+
+        return output_port.val_wave == self.exec_wave and output_port.parent_node_instance.memoize_outputs
+
+    def input_available(self, input_port) -> bool:
+        """Whether the value of the data input can be read without updating other NIs."""
+
+        if len(input_port.connected_port_instances) == 0 or input_port.feedback or \
+                self.flow.algorithm_mode.mode_data_flow:
+            return True
+        return self.output_current(input_port.connected_port_instances[0])
+
+    def invalidate_downstream(self, output_port):
+        """exec-flow mode: The value of a data output has been set, so the cached outputs of all NIs depending on it
+        are stale."""
+
+        self.invalidate([cpi.parent_node_instance for cpi in output_port.connected_port_instances])
+
+    def invalidate(self, node_instances):
+        """exec-flow mode: Invalidates the cached outputs of the given NIs and of all NIs depending on them. NIs that
+        are already invalid don't need to be passed through again."""
+
+        plan = self.get_plan()
+        stack = list(node_instances)
+        while len(stack) > 0:
+            ni = stack.pop()
+            valid = False
+            for o in ni.outputs:
+                if o.val_wave == self.exec_wave:
+                    valid = True
+                o.val_wave = None
+            if not valid:
+                continue
+
+            stack.extend(plan.data_consumers(ni))
+
+
+class SteppedCoroutine:
+    """Runs a coroutine step by step, holding the executor's lock and treating every step like a NI update."""
+
+    def __init__(self, executor: FlowExecutor, coroutine, ni):
+        self.executor = executor
+        self.coroutine = coroutine
+        self.ni = ni
+
+    async def run(self):
+        try:
+            return await self
+        finally:
+            with self.executor.lock:
+                self.executor.async_update_finished(self.ni)
+
+    def __await__(self):
+        send_val = None
+        throw_exc = None
+        while True:
+            with self.executor.lock:
+                self.executor.node_update_started()
+                try:
+                    if throw_exc is not None:
+                        yielded = self.coroutine.throw(throw_exc)
+                    else:
+                        yielded = self.coroutine.send(send_val)
+                except StopIteration as e:
+                    return e.value
+                finally:
+                    self.executor.node_update_finished()
+
+            send_val = None
+            throw_exc = None
+            try:
+                send_val = yield yielded
+            except BaseException as e:
+                throw_exc = e
+
+
+class MainThreadProxy:
+    """Replaces the main_widget of a NI while the NI is updated by a worker thread, so all method calls on the widget
+    are performed in the main thread."""
+
+    def __init__(self, executor: FlowExecutor, target):
+        self.executor = executor
+        self.target = target
+
+    def __getattr__(self, name):
+        attr = getattr(self.target, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            return self.executor.call_in_main_thread(attr, *args, **kwargs)
+
+        return call
@@ -1,4 +1,6 @@
+import json
 import os,  sys
+import time
 
 from PySide2.QtGui import QColor, QFontDatabase, QIcon, QKeySequence
 from PySide2.QtWidgets import QMainWindow, QFileDialog, QShortcut, QAction, QActionGroup, QMenu, QMessageBox
@@ -20,26 +22,35 @@ from custom_src.builtin_nodes.GetVar_NodeInstance import GetVar_NodeInstance
 from custom_src.builtin_nodes.SetVar_NodeInstance import SetVar_NodeInstance
 from custom_src.global_tools.Debugger import Debugger
 from custom_src.Design import Design
+from custom_src.Autosave import Autosave
+from custom_src.LoadTiming import load_phase, trace_phase, load_times_report, add_import_time, import_times_report
+from custom_src.PackageImporter import import_package_module
+from custom_src.ProjectFile import StreamedList, write_project
+from custom_src.script_variables.Variable import VariableStorage
 
 
 class MainWindow(QMainWindow):
     def __init__(self, config):
         super(MainWindow, self).__init__()
 
-        QFontDatabase.addApplicationFont('../resources/fonts/poppins/Poppins-Medium.ttf')
-        QFontDatabase.addApplicationFont('../resources/fonts/source code pro/SourceCodePro-Regular.ttf')
-        QFontDatabase.addApplicationFont('../resources/fonts/asap/Asap-Regular.ttf')
+        with load_phase('fonts'):
+            QFontDatabase.addApplicationFont('../resources/fonts/poppins/Poppins-Medium.ttf')
+            QFontDatabase.addApplicationFont('../resources/fonts/source code pro/SourceCodePro-Regular.ttf')
+            QFontDatabase.addApplicationFont('../resources/fonts/asap/Asap-Regular.ttf')
 
-        self.ui = Ui_MainWindow()
-        self.ui.setupUi(self)
+        with load_phase('UI setup'):
+            self.ui = Ui_MainWindow()
+            self.ui.setupUi(self)
         if MainConsole.main_console is not None:
             self.ui.scripts_console_splitter.addWidget(MainConsole.main_console)
         self.ui.scripts_console_splitter.setSizes([350, 350])
         self.ui.splitter.setSizes([120, 800])
         self.setWindowTitle('Ryven')
         self.setWindowIcon(QIcon('../resources/pics/program_icon2.png'))
-        self.load_stylesheet('dark')
+        with load_phase('stylesheet'):
+            self.load_stylesheet('dark')
         self.ui.scripts_tab_widget.removeTab(0)
+        self.ui.scripts_tab_widget.currentChanged.connect(self.script_tab_changed)
 
         # menu actions
         self.flow_design_actions = []
@@ -59,9 +70,16 @@ class MainWindow(QMainWindow):
 
         # GENERAL ATTRIBUTES
         self.scripts = []
+        self.loaded_scripts = []  # scripts whose flows are loaded, the most recently shown one last
+        self.max_loaded_scripts = None  # inactive scripts get unloaded if more are loaded, None: keep all loaded
+        self.print_load_times = False  # for the scripts that get loaded lazily after startup
         self.custom_nodes = []
         self.all_nodes = [SetVar_Node(), GetVar_Node(), Val_Node(), Result_Node()]
+        self.nodes_index = {}  # {(package name, title): node} for finding the nodes of saved NIs (used in Flow)
+        for n in self.all_nodes:
+            self.index_node(n)
         self.package_names = []
+        self.autosave = Autosave(self)  # (used in Flow)
 
         #   holds NI subCLASSES for imported nodes:
         self.all_node_instance_classes = {
@@ -75,6 +93,11 @@ class MainWindow(QMainWindow):
         #   {node : {str: PortInstanceWidget-subclass}} (used in PortInstance)
         self.custom_node_input_widget_classes = {}
 
+        #   the nodes whose classes haven't been imported yet, see import_node_classes()
+        #   {node: {'package path': ..., 'module name': ..., 'class name': ..., 'has main widget': ...,
+        #           'custom input widgets': [...]}}
+        self.pending_node_imports = {}
+
         # UI
         self.scripts_list_widget = ScriptsListWidget(self, self.scripts)
         self.ui.scripts_scrollArea.setWidget(self.scripts_list_widget)
@@ -86,10 +109,17 @@ class MainWindow(QMainWindow):
             self.try_to_create_new_script()
         elif config['config'] == 'open project':
             print('importing packages...')
-            self.import_packages(config['required packages'])
+            with load_phase('importing packages'):
+                self.import_packages(config['required packages'])
             print('loading project...')
-            self.parse_project(config['content'])
+            with load_phase('loading project'):
+                self.parse_project(config['content'])
             print('finished')
+            print(load_times_report())
+            print(import_times_report())
+        self.print_load_times = True
+
+        self.autosave.start()
 
         print('''
 CONTROLS
@@ -172,6 +202,20 @@ saving: ctrl+s
 
         self.ui.menuView.addMenu(animations_menu)
 
+        # loaded scripts
+        loaded_scripts_AG = QActionGroup(self)
+        loaded_scripts_menu = QMenu('Keep Scripts Loaded', self)
+        for text, max_loaded_scripts in (('All', None), ('3 Most Recently Shown', 3), ('Only the Shown One', 1)):
+            action = QAction(text, self)
+            action.setCheckable(True)
+            action.setChecked(max_loaded_scripts is None)
+            action.setData(max_loaded_scripts)
+            loaded_scripts_AG.addAction(action)
+            loaded_scripts_menu.addAction(action)
+        loaded_scripts_AG.triggered.connect(self.on_max_loaded_scripts_changed)
+
+        self.ui.menuView.addMenu(loaded_scripts_menu)
+
         gen_code_action = QAction('gen src code', self)
         gen_code_action.triggered.connect(self.on_gen_code_triggered)
         self.ui.menuFile.addAction(gen_code_action)
@@ -198,6 +242,10 @@ saving: ctrl+s
         else:
             Design.animations_enabled = False
 
+    def on_max_loaded_scripts_changed(self, action):
+        self.max_loaded_scripts = action.data()
+        self.unload_inactive_scripts()
+
     def on_design_action_triggered(self):
         index = self.flow_design_actions.index(self.sender())
         Design.set_flow_theme(Design.flow_themes[index])
@@ -247,18 +295,49 @@ saving: ctrl+s
 
         new_script = Script(self, name, config)
         new_script.name_changed.connect(self.rename_script)
+        if new_script.flow is not None:
+            self.loaded_scripts.insert(0, new_script)
+        self.scripts.append(new_script)  # before adding the tab, which might show it (see script_tab_changed())
         self.ui.scripts_tab_widget.addTab(new_script.widget, new_script.name)
-        self.scripts.append(new_script)
         self.scripts_list_widget.recreate_ui()
+        self.autosave.scripts_changed()
 
     def rename_script(self, script, new_name):
         self.ui.scripts_tab_widget.setTabText(self.scripts.index(script), new_name)
         script.name = new_name
+        self.autosave.scripts_changed()
 
     def delete_script(self, script):
         index = self.scripts.index(script)
+        del self.scripts[index]  # before removing the tab, which might show another script
+        if script in self.loaded_scripts:
+            self.loaded_scripts.remove(script)
         self.ui.scripts_tab_widget.removeTab(index)
-        del self.scripts[index]
+        self.autosave.scripts_changed()
+
+    def script_tab_changed(self, index):
+        if index < 0 or index >= len(self.scripts):
+            return
+
+        script = self.scripts[index]
+        if script.flow is None:
+            script.load_flow()
+            if self.print_load_times:
+                print(load_times_report())
+
+        if script in self.loaded_scripts:
+            self.loaded_scripts.remove(script)
+        self.loaded_scripts.append(script)
+        self.unload_inactive_scripts()
+
+    def unload_inactive_scripts(self):
+        if self.max_loaded_scripts is None:
+            return
+
+        # the most recently shown scripts stay loaded, the shown one is the last
+        for script in self.loaded_scripts[:-self.max_loaded_scripts]:
+            if script.unload_flow():
+                self.loaded_scripts.remove(script)
 
     def get_current_script(self):
         return self.scripts[self.ui.scripts_tab_widget.currentIndex()]
@@ -267,34 +346,51 @@ saving: ctrl+s
     def on_import_nodes_triggered(self):
         file_path = QFileDialog.getOpenFileName(self, 'select nodes file', '../packages', 'Ryven Packages(*.rpc)',)[0]
         if file_path != '':
-            self.import_nodes_package(file_path)
+            self.import_packages([file_path])
 
     def import_packages(self, packages_list):
+        """Reads, translates and parses the packages and creates their nodes in the given order, the classes of the
+        nodes are imported when they're needed (see import_node_classes())."""
+
+        # Important: translate the packages first (metacore files -> src code files)
+        PackageTranslator = self.get_class_from_file(file_path='../Ryven_PackageTranslator',
+                                                     file_name='Ryven_PackageTranslator',
+                                                     class_name='PackageTranslator')
+
         for p in packages_list:
-            self.import_nodes_package(p)
+            with load_phase(os.path.basename(p)):
+                j_obj = self.read_nodes_package(p, PackageTranslator)
+                if j_obj is not None:
+                    self.import_nodes_package(p, j_obj)
+
+    @staticmethod
+    def read_nodes_package(file_path, PackageTranslator):
+        """Returns the parsed package file, None if it can't be read."""
 
-    def import_nodes_package(self, file_path):
         j_str = ''
         try:
             f = open(file_path)
             j_str = f.read()
             f.close()
-        except FileExistsError or FileNotFoundError:
+        except OSError:
             Debugger.debug('couldn\'t open file')
-            return
+            return None
+
+        package_name = os.path.splitext(os.path.basename(file_path))[0]
+        with trace_phase('translating '+package_name):
+            package_translator = PackageTranslator(os.path.dirname(os.path.abspath(file_path)))
+
+        # strict=False is necessary to allow control characters like '\n' for newline when loading the json
+        with trace_phase('parsing '+package_name):
+            return json.loads(j_str, strict=False)
 
+    def import_nodes_package(self, file_path, j_obj):
         # don't import a package twice if it already has been imported
         filename = os.path.splitext(os.path.basename(file_path))
         if filename in self.package_names:
             return
 
-        # Important: translate the package first (metacore files -> src code files)
-        PackageTranslator = self.get_class_from_file(file_path='../Ryven_PackageTranslator',
-                                                     file_name='Ryven_PackageTranslator',
-                                                     class_name='PackageTranslator')
-        package_translator = PackageTranslator(os.path.dirname(os.path.abspath(file_path)))
-
-        if self.parse_nodes(j_str,
+        if self.parse_nodes(j_obj,
                             package_path=os.path.dirname(file_path),
                             package_name=os.path.splitext(os.path.basename(file_path))[0]):
 
@@ -302,15 +398,9 @@ saving: ctrl+s
 
 
 
-    def parse_nodes(self, j_str, package_path, package_name) -> bool:
+    def parse_nodes(self, j_obj, package_path, package_name) -> bool:
         """Parses the nodes from a node package in JSON format.
-        Here, all the classes get imported and for every node a Node object with specific attribute values gets
-        created."""
-
-        import json
-
-        # strict=False is necessary to allow control characters like '\n' for newline when loading the json
-        j_obj = json.loads(j_str, strict=False)
+        Here, for every node a Node object with specific attribute values gets created."""
 
         Debugger.debug(j_obj['type'])
         if j_obj['type'] != 'Ryven nodes package' and j_obj['type'] != 'vyScriptFP nodes package':  # old syntax
@@ -352,39 +442,12 @@ saving: ctrl+s
         module_name_separator = '___'
 
         # CUSTOM CLASS IMPORTS ----------------------------------------------------------------------------
-        # creating all the necessary path variables here for all potentially imported classes
-
-        #       IMPORT NODE INSTANCE SUBCLASS
-        node_instance_class_file_path = package_path + '/nodes/' + node_module_name + '/'
-        node_instance_widgets_file_path = node_instance_class_file_path + '/widgets'
-        node_instance_filename = node_module_name  # the NI file's name is just the 'module name'
-        new_node_instance_class = self.get_class_from_file(file_path=node_instance_class_file_path,
-                                                           file_name=node_instance_filename,
-                                                           class_name=node_class_name + '_NodeInstance')
-        if new_node_instance_class is None: return False    # error while import
-
-        self.all_node_instance_classes[new_node] = new_node_instance_class
-
-        #       IMPORT MAIN WIDGET
-        if node_has_main_widget:
-            main_widget_filename = node_module_name + module_name_separator + 'main_widget'
-            new_node.main_widget_class = self.get_class_from_file(file_path=node_instance_widgets_file_path,
-                                                                  file_name=main_widget_filename,
-                                                                  class_name=node_class_name +
-                                                                             '_NodeInstance_MainWidget')
-            if new_node.main_widget_class is None: return False     # error while import
-
-        #       IMPORT CUSTOM INPUT WIDGETS
-        #       I need to create the dict for the node's potential custom input widgets already here
-        self.custom_node_input_widget_classes[new_node] = {}
-        for w_name in j_node['custom input widgets']:
-            input_widget_filename = node_module_name + module_name_separator + w_name
-            custom_widget_class = self.get_class_from_file(file_path=node_instance_widgets_file_path,
-                                                           file_name=input_widget_filename,
-                                                           class_name=w_name + '_PortInstanceWidget')
-            if custom_widget_class is None: return False     # error while import
-            self.custom_node_input_widget_classes[new_node][w_name] = custom_widget_class
-
+        # the classes get imported when the first NI of the node gets created, see import_node_classes()
+        self.pending_node_imports[new_node] = {'package path': package_path,
+                                               'module name': node_module_name,
+                                               'class name': node_class_name,
+                                               'has main widget': node_has_main_widget,
+                                               'custom input widgets': j_node['custom input widgets']}
         # ---------------------------------------------------------------------------------------------------
 
         j_n_inputs = j_node['inputs']
@@ -443,9 +506,79 @@ saving: ctrl+s
 
         self.custom_nodes.append(new_node)
         self.all_nodes.append(new_node)
+        self.index_node(new_node)
+
+        return True
+
+    def import_node_classes(self, node) -> bool:
+        """Imports the NI class, main widget class and custom input widget classes of a node from its package if that
+        didn't happen yet. Importing all nodes' modules when a package gets imported would also import all the
+        libraries they use, even if only a few of the nodes are ever used. Returns False if an import failed."""
+
+        node_import = self.pending_node_imports.get(node)
+        if node_import is None:
+            return True
+
+        class_files = self.node_class_files(node_import)
+
+        t0 = time.perf_counter()
+        try:
+            #       IMPORT NODE INSTANCE SUBCLASS
+            file_path, file_name, class_name = class_files[0]
+            new_node_instance_class = self.get_class_from_file(os.path.dirname(file_path), file_name, class_name)
+            if new_node_instance_class is None: return False    # error while import
+
+            #       IMPORT MAIN WIDGET
+            main_widget_class = None
+            if node.has_main_widget:
+                file_path, file_name, class_name = class_files[1]
+                main_widget_class = self.get_class_from_file(os.path.dirname(file_path), file_name, class_name)
+                if main_widget_class is None: return False     # error while import
+
+            #       IMPORT CUSTOM INPUT WIDGETS
+            input_widget_classes = {}
+            for w_name, (file_path, file_name, class_name) in zip(node_import['custom input widgets'],
+                                                                  class_files[2 if node.has_main_widget else 1:]):
+                custom_widget_class = self.get_class_from_file(os.path.dirname(file_path), file_name, class_name)
+                if custom_widget_class is None: return False     # error while import
+                input_widget_classes[w_name] = custom_widget_class
+        finally:
+            add_import_time(node.package, time.perf_counter() - t0)
 
+        self.all_node_instance_classes[node] = new_node_instance_class
+        node.main_widget_class = main_widget_class
+        self.custom_node_input_widget_classes[node] = input_widget_classes
+        del self.pending_node_imports[node]
         return True
 
+    @staticmethod
+    def node_class_files(node_import) -> list:
+        """Returns [(file path, module name, class name)] of the NI class, the main widget class if the node has one,
+        and the custom input widget classes of a node, see import_node_classes()."""
+
+        module_name_separator = '___'
+        node_module_name = node_import['module name']
+        node_class_name = node_import['class name']
+        node_instance_class_file_path = node_import['package path'] + '/nodes/' + node_module_name + '/'
+        node_instance_widgets_file_path = node_instance_class_file_path + 'widgets/'
+
+        # the NI file's name is just the 'module name'
+        class_files = [(node_instance_class_file_path + node_module_name + '.py', node_module_name,
+                        node_class_name + '_NodeInstance')]
+        if node_import['has main widget']:
+            main_widget_filename = node_module_name + module_name_separator + 'main_widget'
+            class_files.append((node_instance_widgets_file_path + main_widget_filename + '.py', main_widget_filename,
+                                node_class_name + '_NodeInstance_MainWidget'))
+        for w_name in node_import['custom input widgets']:
+            input_widget_filename = node_module_name + module_name_separator + w_name
+            class_files.append((node_instance_widgets_file_path + input_widget_filename + '.py', input_widget_filename,
+                                w_name + '_PortInstanceWidget'))
+        return class_files
+
+    def index_node(self, node):
+        # the first node with a given title in a package is the one NIs get created from
+        self.nodes_index.setdefault((node.package, node.title), node)
+
 
     def get_class_from_file(self, file_path, file_name, class_name):
         """Returns a class with a given name from a file for instantiation by importing the module.
@@ -457,9 +590,8 @@ saving: ctrl+s
         # Debugger.debug(file_path)
         # Debugger.debug(file_name)
         # Debugger.debug(class_name)
-        sys.path.append(file_path)
         try:
-            new_module = __import__(file_name, fromlist=[class_name])
+            new_module = import_package_module(file_path, file_name)
         except ModuleNotFoundError as e:
             QMessageBox.warning(self, 'Missing Python module', str(e))
             return None
@@ -473,7 +605,8 @@ saving: ctrl+s
             return
 
         for s in j_obj['scripts']:  # fill flows
-            self.try_to_create_new_script(config=s)
+            with load_phase('script \''+s['name']+'\''):
+                self.try_to_create_new_script(config=s)
 
 
     def on_save_project_triggered(self):
@@ -484,30 +617,30 @@ saving: ctrl+s
 
 
     def save_project(self, file_name):
-        import json
+        # large variable values are written to binary files next to the project file
+        storage = VariableStorage(file_name)
 
-        file = None
         try:
-            if os.path.exists(file_name):
-                os.remove(file_name)
-            file = open(file_name, 'w')
-        except FileNotFoundError:
-            Debugger.debug('couldn\'t open file')
-            return
-
-
-        general_project_info_dict = {'type': 'Ryven project file'}
-
-        scripts_data = []
-        for script in self.scripts:
-            scripts_data.append(script.config_data())
+            write_project(file_name, self.project_data(storage))
+        except BaseException as e:
+            storage.discard()
+            if isinstance(e, OSError):
+                Debugger.debug('couldn\'t save project:', e)
+                return
+            raise
+        storage.commit()
 
-        whole_project_dict = {'general info': general_project_info_dict,
-                              'scripts': scripts_data}
+        # the saved project is the latest state, there is nothing to recover anymore
+        self.autosave.discard()
 
-        data = json.dumps(whole_project_dict)
-        Debugger.debug(data)
+    def project_data(self, storage, general_info=None):
+        """Returns the project data to be written with write_project(), also used by the autosave."""
 
+        general_project_info_dict = {'type': 'Ryven project file'}
+        if general_info is not None:
+            general_project_info_dict.update(general_info)
 
-        file.write(data)
-        file.close()
\ No newline at end of file
+        # the scripts' data gets created while it is written, the whole project never exists as one string
+        return {'general info': general_project_info_dict,
+                'scripts': StreamedList(script.config_data(streamed=True, storage=storage)
+                                        for script in self.scripts)}
\ No newline at end of file
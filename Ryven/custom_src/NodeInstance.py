@@ -1,3 +1,6 @@
+import asyncio
+import functools
+
 from PySide2.QtWidgets import QGraphicsItem, QMenu, QGraphicsLinearLayout, QGraphicsWidget, \
     QGraphicsDropShadowEffect
 from PySide2.QtCore import Qt, QRectF, QPointF
@@ -17,7 +20,28 @@ from custom_src.FlowProxyWidget import FlowProxyWidget
 from custom_src.retain import M
 
 
+def in_main_thread(method):
+    """Decorator for API methods that touch the GUI. When called by a NI running in a worker thread (parallel
+    data-flow mode), the method gets executed by the main thread instead (see FlowExecutor.call_in_main_thread())."""
+
+    @functools.wraps(method)
+    def call(self, *args, **kwargs):
+        return self.flow.executor.call_in_main_thread(method, self, *args, **kwargs)
+
+    return call
+
+
 class NodeInstance(QGraphicsItem):
+
+    # exec-flow mode: whether the output values may be reused for all requests during one exec wave (see FlowExecutor)
+    # subclasses that return different values on every request (like random generators) should set this to False
+    memoize_outputs = True
+
+    # whether update_event() may run in a separate process (see NodeOffloading), for CPU-heavy pure Python nodes
+    offload_update_event = False
+    # calls made by an offloaded update_event() that get replayed on the NI, f.ex. ('main_widget.draw_points',)
+    offload_recorded_calls = ()
+
     def __init__(self, params):
         super(NodeInstance, self).__init__()
 
@@ -209,16 +233,37 @@ class NodeInstance(QGraphicsItem):
         QGraphicsItem.update(self)."""
 
         if Design.animations_enabled:
-            self.animator.start()
+            self.flow.executor.call_in_main_thread(self.animator.start)
 
-        Debugger.debug('update in', self.parent_node.title, 'on input', input_called)
+        if Debugger.enabled:
+            Debugger.debug('update in', self.parent_node.title, 'on input', input_called)
+        self.flow.executor.node_update_started()
         try:
-            self.update_event(input_called)
+            if self.offload_update_event:
+                result = self.flow.executor.offload_update(self, input_called)
+            else:
+                result = self.update_event(input_called)
+            if asyncio.iscoroutine(result):  # async def update_event() or an offloaded update
+                self.flow.executor.run_async_update(self, self.finish_async_update(result))
         except Exception as e:
             Debugger.debugerr('EXCEPTION IN', self.parent_node.title, 'NI:', e)
+        finally:
+            self.flow.executor.node_update_finished()
+            self.flow.autosave.node_changed(self)  # updates usually change the state
+
+    async def finish_async_update(self, update_coroutine):
+        try:
+            await update_coroutine
+        except Exception as e:
+            Debugger.debugerr('EXCEPTION IN', self.parent_node.title, 'NI:', e)
+        self.flow.autosave.node_changed(self)
 
     def update_event(self, input_called=-1):
-        """Gets called when an input received a signal. This is where the magic begins in subclasses."""
+        """Gets called when an input received a signal. This is where the magic begins in subclasses.
+        Subclasses waiting for I/O can define it as async def. The update then only schedules the coroutine and
+        returns right away, the coroutine gets run by an asyncio loop which a QTimer drives (see AsyncLoop), so
+        outputs it sets arrive later. Until then, a pulled output of such a NI keeps its previous value (see
+        FlowExecutor.pull_output())."""
 
         pass
 
@@ -227,7 +272,8 @@ class NodeInstance(QGraphicsItem):
         If the input is connected, the value of the connected output is used:
         If not, the value of the widget is used."""
 
-        Debugger.debug('input called in', self.parent_node.title, 'NI:', index)
+        if Debugger.enabled:
+            Debugger.debug('input called in', self.parent_node.title, 'NI:', index)
         return self.inputs[index].get_val()
 
     def exec_output(self, index):
@@ -236,15 +282,23 @@ class NodeInstance(QGraphicsItem):
         self.outputs[index].exec()
 
     def set_output_val(self, index, val):
-        """Sets the value of a data output.
-        self.data_outputs_updated() has to be called manually after all values are set."""
+        """Sets the value of a data output. In data-flow mode, the new values of all outputs set during update_event()
+        get propagated together once it returns (see batch_outputs())."""
 
         if not self.flow.viewport_update_mode.sync:  # asynchronous viewport updates
-            vp = self.flow.viewport()
-            vp.repaint(self.flow.mapFromScene(self.sceneBoundingRect()))
+            self.flow.executor.call_in_main_thread(self.repaint_in_viewport)
 
         self.outputs[index].set_val(val)
 
+    def batch_outputs(self):
+        """Returns a context manager for setting multiple data outputs outside of update_event() (f.ex. in a special
+        action), the new values are propagated together at the end of the with block."""
+        return self.flow.executor.output_batch()
+
+    def repaint_in_viewport(self):
+        vp = self.flow.viewport()
+        vp.repaint(self.flow.mapFromScene(self.sceneBoundingRect()))
+
     def remove_event(self):
         """Method to stop all threads in hold of the NI itself."""
 
@@ -260,6 +314,7 @@ class NodeInstance(QGraphicsItem):
     # all algorithm-unrelated api methods:
 
     #   LOGGING
+    @in_main_thread
     def new_log(self, title):
         """Requesting a new personal Log. Handy method for subclasses."""
         new_log = self.flow.parent_script.logger.new_log(self, title)
@@ -276,11 +331,13 @@ class NodeInstance(QGraphicsItem):
         for log in self.personal_logs:
             log.enable()
 
+    @in_main_thread
     def log_message(self, message: str, target='global'):
         """Access to global_tools Script Logs ('global' or 'error')."""
         self.flow.parent_script.logger.log_message(message, target)
 
     # SHAPE
+    @in_main_thread
     def update_shape(self):
         """Causes recompilation of the whole shape."""
         # if not self.initializing:   # just to make sure
@@ -319,6 +376,7 @@ class NodeInstance(QGraphicsItem):
 
 
     # PORTS
+    @in_main_thread
     def create_new_input(self, type_, label, widget_name=None, widget_pos='under', pos=-1, config=None):
         """Creates and adds a new input. Handy for subclasses."""
         Debugger.debug('create_new_input called')
@@ -334,6 +392,8 @@ class NodeInstance(QGraphicsItem):
         else:
             self.inputs.insert(pos, pi)
             self.insert_input_into_layout(pos, pi)
+        self.flow.executor.graph_changed()
+        self.flow.autosave.port_added(self.flow, self, 'inputs', self.inputs.index(pi))
 
         if not self.initializing:
             self.update_shape()
@@ -351,6 +411,7 @@ class NodeInstance(QGraphicsItem):
         if len(self.inputs) > 1:
             self.inputs_layout.insertStretch(index*2+1)  # *2+1 because of the stretches, too
 
+    @in_main_thread
     def delete_input(self, i):
         """Disconnects and removes input. Handy for subclasses."""
         inp: InputPortInstance = None
@@ -369,8 +430,10 @@ class NodeInstance(QGraphicsItem):
         if inp.proxy is not None:
             self.scene().removeItem(inp.proxy)
 
+        self.flow.autosave.port_removed(self.flow, self, 'inputs', self.inputs.index(inp))
         self.inputs_layout.removeItem(inp)
         self.inputs.remove(inp)
+        self.flow.executor.graph_changed()
 
         # just a temporary workaround for the issues discussed here:
         # https://forum.qt.io/topic/116268/qgraphicslayout-not-properly-resizing-to-change-of-content
@@ -381,6 +444,7 @@ class NodeInstance(QGraphicsItem):
             self.update()
 
 
+    @in_main_thread
     def create_new_output(self, type_, label, pos=-1):
         """Creates and adds a new output. Handy for subclasses."""
 
@@ -393,6 +457,8 @@ class NodeInstance(QGraphicsItem):
         else:
             self.outputs.insert(pos, pi)
             self.insert_output_into_layout(pos, pi)
+        self.flow.executor.graph_changed()
+        self.flow.autosave.port_added(self.flow, self, 'outputs', self.outputs.index(pi))
 
         if not self.initializing:
             self.update_shape()
@@ -410,6 +476,7 @@ class NodeInstance(QGraphicsItem):
         if len(self.outputs) > 1:
             self.outputs_layout.insertStretch(index*2+1)  # *2+1 because of the stretches, too
 
+    @in_main_thread
     def delete_output(self, o):
         """Disconnects and removes output. Handy for subclasses."""
         out: OutputPortInstance = None
@@ -425,8 +492,10 @@ class NodeInstance(QGraphicsItem):
         self.scene().removeItem(out.gate)
         self.scene().removeItem(out.label)
 
+        self.flow.autosave.port_removed(self.flow, self, 'outputs', self.outputs.index(out))
         self.outputs_layout.removeItem(out)
         self.outputs.remove(out)
+        self.flow.executor.graph_changed()
 
         # just a temporary workaround for the issues discussed here:
         # https://forum.qt.io/topic/116268/qgraphicslayout-not-properly-resizing-to-change-of-content
@@ -466,9 +535,12 @@ class NodeInstance(QGraphicsItem):
         return self.flow.parent_script.vars_manager
 
     def get_var_val(self, name):
+        self.flow.executor.flush_execs()
         return self.get_vars_manager().get_var_val(name)
 
+    @in_main_thread
     def set_var_val(self, name, val):
+        self.flow.executor.flush_execs()
         return self.get_vars_manager().set_var(name, val)
 
     def register_var_receiver(self, name, method):
@@ -624,6 +696,7 @@ class NodeInstance(QGraphicsItem):
                 action = NodeInstanceAction(k, menu, data)
                 action.triggered_with_data.connect(method)  # see NodeInstanceAction for explanation
                 action.triggered_without_data.connect(method)  # see NodeInstanceAction for explanation
+                action.triggered.connect(lambda: self.flow.autosave.node_changed(self))
                 actions.append(action)
             except KeyError:
                 action_menu = QMenu(k, menu)
@@ -713,6 +786,7 @@ class NodeInstance(QGraphicsItem):
             self.flow.scene().removeItem(i.proxy)
             i.widget.remove_event()
         self.inputs.remove(i)
+        self.flow.executor.graph_changed()
 
 
     def add_output_to_scene(self, o):
@@ -727,6 +801,7 @@ class NodeInstance(QGraphicsItem):
         self.flow.scene().removeItem(o.gate)
         self.flow.scene().removeItem(o.label)
         self.outputs.remove(o)
+        self.flow.executor.graph_changed()
 
     # GENERAL
     def about_to_remove_from_scene(self):
@@ -739,6 +814,13 @@ class NodeInstance(QGraphicsItem):
 
         self.disable_personal_logs()
 
+    def about_to_unload(self):
+        """Called from Script when the flow gets unloaded and the NI gets deleted with it. Stops all running threads
+        and disconnects the NI from the global signals, which would call the deleted item otherwise."""
+
+        self.about_to_remove_from_scene()
+        Design.flow_theme_changed.disconnect(self.theme_changed)
+
     def is_active(self):
         for i in self.inputs:
             if i.type_ == 'exec':
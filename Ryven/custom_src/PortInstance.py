@@ -44,25 +44,32 @@ class PortInstance(QGraphicsGridLayout):
 
     def get_val(self):
         """applies on DATA; called NI internally AND externally"""
-        Debugger.debug('get value in', self.direction, 'port instance',
-                       self.parent_node_instance.inputs.index(
-                                self) if self.direction == 'input' else self.parent_node_instance.outputs.index(self),
-                            'of', self.parent_node_instance.parent_node.title)
-        Debugger.debug('val is', self.val)
+        if Debugger.enabled:
+            Debugger.debug('get value in', self.direction, 'port instance',
+                           self.parent_node_instance.inputs.index(
+                                    self) if self.direction == 'input' else self.parent_node_instance.outputs.index(self),
+                                'of', self.parent_node_instance.parent_node.title)
+            Debugger.debug('val is', self.val)
+
+        self.parent_node_instance.flow.executor.flush_execs()
 
         if self.direction == 'input':
             if len(self.connected_port_instances) == 0:
                 if self.widget:
-                    return self.widget.get_val()
+                    # NIs of parallel waves get updated in worker threads, the widget must only be used by the main thread
+                    return self.parent_node_instance.flow.executor.call_in_main_thread(self.widget.get_val)
                 else:
                     return None
             else:
-                Debugger.debug('calling connected port for val')
+                if Debugger.enabled:
+                    Debugger.debug('calling connected port for val')
+                if self.feedback:  # delayed, the value of the last step is never pulled
+                    return self.connected_port_instances[0].val
                 return self.connected_port_instances[0].get_val()
         elif self.direction == 'output':
             # Debugger.debug('returning val directly')
             if not self.parent_node_instance.flow.algorithm_mode.mode_data_flow:
-                self.parent_node_instance.update()
+                self.parent_node_instance.flow.executor.pull_output(self)
             return self.val
 
     def connected(self):
@@ -87,6 +94,8 @@ class InputPortInstance(PortInstance):
         super(InputPortInstance, self).__init__(parent_node_instance, 'input', type_, label_str,
                                                 widget_name, widget_pos)
 
+        self.feedback = False  # whether the connection closes a cycle (see FlowReachability)
+
         if config_data is not None:
             self.create_widget()
             try:
@@ -153,9 +162,7 @@ class InputPortInstance(PortInstance):
 
     def update(self):
         """applies on INPUT; called NI externally (from another NI)"""
-        if (self.parent_node_instance.is_active() and self.type_ == 'exec') or \
-           not self.parent_node_instance.is_active():
-            self.parent_node_instance.update(self.parent_node_instance.inputs.index(self))
+        self.parent_node_instance.flow.executor.input_updated(self)
 
     def config_data(self):
         data_dict = {'type': self.type_,
@@ -174,6 +181,8 @@ class OutputPortInstance(PortInstance):
     def __init__(self, parent_node_instance, type_='', label_str=''):
         super(OutputPortInstance, self).__init__(parent_node_instance, 'output', type_, label_str)
 
+        self.val_wave = None  # the exec wave the current value was computed in, None if invalid (see FlowExecutor)
+
         self.setup_ui()
 
     def setup_ui(self):
@@ -186,26 +195,29 @@ class OutputPortInstance(PortInstance):
 
     def exec(self):
         """applies on OUTPUT; called NI internally (from parentNI)"""
-        for cpi in self.connected_port_instances:
-            cpi.update()
+        self.parent_node_instance.flow.executor.exec_output(self)
 
     def set_val(self, val):
         """applies on OUTPUT; called NI internally"""
-        Debugger.debug('setting value of', self.direction, 'port of', self.parent_node_instance.parent_node.title,
-                            'NodeInstance to', val)
+        if Debugger.enabled:
+            Debugger.debug('setting value of', self.direction, 'port of', self.parent_node_instance.parent_node.title,
+                                'NodeInstance to', val)
+
+        self.parent_node_instance.flow.executor.flush_execs()
 
         # note that val COULD be of object type and therefore already changed (because the original object did)
         self.val = val
 
         # if algorithm mode would be exec flow, all data will be required instead of actively forward propagated
-        if self.parent_node_instance.flow.algorithm_mode.mode_data_flow and \
-                not self.parent_node_instance.initializing:
-            self.updated_val()
+        if self.parent_node_instance.flow.algorithm_mode.mode_data_flow:
+            if not self.parent_node_instance.initializing:
+                self.updated_val()
+        else:
+            self.parent_node_instance.flow.executor.invalidate_downstream(self)
 
     def updated_val(self):
         """applies on DATA OUTPUT; called NI internally"""
-        for cpi in self.connected_port_instances:
-            cpi.update()
+        self.parent_node_instance.flow.executor.data_output_updated(self)
 
     def config_data(self):
         data_dict = {'type': self.type_,
@@ -226,6 +238,8 @@ class PortInstanceGate(QGraphicsWidget):
 
         self.parent_port_instance = parent_port_instance
         self.parent_node_instance = parent_node_instance
+        # also sent when the NI moves, the cached paths of the connections depend on the gate's position
+        self.setFlag(QGraphicsItem.ItemSendsScenePositionChanges)
         self.padding = 2
         self.painting_width = 15
         self.painting_height = 15
@@ -240,6 +254,13 @@ class PortInstanceGate(QGraphicsWidget):
         self.prepareGeometryChange()
         QGraphicsLayoutItem.setGeometry(self, rect)
         self.setPos(rect.topLeft())
+        self.parent_node_instance.flow.invalidate_connection_paths(self.parent_port_instance)  # the size might change
+
+    def itemChange(self, change, value):
+        if change == QGraphicsItem.ItemScenePositionHasChanged:
+            self.parent_node_instance.flow.invalidate_connection_paths(self.parent_port_instance)
+
+        return QGraphicsItem.itemChange(self, change, value)
 
     def sizeHint(self, which, constraint=...):
         return QSizeF(self.width, self.height)
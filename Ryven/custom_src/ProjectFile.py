@@ -0,0 +1,202 @@
+"""Writing and reading project files (.rpo) without holding the whole file content in memory next to the project data.
+
+Writing: the project data can contain StreamedDicts and StreamedLists whose items are only created while they get
+written (f.ex. the config data of the NIs of a flow), so only one item exists as dict and as JSON string at a time.
+The file is written to a temporary file in the same directory first, which then replaces the target file, so a
+failed save never leaves a partial project file behind.
+
+Reading: the file is read in chunks. The outer levels of the JSON structure (project, scripts, script, flow, lists of
+the flow) are parsed piece by piece, everything below as one value each, so the buffer never has to hold more than
+one of these values (f.ex. one NI's config data) as string."""
+
+import json
+import os
+import stat
+import tempfile
+
+
+class StreamedList:
+    """A JSON array whose items are taken from an iterable (f.ex. a generator) while writing."""
+
+    def __init__(self, items):
+        self.items = items
+
+
+class StreamedDict:
+    """A JSON object whose (key, value) pairs are taken from an iterable while writing."""
+
+    def __init__(self, items):
+        self.items = items
+
+
+def write_project(file_name, project_data):
+    """Writes project_data as JSON to file_name atomically. Raises OSError if the file can't be written."""
+
+    directory = os.path.dirname(os.path.abspath(file_name))
+    fd, temp_file_name = tempfile.mkstemp(dir=directory, prefix=os.path.basename(file_name)+'.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            write_value(f, project_data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temp_file_name, file_mode(file_name))  # mkstemp() creates the file readable for the owner only
+        os.replace(temp_file_name, file_name)
+    except BaseException:
+        os.remove(temp_file_name)
+        raise
+
+
+def file_mode(file_name) -> int:
+    """The permissions of the file, the default ones for new files if it doesn't exist yet."""
+
+    try:
+        return stat.S_IMODE(os.stat(file_name).st_mode)
+    except OSError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def write_value(f, val):
+    if isinstance(val, (dict, StreamedDict)):
+        f.write('{')
+        first = True
+        for key, item in (val.items() if isinstance(val, dict) else val.items):
+            if not first:
+                f.write(', ')
+            first = False
+            f.write(json.dumps(key)+': ')
+            write_value(f, item)
+        f.write('}')
+    elif isinstance(val, StreamedList):
+        f.write('[')
+        first = True
+        for item in val.items:
+            if not first:
+                f.write(', ')
+            first = False
+            write_value(f, item)
+        f.write(']')
+    else:
+        f.write(json.dumps(val))
+
+
+# how many levels of the JSON structure get parsed piece by piece when reading
+STREAMED_DEPTH = 5  # project > 'scripts' > script > 'flow' > 'nodes'/'connections'/... > one value
+
+CHUNK_SIZE = 1 << 16
+
+
+def read_project(file_name):
+    """Reads a project file, returns the project as dict like json.load(). Raises OSError if the file can't be read
+    and ValueError (json.JSONDecodeError) if it's not valid JSON."""
+
+    with open(file_name) as f:
+        project = ProjectFileReader(f).read()
+
+    # variables stored in files next to the project (see VariableStorage) get loaded relative to its directory
+    project_dir = os.path.dirname(os.path.abspath(file_name))
+    if isinstance(project, dict):
+        for script in project.get('scripts', []):
+            for var_data in script.get('variables', {}).values():
+                if isinstance(var_data, dict) and 'external' in var_data:
+                    var_data['external']['project dir'] = project_dir
+
+    return project
+
+
+class ProjectFileReader:
+    def __init__(self, f):
+        self.f = f
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        # strict=False has to be to allow 'control characters' like '\n' for newline when loading the json
+        self.decoder = json.JSONDecoder(strict=False)
+
+    def read(self):
+        val = self.read_value(0)
+        if self.next_char() != '':
+            self.error('extra data')
+        return val
+
+    def fill(self, min_size=1):
+        """Reads more data until at least min_size characters after pos are available or the file ended. The part of
+        the buffer already parsed gets dropped."""
+
+        self.buffer = self.buffer[self.pos:]
+        self.pos = 0
+        while len(self.buffer) < min_size and not self.eof:
+            chunk = self.f.read(max(CHUNK_SIZE, min_size - len(self.buffer)))
+            if chunk == '':
+                self.eof = True
+            self.buffer += chunk
+
+    def next_char(self):
+        """Skips whitespace and returns the next character without consuming it, '' at the end of the file."""
+
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\n\r':
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if self.eof:
+                return ''
+            self.fill()
+
+    def expect(self, chars):
+        c = self.next_char()
+        if c == '' or c not in chars:
+            self.error('expected one of '+repr(chars))
+        self.pos += 1
+        return c
+
+    def read_value(self, depth):
+        c = self.next_char()
+        if depth < STREAMED_DEPTH and c == '{':
+            self.pos += 1
+            obj = {}
+            if self.next_char() == '}':
+                self.pos += 1
+                return obj
+            while True:
+                key = self.decode(key=True)
+                self.expect(':')
+                obj[key] = self.read_value(depth + 1)
+                if self.expect(',}') == '}':
+                    return obj
+        elif depth < STREAMED_DEPTH and c == '[':
+            self.pos += 1
+            arr = []
+            if self.next_char() == ']':
+                self.pos += 1
+                return arr
+            while True:
+                arr.append(self.read_value(depth + 1))
+                if self.expect(',]') == ']':
+                    return arr
+        return self.decode()
+
+    def decode(self, key=False):
+        """Decodes one complete value at pos, reading more of the file as long as the value is incomplete."""
+
+        self.next_char()
+        if key and self.buffer[self.pos:self.pos+1] != '"':
+            self.error('expected a key')
+        min_size = len(self.buffer) - self.pos
+        while True:
+            try:
+                val, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # a number (or literal) only ends where a delimiter follows, it might continue in the next chunk
+                if self.buffer[self.pos] in '"{[' or self.eof or \
+                        (end < len(self.buffer) and self.buffer[end] in ' \t\n\r,]}:'):
+                    self.pos = end
+                    return val
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            min_size = max(min_size * 2, len(self.buffer) - self.pos + CHUNK_SIZE)
+            self.fill(min_size)
+
+    def error(self, msg):
+        raise json.JSONDecodeError(msg, self.buffer, self.pos)
@@ -1,11 +1,14 @@
 from PySide2.QtCore import QObject, Signal
+from PySide2.QtWidgets import QWidget
 
 # UI
 from custom_src.code_gen.CodeGenerator import CodeGenerator
 from ui.w_ui_script import WUIScript
 
 from custom_src.Flow import Flow
+from custom_src.LoadTiming import load_phase
 from custom_src.Log import Logger
+from custom_src.ProjectFile import StreamedDict
 from custom_src.script_variables.VarsManager import VarsManager
 from custom_src.source_code_preview.CodePreview_Widget import CodePreview_Widget
 
@@ -25,27 +28,26 @@ class Script(QObject):
         # self.variables = []
         self.vars_manager = None
         self.name = name
-        self.flow = None
+        self.flow = None  # gets created when the script is shown for the first time, see load_flow()
+        self.flow_config = None  # config data of the flow while it's not loaded
+        self.flow_placeholder = QWidget()  # takes the flow's place in the UI while it's not loaded
         self.thumbnail_source = ''  # URL to the Script's thumbnail picture
         self.code_preview_widget = CodePreview_Widget()
 
         if config:
             self.name = config['name']
             self.vars_manager = VarsManager(self, config['variables'])
-            self.flow = Flow(main_window, self, config['flow'])
+            self.flow_config = config['flow']
         else:
-            self.flow = Flow(main_window, self)
             self.vars_manager = VarsManager(self)
 
         # variables list widget
         self.widget.ui.variables_scrollArea.setWidget(self.vars_manager.list_widget)
         self.widget.ui.add_variable_push_button.clicked.connect(self.add_var_clicked)
         self.widget.ui.new_var_name_lineEdit.returnPressed.connect(self.new_var_line_edit_return_pressed)
-        self.widget.ui.algorithm_data_flow_radioButton.toggled.connect(self.flow.algorithm_mode_data_flow_toggled)
-        self.widget.ui.viewport_update_mode_sync_radioButton.toggled.connect(self.flow.viewport_update_mode_sync_toggled)
 
         # flow
-        self.widget.ui.splitter.insertWidget(0, self.flow)
+        self.widget.ui.splitter.insertWidget(0, self.flow_placeholder)
 
         # code preview
         self.widget.ui.source_code_groupBox.layout().addWidget(self.code_preview_widget)
@@ -54,6 +56,55 @@ class Script(QObject):
         self.widget.ui.logs_scrollArea.setWidget(self.logger)
         self.widget.ui.splitter.setSizes([700, 0])
 
+        if not config:  # nothing to load
+            self.load_flow()
+
+
+    def load_flow(self):
+        """Creates the flow from its config data. The flows of a loaded project only get created when their scripts
+        are shown, so opening a project with many scripts only costs as much as the script that's shown."""
+
+        if self.flow is not None:
+            return
+
+        with load_phase('flow of script \''+self.name+'\''):
+            flow = Flow(self.main_window, self, self.flow_config)
+        self.flow = flow
+        self.flow_config = None
+
+        self.widget.ui.algorithm_data_flow_radioButton.toggled.connect(flow.algorithm_mode_data_flow_toggled)
+        self.widget.ui.algorithm_parallel_checkBox.toggled.connect(flow.algorithm_mode_parallel_toggled)
+        self.widget.ui.viewport_update_mode_sync_radioButton.toggled.connect(flow.viewport_update_mode_sync_toggled)
+        self.widget.ui.splitter.replaceWidget(0, flow)
+
+        self.main_window.autosave.flow_loaded(flow)
+
+    def unload_flow(self) -> bool:
+        """Replaces the flow by its config data again to free the memory of its NIs, widgets etc. The flow gets loaded
+        again when the script is shown. Returns False if the flow can't be unloaded because it's running (a wave, an
+        update, an async update that hasn't finished or an offloaded update), the NIs are still needed then."""
+
+        flow = self.flow
+        if flow is None:
+            return True
+        if flow.executor.busy():
+            return False
+
+        self.flow_config = flow.config_data()
+        self.main_window.autosave.flow_unloaded(flow)
+
+        for ni in flow.all_node_instances:
+            ni.about_to_unload()
+        self.vars_manager.unregister_receivers(flow.all_node_instances)
+
+        self.widget.ui.algorithm_data_flow_radioButton.toggled.disconnect(flow.algorithm_mode_data_flow_toggled)
+        self.widget.ui.algorithm_parallel_checkBox.toggled.disconnect(flow.algorithm_mode_parallel_toggled)
+        self.widget.ui.viewport_update_mode_sync_radioButton.toggled.disconnect(flow.viewport_update_mode_sync_toggled)
+        self.widget.ui.splitter.replaceWidget(0, self.flow_placeholder)
+
+        self.flow = None
+        flow.deleteLater()
+        return True
 
     def show_NI_code(self, ni):
         """Called from Flow when the selection changed."""
@@ -67,6 +118,7 @@ class Script(QObject):
 
     def generate_code(self):
         """In production, no working prototype"""
+        self.load_flow()
         cg = CodeGenerator(self.main_window,
                            self.flow.all_node_instances,
                            self.vars_manager.config_data(),
@@ -78,9 +130,21 @@ class Script(QObject):
             print(code)
 
 
-    def config_data(self):
+    def config_data(self, streamed=False, storage=None):
+        """streamed: the data of the variables and the flow gets created while it is written (see ProjectFile)
+        storage: VariableStorage for large variable values"""
+        if streamed:
+            return StreamedDict([('name', self.name),
+                                 ('variables', self.vars_manager.config_data(streamed=True, storage=storage)),
+                                 ('flow', self.flow_config_data(streamed=True))])
+
         script_dict = {'name': self.name,
-                       'variables': self.vars_manager.config_data(),
-                       'flow': self.flow.config_data()}
+                       'variables': self.vars_manager.config_data(storage=storage),
+                       'flow': self.flow_config_data()}
+
+        return script_dict
 
-        return script_dict
\ No newline at end of file
+    def flow_config_data(self, streamed=False):
+        if self.flow is None:
+            return self.flow_config
+        return self.flow.config_data(streamed)
@@ -24,7 +24,7 @@ class CodeGenerator:
         code = ''
 
         ni_class_ast_dict = {}      # {NodeInstance : [name, ast.AST, ast.ClassDef]}
-        ni_class_names = []
+        ni_class_names = set()
         for ni in self.node_instances:
             classname = type(ni).__name__
             if type(ni).__name__ in ni_class_names:
@@ -32,7 +32,7 @@ class CodeGenerator:
             ni_class_ast_dict[ni] = [classname,
                                      ast.parse(inspect.getsource(inspect.getmodule(ni))),
                                      ast.parse(inspect.getsource(ni.__class__))]
-            ni_class_names.append(classname)
+            ni_class_names.add(classname)
 
         modules_dict: dict = self.get_modules(ni_class_ast_dict)  # {str: [Import/ImportFrom, bool]}
 
@@ -131,10 +131,20 @@ class CodeGenerator:
 
     def create_script_code(self):
 
+        # indices by identity, so the generated code doesn't take time quadratic in the number of NIs and connections
         nodes = []
-        for ni in self.node_instances:
-            if ni.parent_node not in nodes:
+        node_indices = {}
+        ni_indices = {}
+        port_indices = {}  # {id(port): index in its NI's inputs or outputs}
+        for k in range(len(self.node_instances)):
+            ni = self.node_instances[k]
+            ni_indices[id(ni)] = k
+            if id(ni.parent_node) not in node_indices:
+                node_indices[id(ni.parent_node)] = len(nodes)
                 nodes.append(ni.parent_node)
+            for ports in (ni.inputs, ni.outputs):
+                for i in range(len(ports)):
+                    port_indices[id(ports[i])] = i
 
         nodes_decl_list = []
         for n in nodes:
@@ -145,7 +155,7 @@ class CodeGenerator:
 
         node_inst_decl_list = []
         for ni in self.node_instances:
-            params = f'(nodes[{str(nodes.index(ni.parent_node))}], None, {str(ni.config_data())})'
+            params = f'(nodes[{str(node_indices[id(ni.parent_node)])}], None, {str(ni.config_data())})'
             node_inst_decl_list.append(f'{ni.__class__.__name__}({params})')
         node_inst_decl = ', '.join(node_inst_decl_list)
 
@@ -157,8 +167,8 @@ class CodeGenerator:
                 outgoing_connections = []
                 for j in range(len(out.connected_port_instances)):
                     cpi = out.connected_port_instances[j]
-                    outgoing_connections.append(f'node_instances[{self.node_instances.index(cpi.parent_node_instance)}]'
-                                                f'.inputs[{cpi.parent_node_instance.inputs.index(cpi)}]')
+                    outgoing_connections.append(f'node_instances[{ni_indices[id(cpi.parent_node_instance)]}]'
+                                                f'.inputs[{port_indices[id(cpi)]}]')
                 outgoing_connections_str = ', '.join(outgoing_connections)
                 connections.append(f'node_instances[{k}].outputs[{o}].connected_port_instances=[{outgoing_connections_str}]')
             for i in range(len(ni.inputs)):
@@ -166,8 +176,8 @@ class CodeGenerator:
                 incoming_connections = []
                 for j in range(len(inp.connected_port_instances)):
                     cpi = inp.connected_port_instances[j]
-                    incoming_connections.append(f'node_instances[{self.node_instances.index(cpi.parent_node_instance)}]'
-                                                f'.outputs[{cpi.parent_node_instance.outputs.index(cpi)}]')
+                    incoming_connections.append(f'node_instances[{ni_indices[id(cpi.parent_node_instance)]}]'
+                                                f'.outputs[{port_indices[id(cpi)]}]')
                 incoming_connections_str = ', '.join(incoming_connections)
                 connections.append(f'node_instances[{k}].inputs[{i}].connected_port_instances=[{incoming_connections_str}]')
 
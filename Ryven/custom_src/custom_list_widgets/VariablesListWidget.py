@@ -62,10 +62,12 @@ class VariablesListWidget(QWidget):
                 return
 
         var_widget.var.name = new_var_name
+        self.vars_manager.variables_changed()
 
 
     def del_variable(self, var, var_widget):
         self.widgets.remove(var_widget)
         var_widget.setParent(None)
         del self.vars_manager.variables[self.vars_manager.variables.index(var)]
+        self.vars_manager.variables_changed()
         self.recreate_ui()
\ No newline at end of file
@@ -2,6 +2,9 @@ import sys
 
 
 class Debugger:
+    """Prints debug messages if enabled. Calls on the execution hot path (NI updates, port values, variables) are
+    guarded by 'if Debugger.enabled:' at the call site, so building the message costs nothing while disabled."""
+
     enabled = False
 
     @staticmethod
@@ -12,6 +15,7 @@ class Debugger:
     def disable():
         Debugger.enabled = False
 
+    @staticmethod
     def debug(*args):
         if not Debugger.enabled:
             return
@@ -21,6 +25,7 @@ class Debugger:
             s += ' '+str(arg)
         print('--> DEBUG:', s)
 
+    @staticmethod
     def debugerr(*args):
         if not Debugger.enabled:
             return
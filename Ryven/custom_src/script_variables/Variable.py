@@ -1,5 +1,13 @@
+import mmap
+import os
 import pickle
 import base64
+import shutil
+import uuid
+
+
+# values whose serialized data is at least this large get stored in binary files next to the project (VariableStorage)
+EXTERNAL_STORAGE_THRESHOLD = 1 << 20
 
 
 class Variable:
@@ -20,7 +28,126 @@ class Variable:
         elif 'serialized' in val.keys():
             self.val = pickle.loads(base64.b64decode(val['serialized']))
 
+        elif 'external' in val.keys():
+            self.val = load_external(val['external'])
+
     def serialize(self):
         pickled = pickle.dumps(self.val)
         serialized = base64.b64encode(pickled).decode('ascii')
         return serialized
+
+    def config_data(self, storage=None):
+        """Returns the data the variable gets saved as in a project file. Large values are written to the storage if
+        one is given."""
+
+        if storage is not None:
+            external = storage.store(self.val)
+            if external is not None:
+                return {'external': external}
+        return {'serialized': self.serialize()}
+
+
+class VariableStorage:
+    """Stores large variable values of a project in binary files in the directory <project file>.data next to it:
+    NumPy arrays as .npy files, which get memory-mapped when the project is loaded, everything else as pickle
+    (protocol 5) with the large buffers (f.ex. of arrays inside other objects) out-of-band in files of their own, which
+    get memory-mapped as well.
+    Every save writes into a new subdirectory, the project file refers to it by its path relative to the project's
+    directory. Files of earlier saves may still be memory-mapped by the loaded variables, so they are never
+    overwritten, commit() removes them once the project file referring to the new ones has been written."""
+
+    def __init__(self, project_file_name):
+        self.project_dir = os.path.dirname(os.path.abspath(project_file_name))
+        self.data_dir_name = os.path.basename(project_file_name)+'.data'
+        self.save_dir_name = uuid.uuid4().hex
+        self.save_dir = None  # created on first use
+        self.counter = 0
+
+    def store(self, val):
+        """Writes val to a file if it is large, returns the data the project file refers to it with, or None."""
+
+        file_base = 'var%d' % self.counter
+
+        numpy = get_numpy()
+        if numpy is not None and type(val) in (numpy.ndarray, numpy.memmap) and not val.dtype.hasobject:
+            if val.nbytes < EXTERNAL_STORAGE_THRESHOLD:
+                return None
+            self.counter += 1
+            numpy.save(self.file_path(file_base+'.npy'), val, allow_pickle=False)
+            return {'format': 'npy', 'file': self.relative_path(file_base+'.npy')}
+
+        buffers = []
+        try:
+            data = pickle.dumps(val, protocol=5, buffer_callback=buffers.append)
+        except Exception:
+            return None  # serialize() reports the error, as before
+        if len(data) + sum([b.raw().nbytes for b in buffers]) < EXTERNAL_STORAGE_THRESHOLD:
+            return None
+
+        self.counter += 1
+        with open(self.file_path(file_base+'.pkl'), 'wb') as f:
+            f.write(data)
+        buffer_files = []
+        for i in range(len(buffers)):
+            buffer_file = file_base+'.buf%d' % i
+            with open(self.file_path(buffer_file), 'wb') as f:
+                f.write(buffers[i].raw())
+            buffer_files.append(self.relative_path(buffer_file))
+        return {'format': 'pickle', 'file': self.relative_path(file_base+'.pkl'), 'buffers': buffer_files}
+
+    def file_path(self, file_name):
+        if self.save_dir is None:
+            self.save_dir = os.path.join(self.project_dir, self.data_dir_name, self.save_dir_name)
+            os.makedirs(self.save_dir)
+        return os.path.join(self.save_dir, file_name)
+
+    def relative_path(self, file_name):
+        return self.data_dir_name+'/'+self.save_dir_name+'/'+file_name
+
+    def commit(self):
+        """Called after the project file has been written, removes the files of earlier saves."""
+
+        data_dir = os.path.join(self.project_dir, self.data_dir_name)
+        if not os.path.isdir(data_dir):
+            return
+        for d in os.listdir(data_dir):
+            if d != self.save_dir_name:
+                # files still memory-mapped can't be removed on Windows, they are retried with the next save
+                shutil.rmtree(os.path.join(data_dir, d), ignore_errors=True)
+
+    def discard(self):
+        """Called if writing the project file failed, removes the files of this save."""
+
+        if self.save_dir is not None:
+            shutil.rmtree(self.save_dir, ignore_errors=True)
+
+
+def load_external(external: dict):
+    """Loads a value stored by VariableStorage. external['project dir'] is the directory of the project file, it gets
+    set when the project file is read (see ProjectFile)."""
+
+    project_dir = external.get('project dir', '')
+    file_path = os.path.join(project_dir, external['file'])
+
+    if external['format'] == 'npy':
+        # copy-on-write: the value can be changed in memory without changing the file
+        return get_numpy().load(file_path, mmap_mode='c', allow_pickle=False)
+
+    buffers = [map_file(os.path.join(project_dir, b)) for b in external['buffers']]
+    with open(file_path, 'rb') as f:
+        return pickle.loads(f.read(), buffers=buffers)
+
+
+def map_file(file_path):
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b''  # empty files can't be mapped
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+
+def get_numpy():
+    try:
+        import numpy
+        return numpy
+    except ImportError:
+        return None
@@ -1,3 +1,4 @@
+from custom_src.ProjectFile import StreamedDict
 from custom_src.script_variables.Variable import Variable
 from custom_src.custom_list_widgets.VariablesListWidget import VariablesListWidget
 
@@ -26,6 +27,7 @@ class VarsManager:
 
         self.create_new_var(name)
         self.list_widget.recreate_ui()
+        self.variables_changed()
 
     def create_new_var(self, name, val=None):
 
@@ -40,7 +42,8 @@ class VarsManager:
         self.variables.append(Variable(name, val))
 
     def get_var(self, name):
-        Debugger.debug('getting variable with name:', name)
+        if Debugger.enabled:
+            Debugger.debug('getting variable with name:', name)
 
         for v in self.variables:
             if v.name == name:
@@ -57,6 +60,7 @@ class VarsManager:
             return False
 
         self.variables[var_index].val = val
+        self.variables_changed()
 
         # update all variable usages by calling all registered object's methods on updated variable with the new val
         for receiver, var_name in self.var_receivers.keys():
@@ -65,6 +69,11 @@ class VarsManager:
 
         return True
 
+    def variables_changed(self):
+        """Tells the autosave that variables have been added, removed, renamed or set."""
+
+        self.script.main_window.autosave.variables_changed()
+
     def get_var_index_from_name(self, name):
         var_names_list = [v.name for v in self.variables]
         for i in range(len(var_names_list)):
@@ -85,8 +94,21 @@ class VarsManager:
         except Exception:
             return
 
-    def config_data(self):
+    def unregister_receivers(self, receivers):
+        """Unregisters the receivers from all variables, f.ex. when the NIs of a flow get unloaded."""
+
+        receivers = set(receivers)
+        for receiver, var_name in list(self.var_receivers.keys()):
+            if receiver in receivers:
+                del self.var_receivers[(receiver, var_name)]
+
+    def config_data(self, streamed=False, storage=None):
+        """storage: VariableStorage large values get written to instead of the project file"""
+
+        if streamed:  # the variables get serialized one by one while they are written
+            return StreamedDict((v.name, v.config_data(storage)) for v in self.variables)
+
         vars_dict = {}
         for v in self.variables:
-            vars_dict[v.name] = {'serialized': v.serialize()}
+            vars_dict[v.name] = v.config_data(storage)
         return vars_dict
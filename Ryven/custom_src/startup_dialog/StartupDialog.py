@@ -1,7 +1,9 @@
 from PySide2.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QTextEdit, QFileDialog, QWidget
 from PySide2.QtGui import QIcon
 
+from custom_src.AutosaveJournal import autosave_exists, recover_project
 from custom_src.global_tools.Debugger import Debugger
+from custom_src.ProjectFile import read_project
 from custom_src.startup_dialog.SelectPackages_Dialog import SelectPackages_Dialog
 
 
@@ -47,6 +49,10 @@ class StartupDialog(QDialog):
         buttons_layout = QHBoxLayout()
         buttons_layout.addWidget(plain_project_push_button)
         buttons_layout.addWidget(load_project_push_button)
+        if autosave_exists():
+            recover_project_push_button = QPushButton('recover autosaved project')
+            recover_project_push_button.clicked.connect(self.recover_project_button_clicked)
+            buttons_layout.addWidget(recover_project_push_button)
 
         layout.addLayout(buttons_layout)
 
@@ -80,39 +86,36 @@ class StartupDialog(QDialog):
 
 
     def load_project_button_clicked(self):
-        self.editor_startup_configuration['config'] = 'open project'
-        import json
-
         file_name = QFileDialog.getOpenFileName(self, 'select project file', '../saves', 'Ryven Project(*.rpo *.rypo)')[0]
-        j_str = ''
         try:
-            f = open(file_name)
-            j_str = f.read()
-            f.close()
-        except FileNotFoundError:
+            j_obj = read_project(file_name)
+        except (OSError, ValueError):  # missing or corrupt file
             Debugger.debug('couldn\'t open file')
             return
 
+        self.open_project(j_obj)
 
-        # strict=False has to be to allow 'control characters' like '\n' for newline when loading the json
-        j_obj = json.loads(j_str, strict=False)
+
+    def recover_project_button_clicked(self):
+        try:
+            j_obj = recover_project()
+        except (OSError, ValueError) as e:
+            Debugger.debug('couldn\'t recover the autosaved project:', e)
+            return
+
+        self.open_project(j_obj)
+
+
+    def open_project(self, j_obj):
+        self.editor_startup_configuration['config'] = 'open project'
 
         if j_obj['general info']['type'] != 'Ryven project file':
             return
 
         # scan for all required packages
-        packages = []
+        packages = self.required_packages(j_obj)
         package_file_paths = []
 
-        scripts = j_obj['scripts']
-        for script in scripts:
-            flow = script['flow']
-            for n in flow['nodes']:
-                package = n['parent node package']
-                if package != 'built in' and not packages.__contains__(package):
-                    packages.append(package)
-
-
         if len(packages) > 0:
             select_packages_dialog = SelectPackages_Dialog(self, packages)
             select_packages_dialog.exec_()
@@ -122,4 +125,19 @@ class StartupDialog(QDialog):
         self.editor_startup_configuration['required packages'] = package_file_paths
         self.editor_startup_configuration['content'] = j_obj
 
-        self.accept()
\ No newline at end of file
+        self.accept()
+
+
+    @staticmethod
+    def required_packages(j_obj) -> list:
+        packages = []
+
+        scripts = j_obj['scripts']
+        for script in scripts:
+            flow = script['flow']
+            for n in flow['nodes']:
+                package = n['parent node package']
+                if package != 'built in' and not packages.__contains__(package):
+                    packages.append(package)
+
+        return packages
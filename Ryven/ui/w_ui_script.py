@@ -1,4 +1,5 @@
-from PySide2.QtWidgets import QWidget
+from PySide2.QtCore import QCoreApplication
+from PySide2.QtWidgets import QWidget, QCheckBox
 
 from ui.ui_script import Ui_script_widget
 
@@ -8,4 +9,13 @@ class WUIScript(QWidget):
     def __init__(self):
         super(WUIScript, self).__init__()
         self.ui = Ui_script_widget()
-        self.ui.setupUi(self)
\ No newline at end of file
+        self.ui.setupUi(self)
+
+        # not part of the generated ui (script.ui isn't in the repository), so regenerating ui_script.py keeps it
+        self.ui.algorithm_parallel_checkBox = QCheckBox(self.ui.settings_groupBox)
+        self.ui.algorithm_parallel_checkBox.setObjectName(u"algorithm_parallel_checkBox")
+        self.ui.algorithm_parallel_checkBox.setText(QCoreApplication.translate("script_widget", u"Parallel", None))
+        self.ui.algorithm_parallel_checkBox.setToolTip(
+            QCoreApplication.translate("script_widget", u"Update independent branches of the data flow in parallel "
+                                                        u"threads", None))
+        self.ui.verticalLayout_3.addWidget(self.ui.algorithm_parallel_checkBox)
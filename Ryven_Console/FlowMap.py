@@ -0,0 +1,103 @@
+"""The map mode of Ryven_Console: runs one script over many input records in a pool of worker processes. Every worker
+loads the script once and then processes its share of the records on the same graph. Before every record, the
+variables and unconnected inputs get reset to their values after loading.
+
+A record is a JSON object in a line of the records file:
+
+    {"vars": {"name": value}, "inputs": {"Val:0": value}}
+
+For every record, the variables and unconnected inputs get set (see FlowRunner), the trigger NIs get updated and the
+values of the collected outputs are written as a JSON line to the results:
+
+    {"index": 0, "outputs": {"Result": value}, "failed updates": ["title: exception"]}
+
+or {"index": 0, "error": "..."} if the record couldn't be processed. index is the line of the record (empty lines not
+counted), so the results can be matched to the records also if they are written in the order they were finished."""
+
+from multiprocessing import Pool
+import json
+
+from FlowRunner import FlowRunnerError
+
+
+# state of the worker process, set by init_worker()
+worker_runner = None
+worker_triggers = []
+worker_outputs = []
+worker_output_refs = []
+worker_timeout = None
+worker_initial_state = None  # the variables and inputs after loading, every record starts from them
+worker_loading_error = None
+
+
+def init_worker(load_runner, args, output_refs):
+    """Loads the script in the worker. Loading errors are reported for every record instead of being raised, the pool
+    would restart failing workers over and over again."""
+
+    global worker_runner, worker_triggers, worker_outputs, worker_output_refs, worker_timeout, worker_initial_state, \
+        worker_loading_error
+    try:
+        worker_runner, variables, inputs, worker_triggers = load_runner(args)
+        worker_runner.run(variables, (), args.timeout, inputs)
+        worker_initial_state = worker_runner.snapshot()
+        worker_outputs = [worker_runner.find_output(ref) for ref in output_refs]
+        worker_output_refs = output_refs
+        worker_timeout = args.timeout
+    except (Exception, SystemExit) as e:  # the Loader exits if a node module can't be imported
+        worker_loading_error = 'loading the script failed: '+repr(e)
+
+
+def run_record(item) -> str:
+    """Processes one record in the worker, returns the JSON line of the result."""
+
+    index, record = item
+    result = {'index': index}
+    if worker_loading_error is not None:
+        result['error'] = worker_loading_error
+        return json.dumps(result)
+
+    try:
+        if not isinstance(record, dict):
+            raise FlowRunnerError('the record is no JSON object')
+        # the result must not depend on the records the worker processed before
+        worker_runner.restore(worker_initial_state)
+        failed_updates = worker_runner.run(record.get('vars'), worker_triggers, worker_timeout, record.get('inputs'))
+        result['outputs'] = dict(zip(worker_output_refs, worker_runner.output_values(worker_outputs)))
+        result['failed updates'] = [ni.parent_node.title+': '+repr(e) for ni, e in failed_updates]
+    except (FlowRunnerError, AttributeError) as e:  # AttributeError: vars or inputs are no objects
+        result['error'] = str(e)
+
+    return json.dumps(result, default=repr)
+
+
+def read_records(records_file):
+    """Yields (index, record) for the non-empty lines of the file. Lines that aren't valid JSON are passed on as
+    strings, they get reported as errors in the results."""
+
+    index = 0
+    for line in records_file:
+        if line.strip() == '':
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = line.strip()
+        yield index, record
+        index += 1
+
+
+def map_records(load_runner, args, output_refs, records_file, results_file, workers=None, ordered=True,
+                chunk_size=1) -> bool:
+    """Processes all records, writes the results and returns whether all records succeeded without failed updates.
+    load_runner(args) is called in every worker and has to return (FlowRunner, variables, inputs, trigger NIs), the
+    variables and inputs get set once after loading."""
+
+    all_succeeded = True
+    with Pool(workers, initializer=init_worker, initargs=(load_runner, args, output_refs)) as pool:
+        map_func = pool.imap if ordered else pool.imap_unordered
+        for line in map_func(run_record, read_records(records_file), chunk_size):
+            results_file.write(line+'\n')
+            if all_succeeded:
+                result = json.loads(line)
+                all_succeeded = 'error' not in result and len(result['failed updates']) == 0
+    return all_succeeded
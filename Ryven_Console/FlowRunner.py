@@ -0,0 +1,146 @@
+"""Running a loaded script without user interaction. Used by the non-interactive modes of Ryven_Console, which
+identify NodeInstances either by their index in the flow (as listed by the 'instances' command) or by their title."""
+
+import ast
+import copy
+
+import custom_src.AsyncLoop as AsyncLoop
+
+
+class FlowRunnerError(Exception):
+    pass
+
+
+def parse_value(val_str: str):
+    """Parses a value given on the command line as Python literal, anything else is taken as string."""
+    try:
+        return ast.literal_eval(val_str)
+    except (ValueError, SyntaxError):
+        return val_str
+
+
+def parse_assignment(assignment: str):
+    """Parses 'name=value' into (name, value)."""
+    name, sep, val_str = assignment.partition('=')
+    if sep == '' or name.strip() == '':
+        raise FlowRunnerError('invalid assignment \''+assignment+'\', expected name=value')
+    return name.strip(), parse_value(val_str.strip())
+
+
+def values_equal(a, b) -> bool:
+    """a == b for values that might not be comparable (f.ex. NumPy arrays compare element-wise)."""
+    try:
+        return type(a) == type(b) and bool(a == b)
+    except Exception:
+        return a is b
+
+
+class FlowRunner:
+    def __init__(self, script):
+        self.script = script
+        self.flow = script.flow
+
+    def find_node_instance(self, ref):
+        """Returns the NI referenced by index or by title, titles must be unique in the flow."""
+
+        node_instances = self.flow.all_node_instances
+        if isinstance(ref, bool) or not isinstance(ref, (int, str)):
+            raise FlowRunnerError('invalid node instance reference '+repr(ref)+', expected an index or a title')
+        if isinstance(ref, int) or ref.isdigit():
+            index = int(ref)
+            if index < 0 or index >= len(node_instances):
+                raise FlowRunnerError('there is no node instance with index '+str(index))
+            return node_instances[index]
+
+        found = [ni for ni in node_instances if ni.parent_node.title == ref]
+        if len(found) == 0:
+            raise FlowRunnerError('there is no node instance titled \''+ref+'\'')
+        elif len(found) > 1:
+            raise FlowRunnerError('the title \''+ref+'\' is ambiguous, reference the node instance by index')
+        return found[0]
+
+    def find_output(self, ref: str):
+        """Returns the output port referenced by 'node:index', where node is an index or a title as above. Without
+        index, the first output is used."""
+        return self.find_port(ref, 'outputs')
+
+    def find_input(self, ref: str):
+        """Returns the input port referenced by 'node:index' like find_output()."""
+        return self.find_port(ref, 'inputs')
+
+    def find_port(self, ref: str, ports_attr):
+        node_ref, sep, index_str = ref.rpartition(':')
+        if sep == '' or not index_str.isdigit():
+            node_ref, index_str = ref, '0'
+        ni = self.find_node_instance(node_ref)
+        ports = getattr(ni, ports_attr)
+        index = int(index_str)
+        if index >= len(ports):
+            raise FlowRunnerError(ni.parent_node.title+' has no '+ports_attr[:-1]+' with index '+index_str)
+        return ports[index]
+
+    def set_vars(self, variables: dict):
+        for name, val in variables.items():
+            if not self.script.variables_handler.set_var(name, val):
+                raise FlowRunnerError('there is no script variable \''+name+'\'')
+
+    def set_inputs(self, inputs: dict):
+        """Sets the values of unconnected data inputs given as {'node:index': value}, like their widgets would."""
+
+        for ref, val in inputs.items():
+            input_port = self.find_input(ref)
+            if input_port.type_ != 'data' or len(input_port.connected_port_instances) > 0:
+                raise FlowRunnerError('the input \''+ref+'\' is no unconnected data input')
+            input_port.val = val
+            input_port.update()
+
+    def run(self, variables: dict = None, triggers=(), timeout=None, inputs: dict = None):
+        """Sets the variables and inputs, updates the trigger NIs (f.ex. buttons) in the given order and waits until
+        all async updates have finished. Returns the updates that failed during the run as
+        [(NodeInstance, exception)]."""
+
+        failed_before = len(self.flow.failed_updates)
+
+        with self.flow.executor.lock:
+            if variables:
+                self.set_vars(variables)
+            if inputs:
+                self.set_inputs(inputs)
+            for ni in triggers:
+                ni.update()
+
+        self.wait_for_async_updates(timeout)
+
+        return self.flow.failed_updates[failed_before:]
+
+    def snapshot(self):
+        """Returns the values of the variables and the unconnected data inputs, for restore()."""
+
+        with self.flow.executor.lock:
+            variables = {v.name: copy.deepcopy(v.val) for v in self.script.variables_handler.variables}
+            inputs = [(inp, copy.deepcopy(inp.val)) for ni in self.flow.all_node_instances for inp in ni.inputs
+                      if inp.type_ == 'data' and len(inp.connected_port_instances) == 0]
+        return variables, inputs
+
+    def restore(self, snapshot):
+        """Sets the variables and unconnected data inputs that changed since the snapshot back to their values then,
+        like set_vars() and set_inputs() do, so the NIs depending on them get updated."""
+
+        variables, inputs = snapshot
+        with self.flow.executor.lock:
+            for name, val in variables.items():
+                if not values_equal(self.script.variables_handler.get_var_val(name), val):
+                    self.script.variables_handler.set_var(name, copy.deepcopy(val))
+            for input_port, val in inputs:
+                if not values_equal(input_port.val, val):
+                    input_port.val = copy.deepcopy(val)
+                    input_port.update()
+
+    def wait_for_async_updates(self, timeout=None):
+        if AsyncLoop.async_loop is not None and not AsyncLoop.async_loop.join(timeout):
+            raise FlowRunnerError('async updates didn\'t finish within '+str(timeout)+'s')
+
+    def output_values(self, outputs) -> list:
+        """Returns the current values of the given data outputs, in exec-flow mode they get pulled if necessary."""
+        with self.flow.executor.lock:
+            return [o.get_val() for o in outputs]
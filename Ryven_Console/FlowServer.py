@@ -0,0 +1,99 @@
+"""The server mode of Ryven_Console: the script gets loaded once and stays alive, execution requests are accepted over
+HTTP and run on the live graph, so a request only costs the computation itself.
+
+    POST /run       {"vars": {"name": value}, "inputs": {"Val:0": value}, "triggers": ["Button", 3],
+                     "outputs": ["Result", "4:1"]}
+                    -> {"outputs": {"Result": value, "4:1": value}, "failed updates": ["title: exception"]}
+    GET  /vars      -> {"name": value}
+    GET  /instances -> [{"index": 0, "title": "..."}]
+
+Triggers and outputs are referenced like in the batch mode (see FlowRunner). Values that can't be represented in
+JSON are returned as their repr(). Requests are handled one after another, so the outputs of a response always belong
+to the variables and triggers of the same request."""
+
+from http.server import HTTPServer, BaseHTTPRequestHandler
+import json
+
+from FlowRunner import FlowRunner, FlowRunnerError
+
+
+class FlowServer(HTTPServer):
+    def __init__(self, script, address, timeout=None):
+        super(FlowServer, self).__init__(address, FlowRequestHandler)
+        self.runner = FlowRunner(script)
+        self.run_timeout = timeout
+
+    def handle_run(self, request: dict) -> dict:
+        runner = self.runner
+        variables = request.get('vars', {})
+        inputs = request.get('inputs', {})
+        if not isinstance(variables, dict) or not isinstance(inputs, dict):
+            raise FlowRunnerError('\'vars\' and \'inputs\' must be objects')
+        trigger_refs = request.get('triggers', [])
+        output_refs = request.get('outputs', [])
+        if not isinstance(trigger_refs, list) or not isinstance(output_refs, list):
+            raise FlowRunnerError('\'triggers\' and \'outputs\' must be arrays')
+        triggers = [runner.find_node_instance(ref) for ref in trigger_refs]
+        for ref in output_refs:
+            if isinstance(ref, bool) or not isinstance(ref, (int, str)):
+                raise FlowRunnerError('invalid output reference '+json.dumps(ref)+', expected \'node:index\'')
+        output_refs = [str(ref) for ref in output_refs]
+        outputs = [runner.find_output(ref) for ref in output_refs]
+
+        try:
+            failed_updates = runner.run(variables, triggers, self.run_timeout, inputs)
+            output_values = runner.output_values(outputs)
+        finally:
+            runner.flow.failed_updates.clear()  # the server runs for a long time, only the current run is reported
+
+        return {
+            'outputs': dict(zip(output_refs, output_values)),
+            'failed updates': [ni.parent_node.title+': '+repr(e) for ni, e in failed_updates]
+        }
+
+    def handle_vars(self) -> dict:
+        with self.runner.flow.executor.lock:
+            return {v.name: v.val for v in self.runner.script.variables_handler.variables}
+
+    def handle_instances(self) -> list:
+        node_instances = self.runner.flow.all_node_instances
+        return [{'index': i, 'title': node_instances[i].parent_node.title} for i in range(len(node_instances))]
+
+
+class FlowRequestHandler(BaseHTTPRequestHandler):
+    server: FlowServer
+
+    def do_GET(self):
+        if self.path == '/vars':
+            self.respond(200, self.server.handle_vars())
+        elif self.path == '/instances':
+            self.respond(200, self.server.handle_instances())
+        else:
+            self.respond(404, {'error': 'unknown path '+self.path})
+
+    def do_POST(self):
+        if self.path != '/run':
+            self.respond(404, {'error': 'unknown path '+self.path})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(request, dict):
+                raise FlowRunnerError('the request must be a JSON object')
+            self.respond(200, self.server.handle_run(request))
+        except (ValueError, FlowRunnerError) as e:  # json.JSONDecodeError is a ValueError
+            self.respond(400, {'error': str(e)})
+        except Exception as e:  # the client gets a response in any case
+            self.respond(500, {'error': repr(e)})
+
+    def respond(self, status, data):
+        body = json.dumps(data, default=repr).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # the console is reserved for the output of the flow
@@ -1,21 +1,44 @@
+import argparse
 import json
 import os
+import statistics
 import sys
+import time
 
+# before the other imports, so the startup timeline covers them (see LoadTiming)
+from custom_src.LoadTiming import load_phase, load_times_report, enable_trace, write_trace
 from class_inspection import find_type_in_object
 from custom_src.Node import Node, NodePort
+from custom_src.PackageImporter import import_package_module
+from custom_src.ProjectFile import read_project
 from custom_src.Script import Script
 
 
+# exit statuses of the non-interactive mode
+EXIT_OK = 0
+EXIT_UPDATES_FAILED = 1  # the flow ran, but updates of NodeInstances raised exceptions
+EXIT_LOADING_FAILED = 2  # invalid arguments, the project or the flow couldn't be loaded
+
+
+class LoadingError(Exception):
+    pass
+
+
 class Loader:
-    def __init__(self, project_path):
+    def __init__(self, project_path, script_name=None, package_dirs=None, interactive=True):
+        """Loads the project and creates the selected script. Without script name and package directories the user
+        gets asked for them. In non-interactive mode, the main loop isn't entered and the script can be accessed
+        through self.script."""
 
-        project_config = self.load_project_config(project_path)
+        with load_phase('project file'):
+            project_config = self.load_project_config(project_path)
 
         # select script
         script_config = None
-        script_name = None
         script_names = [s['name'] for s in project_config['scripts']]
+        if script_name is not None and script_name not in script_names:
+            raise LoadingError('there is no script \''+script_name+'\' in the project, available: ' +
+                               ', '.join(script_names))
         while script_name not in script_names:
             print('scripts...')
             for sn in script_names:
@@ -27,8 +50,45 @@ class Loader:
                 break
 
         self.nodes = []
+        self.nodes_index = {}  # {(package name, title): node} for finding the nodes of saved NIs (used in Flow)
         self.node_instance_classes = {}
 
+        with load_phase('builtin nodes'):
+            self.import_builtin_nodes(verbose=interactive)
+
+        self.buttonNIClass = None
+        required_package_names = list(set([n['parent node package'] for n in script_config['flow']['nodes']
+                                           if n['parent node package'] != 'built in']))
+        self.imported_package_names = []
+        if package_dirs is not None:
+            with load_phase('importing packages'):
+                self.auto_import_packages(required_package_names, package_dirs)
+            missing = [n for n in required_package_names if n not in self.imported_package_names]
+            if len(missing) > 0:
+                raise LoadingError('couldn\'t find the required packages: '+', '.join(missing))
+        else:
+            print('required packages:')
+            for p_n in required_package_names:
+                print('    '+p_n)
+        while any([n not in self.imported_package_names for n in required_package_names]):
+            package_path = input('input package path or \'auto\': ')
+            if package_path == 'auto':
+                self.auto_import_packages(required_package_names)
+            else:
+                self.import_package(package_path)
+
+
+        # create script
+        with load_phase('script \''+script_name+'\''):
+            self.script = Script(script_config, self.nodes, self.node_instance_classes, self.nodes_index)
+        write_trace()
+
+        if interactive:
+            print(load_times_report())
+            self.main_loop(self.script)
+
+
+    def import_builtin_nodes(self, verbose=True):
         #   dynamically import all builtin nodes from Ryven
         builtin_path = '../Ryven/custom_src/builtin_nodes'
         sys.path.append(builtin_path)
@@ -41,33 +101,24 @@ class Loader:
             node_class = getattr(mod, modname)
             node_class_inst = node_class()
             self.nodes.append(node_class_inst)
+            self.index_node(node_class_inst)
             for fn2 in [f for f in files if f.endswith('_NodeInstance.py')]:
                 modname2 = os.path.splitext(os.path.basename(fn2))[0]
                 if modname2.__contains__(modname):
                     mod2 = __import__(modname2, fromlist=[modname2])
                     self.node_instance_classes[node_class_inst] = getattr(mod2, modname2)
                     break
-        print(self.nodes)
-        print(self.node_instance_classes)
+        if verbose:
+            print(self.nodes)
+            print(self.node_instance_classes)
 
-        self.buttonNIClass = None
-        required_package_names = list(set([n['parent node package'] for n in script_config['flow']['nodes']
-                                           if n['parent node package'] != 'built in']))
-        self.imported_package_names = []
-        print('required packages:')
-        for p_n in required_package_names:
-            print('    '+p_n)
-        while any([n not in self.imported_package_names for n in required_package_names]):
-            package_path = input('input package path or \'auto\': ')
-            if package_path == 'auto':
-                self.auto_import_packages(required_package_names)
-            else:
-                self.import_package(package_path)
 
+    def index_node(self, node):
+        # the first node with a given title in a package is the one NIs get created from
+        self.nodes_index.setdefault((node.package, node.title), node)
 
-        # create script
-        script = Script(script_config, self.nodes, self.node_instance_classes)
 
+    def main_loop(self, script):
         obj = None  # for referencing a node instance
 
         print('The flow has been successfully created. What to do next?')
@@ -126,7 +177,8 @@ Commands:
                     print(str(i)+':', button_node_instances[i])
                 try:
                     index = int(input('index: '))
-                    button_node_instances[index].update()
+                    with script.flow.executor.lock:
+                        button_node_instances[index].update()
                 except Exception as e:
                     print('Error:', e)
                     continue
@@ -135,7 +187,8 @@ Commands:
             elif command == 'set var':  # re.match('setvar [.]+', command):
                 var_name = input('name: ')
                 var_val = eval(input('val: '))
-                script.variables_handler.set_var(var_name, var_val)
+                with script.flow.executor.lock:
+                    script.variables_handler.set_var(var_name, var_val)
             elif command == 'exit':
                 sys.exit()
             else:
@@ -143,28 +196,21 @@ Commands:
 
 
     def load_project_config(self, path):
-        j_str = ''
-        # try:
-        f = open('../saves/'+path)
-        j_str = f.read()
-        f.close()
-        # except FileNotFoundError:
-        #     raise FileNotFoundError('Project file not found')
+        return read_project(os.path.join('../saves', path))  # absolute paths are used as they are
 
-        return json.loads(j_str, strict=False)
 
+    def auto_import_packages(self, required_package_names, packages_dirs=('../packages',)):
+        """Searches the given directories for the required packages (folder <name> containing <name>.rpc)."""
 
-    def auto_import_packages(self, required_package_names):
-        packages_dir = '../packages'
-        folders_list = [x[0] for x in os.walk(packages_dir) if
-                        os.path.basename(os.path.normpath(x[0])) in required_package_names]
+        for packages_dir in packages_dirs:
+            folders_list = [x[0] for x in os.walk(packages_dir) if
+                            os.path.basename(os.path.normpath(x[0])) in required_package_names]
 
-        required_files = required_package_names.copy()
-
-        for folder in folders_list:
-            for r_f in required_files:
-                if r_f + '.rpc' in os.listdir(packages_dir + '/' + folder):
-                    self.import_package(os.path.normpath(packages_dir + '/' + folder + '/' + r_f + '.rpc'))
+            for folder in folders_list:
+                package_name = os.path.basename(os.path.normpath(folder))
+                package_file = os.path.join(folder, package_name + '.rpc')
+                if os.path.isfile(package_file):
+                    self.import_package(os.path.normpath(package_file))
 
 
     def import_package(self, package_path):
@@ -172,6 +218,10 @@ Commands:
         if package_name in self.imported_package_names:
             return
 
+        with load_phase(package_name):
+            self.load_package(package_path, package_name)
+
+    def load_package(self, package_path, package_name):
         j_str = ''
         try:
             f = open(package_path)
@@ -195,6 +245,7 @@ Commands:
         for n in nodes_config:
             new_node = self.parse_node(n, os.path.dirname(package_path), package_name)
             self.nodes.append(new_node)
+            self.index_node(new_node)
 
         self.imported_package_names.append(package_name)
 
@@ -258,12 +309,11 @@ Commands:
 
 
     def get_class_from_file(self, file_path, file_name, class_name):
-        sys.path.append(file_path)
         try:
-            new_module = __import__(file_name, fromlist=[class_name])
+            new_module = import_package_module(file_path, file_name)
         except ModuleNotFoundError as e:
             print(e, file_path, file_name, class_name)
-            sys.exit()
+            sys.exit(EXIT_LOADING_FAILED)
         new_class = getattr(new_module, class_name)
         return new_class
 
@@ -275,17 +325,184 @@ def clean_path_string(param):
     return param
 
 
+def parse_args(args):
+    parser = argparse.ArgumentParser(
+        description='Runs Ryven projects without GUI. Without --script, the console is interactive.')
+    parser.add_argument('project', nargs='?', help='project name (or path from saves folder)')
+    parser.add_argument('-s', '--script', help='name of the script to run non-interactively')
+    parser.add_argument('-p', '--packages', action='append', metavar='DIR',
+                        help='directory to search for the required packages, can be repeated (default: ../packages)')
+    parser.add_argument('-v', '--var', action='append', default=[], metavar='NAME=VALUE',
+                        help='sets a script variable before the triggers get executed, the value is parsed as Python '
+                             'literal or else taken as string, can be repeated')
+    parser.add_argument('-i', '--input', action='append', default=[], metavar='NODE:INDEX=VALUE',
+                        help='sets the value of an unconnected data input like its widget would, after the variables '
+                             'have been set, the value is parsed like for --var, can be repeated')
+    parser.add_argument('-t', '--trigger', action='append', default=[], metavar='NODE',
+                        help='node instance to update (f.ex. a button) referenced by index or title, can be repeated '
+                             'and the triggers get executed in the given order')
+    parser.add_argument('-n', '--iterations', type=int, default=1,
+                        help='how often the variables get set and the triggers get executed')
+    parser.add_argument('--timing', action='store_true', help='prints how long loading and each iteration took')
+    parser.add_argument('--timeout', type=float, default=None,
+                        help='seconds to wait for running async updates after each iteration')
+    parser.add_argument('--serve', type=int, metavar='PORT',
+                        help='keeps the script loaded and serves execution requests over HTTP on the given port, '
+                             'variables and triggers given as arguments are applied once before (see FlowServer)')
+    parser.add_argument('--host', default='127.0.0.1', help='the address the server listens on (default: 127.0.0.1)')
+    parser.add_argument('--map', metavar='RECORDS',
+                        help='runs the script once for every record (JSON line) of the file in a pool of worker '
+                             'processes that load the script once each (see FlowMap)')
+    parser.add_argument('--results', default='-', metavar='FILE',
+                        help='file the results of --map get written to as JSON lines (default: stdout)')
+    parser.add_argument('-c', '--collect', action='append', default=[], metavar='NODE:INDEX',
+                        help='data output whose value gets collected for every record of --map, can be repeated')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='number of worker processes for --map (default: number of CPUs)')
+    parser.add_argument('--unordered', action='store_true',
+                        help='writes the results of --map in the order they are finished instead of the records\' order')
+    parser.add_argument('--chunk-size', type=int, default=1,
+                        help='number of records sent to a worker at once for --map')
+    parser.add_argument('--trace', metavar='FILE',
+                        help='writes the timeline of the loading phases to the file in the Chrome trace event format '
+                             '(chrome://tracing, ui.perfetto.dev) once the script is loaded, not with --map')
+    return parser.parse_args(args)
+
+
+def load_runner(args):
+    """Loads the script for the non-interactive modes, returns the FlowRunner, the variables and inputs to set and the
+    NIs to trigger as given by the arguments."""
+
+    from FlowRunner import FlowRunner, parse_assignment
+
+    variables = dict([parse_assignment(a) for a in args.var])
+    inputs = dict([parse_assignment(a) for a in args.input])
+    loader = Loader(args.project, script_name=args.script,
+                    package_dirs=args.packages if args.packages is not None else ['../packages'],
+                    interactive=False)
+    runner = FlowRunner(loader.script)
+    triggers = [runner.find_node_instance(ref) for ref in args.trigger]
+    return runner, variables, inputs, triggers
+
+
+def run_batch(args) -> int:
+    """The non-interactive mode: loads the script, runs the iterations and returns the exit status."""
+
+    from FlowRunner import FlowRunnerError
+
+    t0 = time.perf_counter()
+    try:
+        runner, variables, inputs, triggers = load_runner(args)
+    except (LoadingError, FlowRunnerError, OSError, ValueError) as e:
+        print('Error:', e, file=sys.stderr)
+        return EXIT_LOADING_FAILED
+    if args.timing:
+        print(load_times_report())
+        print('loading: %.3fs' % (time.perf_counter() - t0))
+
+    # updates can already fail while the flow gets loaded
+    failed_updates = list(runner.flow.failed_updates)
+    times = []
+    for i in range(args.iterations):
+        t0 = time.perf_counter()
+        try:
+            failed_updates += runner.run(variables, triggers, args.timeout, inputs)
+        except FlowRunnerError as e:
+            print('Error:', e, file=sys.stderr)
+            return EXIT_UPDATES_FAILED
+        times.append(time.perf_counter() - t0)
+        if args.timing and args.iterations > 1:
+            print('iteration %d: %.6fs' % (i, times[-1]))
+
+    if args.timing and len(times) > 0:
+        print('%d iteration(s): min %.6fs, median %.6fs, mean %.6fs, max %.6fs, total %.6fs' %
+              (len(times), min(times), statistics.median(times), statistics.mean(times), max(times), sum(times)))
+
+    if len(failed_updates) > 0:
+        print(len(failed_updates), 'update(s) failed', file=sys.stderr)
+        return EXIT_UPDATES_FAILED
+    return EXIT_OK
+
+
+def run_server(args) -> int:
+    """The server mode: loads the script once and handles requests until interrupted."""
+
+    from FlowRunner import FlowRunnerError
+    from FlowServer import FlowServer
+
+    t0 = time.perf_counter()
+    try:
+        runner, variables, inputs, triggers = load_runner(args)
+        runner.run(variables, triggers, args.timeout, inputs)
+        server = FlowServer(runner.script, (args.host, args.serve), args.timeout)
+    except (LoadingError, FlowRunnerError, OSError, ValueError) as e:
+        print('Error:', e, file=sys.stderr)
+        return EXIT_LOADING_FAILED
+    if args.timing:
+        print(load_times_report())
+        print('loading: %.3fs' % (time.perf_counter() - t0))
+
+    print('serving script \''+args.script+'\' on http://%s:%d' % server.server_address[:2])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return EXIT_OK
+
+
+def run_map(args) -> int:
+    """The map mode: processes the records file in worker processes and writes the results."""
+
+    from FlowMap import map_records
+
+    t0 = time.perf_counter()
+    try:
+        records_file = open(args.map)
+        results_file = sys.stdout if args.results == '-' else open(args.results, 'w')
+    except OSError as e:
+        print('Error:', e, file=sys.stderr)
+        return EXIT_LOADING_FAILED
+
+    try:
+        all_succeeded = map_records(load_runner, args, args.collect, records_file, results_file, args.workers,
+                                    not args.unordered, args.chunk_size)
+    finally:
+        records_file.close()
+        if results_file is not sys.stdout:
+            results_file.close()
+    if args.timing:
+        print('map: %.3fs' % (time.perf_counter() - t0), file=sys.stderr)
+
+    return EXIT_OK if all_succeeded else EXIT_UPDATES_FAILED
+
+
 if __name__ == '__main__':
+    args = parse_args(sys.argv[1:])
+    if args.trace is not None and args.map is None:  # with --map, the workers load the script
+        enable_trace(args.trace)
+
+    if args.script is not None:
+        if args.project is None:
+            print('Error: the project is required together with --script', file=sys.stderr)
+            sys.exit(EXIT_LOADING_FAILED)
+        if args.serve is not None:
+            sys.exit(run_server(args))
+        elif args.map is not None:
+            sys.exit(run_map(args))
+        sys.exit(run_batch(args))
+
     path = ''
 
-    if len(sys.argv) > 1:
-        path = sys.argv[1]
+    if args.project is not None:
+        path = args.project
     else:
         path = clean_path_string(input('project name (or path from saves folder): '))
 
     while True:
         try:
-            f = open('../saves/'+path)
+            f = open(os.path.join('../saves', path))
             f.close()
             Loader(path)
         except FileNotFoundError:
@@ -0,0 +1,43 @@
+import asyncio
+import threading
+
+
+class AsyncLoop:
+    """Runs the async update_event()s of NodeInstances. The asyncio event loop runs in a thread of its own, so the
+    console stays usable while I/O-bound nodes are waiting. The steps of the coroutines are executed holding the
+    FlowExecutor's lock, so they never run concurrently to other updates of the flow."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.pending = 0
+        self.idle = threading.Condition()
+
+        self.thread = threading.Thread(target=self.loop.run_forever, name='AsyncLoop', daemon=True)
+        self.thread.start()
+
+    def run(self, coroutine):
+        with self.idle:
+            self.pending += 1
+        future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        future.add_done_callback(self.task_done)
+
+    def task_done(self, future):
+        with self.idle:
+            self.pending -= 1
+            self.idle.notify_all()
+
+    def join(self, timeout=None):
+        """Blocks until all scheduled coroutines are finished. Returns False if the timeout expired."""
+
+        with self.idle:
+            return self.idle.wait_for(lambda: self.pending == 0, timeout)
+
+
+async_loop: AsyncLoop = None
+
+
+def get_async_loop() -> AsyncLoop:
+    global async_loop
+    if async_loop is None:
+        async_loop = AsyncLoop()
+    return async_loop
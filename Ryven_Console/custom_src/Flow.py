@@ -1,41 +1,47 @@
 import inspect
 
-from class_inspection import find_type_in_object
+from custom_src.FlowExecutor import FlowExecutor
 from custom_src.GlobalAttributes import Flow_AlgorithmMode
+from custom_src.LoadTiming import load_phase
 from custom_src.Node import Node
 from custom_src.PortInstance import PortInstance
 
 
 class Flow:
-    def __init__(self, parent_script, config: dict, nodes, node_instance_classes):
+    def __init__(self, parent_script, config: dict, nodes, node_instance_classes, nodes_index=None):
 
         self.parent_script = parent_script
         self.all_nodes = nodes
+        if nodes_index is None:
+            nodes_index = {}
+            for n in nodes:
+                nodes_index.setdefault((n.package, n.title), n)
+        self.nodes_index = nodes_index  # {(package name, title): node}
         self.node_instance_classes = node_instance_classes
+        self.executor = FlowExecutor(self)
+        self.algorithm_mode = Flow_AlgorithmMode  # the mode is global in the console, see below
+        self.failed_updates = []  # [(NodeInstance, exception)], used by the non-interactive modes for the exit status
         if config.__contains__('algorithm mode'):
             if config['algorithm mode'] == 'data flow':
                 Flow_AlgorithmMode.mode_data_flow = True
             else:
                 Flow_AlgorithmMode.mode_data_flow = False
+        if config.__contains__('parallel data flow'):
+            self.executor.parallel = config['parallel data flow']
 
-        self.all_node_instances = self.load_node_instances(config['nodes'])
-        self.connect_nodes(config['connections'])
+        with self.executor.lock:  # async updates of NIs might already be running
+            with load_phase('node instances'):
+                self.all_node_instances = self.load_node_instances(config['nodes'])
+            with load_phase('connections'):
+                self.connect_nodes(config['connections'])
 
 
     def load_node_instances(self, config: dict):
         node_instances = []
 
         for n_c in config:
-            # find parent node by title, type, package name and description as identifiers
-            parent_node_title = n_c['parent node title']
-            parent_node_package_name = n_c['parent node package']
-            parent_node = None
-            for pn in self.all_nodes:
-                pn: Node
-                if pn.title == parent_node_title and \
-                        pn.package == parent_node_package_name:
-                    parent_node = pn
-                    break
+            # find parent node by package name and title as identifiers
+            parent_node = self.nodes_index.get((n_c['parent node package'], n_c['parent node title']))
             new_NI = self.create_node_instance(parent_node, n_c)
             node_instances.append(new_NI)
 
@@ -64,5 +70,6 @@ class Flow:
     def connect_ports(self, output_port: PortInstance, input_port: PortInstance):
         output_port.connected_port_instances.append(input_port)
         input_port.connected_port_instances.append(output_port)
+        self.executor.connection_added(output_port, input_port)
         if input_port.type_ == 'data':
             input_port.update()
\ No newline at end of file
@@ -0,0 +1,69 @@
+class FlowReachability:
+    """Keeps track of which NIs can be reached from which through data connections, to find the connections that close
+    a cycle. Those are marked as feedback connections (input_port.feedback = True) and treated as one-step-delayed
+    registers by the FlowExecutor, everything else forms a DAG.
+    Adding a connection updates the transitive closure incrementally. Removing connections or NIs is rare, it just
+    marks the structure as outdated and it gets rebuilt on the next change."""
+
+    def __init__(self, flow):
+        self.flow = flow
+        self.descendants = {}  # {NodeInstance: set of NIs reachable through non-feedback data connections}
+        self.ancestors = {}  # {NodeInstance: set of NIs this NI can be reached from}
+        self.outdated = False
+
+    def connection_added(self, output_port, input_port):
+        """Called after a data connection has been added, marks it as feedback connection if it closes a cycle."""
+
+        if self.outdated:
+            self.rebuild(new_connection=(output_port, input_port))
+        else:
+            input_port.feedback = not self.add(output_port.parent_node_instance, input_port.parent_node_instance)
+
+    def connection_removed(self, output_port, input_port):
+        input_port.feedback = False
+        self.outdated = True
+
+    def node_instances_changed(self):
+        self.outdated = True
+
+    def add(self, source, target) -> bool:
+        """Adds the edge to the closure if it doesn't close a cycle, returns whether it has been added."""
+
+        if source is target or source in self.descendants.get(target, ()):
+            return False
+
+        targets = {target} | self.descendants.get(target, set())
+        sources = {source} | self.ancestors.get(source, set())
+        for s in sources:
+            self.descendants.setdefault(s, set()).update(targets)
+        for t in targets:
+            self.ancestors.setdefault(t, set()).update(sources)
+        return True
+
+    def rebuild(self, new_connection=None):
+        """Rebuilds the closure from all data connections in the flow. Connections that were no feedback connections
+        before are added first, so existing feedback connections keep being the ones that get delayed, and they get
+        unmarked if their cycle doesn't exist anymore."""
+
+        self.descendants = {}
+        self.ancestors = {}
+        self.outdated = False
+
+        node_instances = set(self.flow.all_node_instances)
+        feedback_connections = []
+        for ni in self.flow.all_node_instances:
+            for o in ni.outputs:
+                if o.type_ != 'data':
+                    continue
+                for cpi in o.connected_port_instances:
+                    if cpi.parent_node_instance not in node_instances or (o, cpi) == new_connection:
+                        continue
+                    if cpi.feedback:
+                        feedback_connections.append((o, cpi))
+                    else:
+                        cpi.feedback = not self.add(ni, cpi.parent_node_instance)
+
+        if new_connection is not None:
+            feedback_connections.insert(0, new_connection)
+        for o, cpi in feedback_connections:
+            cpi.feedback = not self.add(o.parent_node_instance, cpi.parent_node_instance)
@@ -0,0 +1,120 @@
+"""Measures how long the phases of loading a project take (importing packages, creating the NIs of a flow, connecting
+them, ...). Phases can be nested:
+
+    with load_phase('script \'main\''):
+        with load_phase('node instances'):
+            ...
+
+load_times_report() returns the measured phases in the order they started, indented by nesting depth.
+
+The classes of nodes from packages get imported when they're needed first, which can be anywhere in these phases (or
+later), so the time spent importing them is summed up per package separately, see import_times_report().
+
+If a trace file is set (enable_trace(), the --trace option of Ryven and Ryven_Console), all phases are recorded on a
+timeline as well, together with the phases that only appear there (trace_phase(), f.ex. the ones in worker threads).
+write_trace() writes the timeline in the Chrome trace event format, which can be opened in chrome://tracing or
+https://ui.perfetto.dev. The timeline starts when this module is imported, which is the first thing the entry points
+do."""
+
+from contextlib import contextmanager
+import json
+import os
+import threading
+import time
+
+
+load_times = []  # [[depth, phase name, seconds]] in the order the phases started
+current_depth = 0
+import_times = {}  # {package name: seconds}
+
+time_origin = time.perf_counter()
+trace_file = None  # see enable_trace()
+trace_events = []  # [(phase name, start, seconds, thread id)], start relative to time_origin
+
+
+@contextmanager
+def load_phase(name):
+    global current_depth
+    entry = [current_depth, name, None]
+    load_times.append(entry)
+    current_depth += 1
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        entry[2] = time.perf_counter() - t0
+        current_depth -= 1
+        add_trace_event(name, t0, entry[2])
+
+
+@contextmanager
+def trace_phase(name):
+    """A phase that only gets recorded on the timeline, can be used in any thread."""
+
+    if trace_file is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_trace_event(name, t0, time.perf_counter() - t0)
+
+
+def load_times_report(clear=True) -> str:
+    lines = ['%s%s: %.3fs' % ('    ' * depth, name, seconds) for depth, name, seconds in load_times
+             if seconds is not None]
+    if clear and current_depth == 0:
+        load_times.clear()
+    return '\n'.join(['load times:'] + lines)
+
+
+def add_import_time(package, seconds):
+    import_times[package] = import_times.get(package, 0) + seconds
+    add_trace_event('node classes of '+package, time.perf_counter() - seconds, seconds)
+
+
+def import_times_report() -> str:
+    lines = ['    %s: %.3fs' % (package, seconds) for package, seconds in
+             sorted(import_times.items(), key=lambda item: item[1], reverse=True)]
+    return '\n'.join(['import times of node classes by package:'] + lines)
+
+
+# TRACE
+def enable_trace(file_path):
+    global trace_file
+    trace_file = file_path
+
+
+def add_trace_event(name, start, seconds):
+    """start: time.perf_counter() at the beginning of the phase"""
+
+    if trace_file is not None:
+        trace_events.append((name, start - time_origin, seconds, threading.get_ident()))
+
+
+def trace_data() -> dict:
+    thread_ids = {threading.main_thread().ident: 0}  # small numbers instead of the OS' thread ids, main thread first
+    for name, start, seconds, thread_id in trace_events:
+        thread_ids.setdefault(thread_id, len(thread_ids))
+
+    pid = os.getpid()
+    events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+               'args': {'name': 'main thread' if tid == 0 else 'worker thread %d' % tid}}
+              for tid in thread_ids.values()]
+    events += [{'name': name, 'ph': 'X', 'pid': pid, 'tid': thread_ids[thread_id],
+                'ts': round(start * 1e6, 1), 'dur': round(seconds * 1e6, 1)}
+               for name, start, seconds, thread_id in trace_events]
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def write_trace():
+    """Writes the timeline recorded so far to the trace file, does nothing if tracing isn't enabled."""
+
+    if trace_file is None:
+        return
+    try:
+        with open(trace_file, 'w') as f:
+            json.dump(trace_data(), f)
+    except OSError as e:
+        print('couldn\'t write the trace file:', e)
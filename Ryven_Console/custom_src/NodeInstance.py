@@ -1,9 +1,20 @@
+import asyncio
+
 from custom_src.Node import Node
 from custom_src.PlaceholderClass import PlaceholderClass
 from custom_src.PortInstance import InputPortInstance, OutputPortInstance
 
 
 class NodeInstance:
+
+    # exec-flow mode: whether the output values may be reused for all requests during one exec wave (see FlowExecutor)
+    memoize_outputs = True
+
+    # whether update_event() may run in a separate process (see NodeOffloading), for CPU-heavy pure Python nodes
+    offload_update_event = False
+    # calls made by an offloaded update_event() that get replayed on the NI, f.ex. ('main_widget.draw_points',)
+    offload_recorded_calls = ()
+
     def __init__(self, params):
         super(NodeInstance, self).__init__()
 
@@ -35,10 +46,26 @@ class NodeInstance:
     #   ALGORITHM
 
     def update(self, input_called=-1, output_called=-1):
+        self.flow.executor.node_update_started()
         try:
-            self.update_event(input_called)
+            if self.offload_update_event:
+                result = self.flow.executor.offload_update(self, input_called)
+            else:
+                result = self.update_event(input_called)
+            if asyncio.iscoroutine(result):  # async def update_event() or an offloaded update
+                self.flow.executor.run_async_update(self, self.finish_async_update(result))
         except Exception as e:
             print('EXCEPTION in', self.parent_node.title, e)
+            self.flow.failed_updates.append((self, e))
+        finally:
+            self.flow.executor.node_update_finished()
+
+    async def finish_async_update(self, update_coroutine):
+        try:
+            await update_coroutine
+        except Exception as e:
+            print('EXCEPTION in', self.parent_node.title, e)
+            self.flow.failed_updates.append((self, e))
 
     def update_event(self, input_called=-1):
         pass
@@ -52,6 +79,9 @@ class NodeInstance:
     def set_output_val(self, index, val):
         self.outputs[index].set_val(val)
 
+    def batch_outputs(self):
+        return self.flow.executor.output_batch()
+
     def remove_event(self):
         pass
 
@@ -82,9 +112,11 @@ class NodeInstance:
         return self.flow.parent_script.variables_handler
 
     def get_var_val(self, name):
+        self.flow.executor.flush_execs()
         return self.get_vars_handler().get_var_val(name)
 
     def set_var_val(self, name, val):
+        self.flow.executor.flush_execs()
         return self.get_vars_handler().set_var(name, val)
 
     def register_var_receiver(self, name, method):
@@ -0,0 +1,267 @@
+"""Running the update_event() of NodeInstances in a separate process. A NI class can declare that by setting
+offload_update_event = True. The NI itself can't be sent to another process (it's part of the GUI), so a stand-in
+gets sent instead: it knows the NI's class, the values of its inputs and all of its attributes that can be pickled.
+update_event() is then called on the stand-in in a worker process of a ProcessPoolExecutor. Setting outputs and
+executing exec outputs gets recorded there and replayed on the real NI afterwards, in the same order, together with
+the calls the NI class lists in offload_recorded_calls (f.ex. 'main_widget.draw_points' or 'my_log.log', calls whose
+result isn't used) and the NI API methods in RECORDED_API. Changed attributes are copied back.
+Only the values of inputs that are available without updating other NIs are sent (see FlowExecutor.input_available()).
+Everything else the stand-in can't provide (other NI API methods, other attributes or methods of the main widget and
+of unpicklable attributes, the inputs that weren't sent) raises NotOffloadable in the worker, and the update happens
+in-process as usual, just like when anything can't be pickled or the worker fails for another reason."""
+
+from concurrent.futures import ProcessPoolExecutor
+import pickle
+import sys
+
+from custom_src.PackageImporter import install_finder, package_module_finder
+
+
+process_pool: ProcessPoolExecutor = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global process_pool
+    if process_pool is None:
+        # the workers need to find the node modules the same way (see PackageImporter)
+        process_pool = ProcessPoolExecutor(initializer=init_worker,
+                                           initargs=(list(sys.path), dict(package_module_finder.module_files)))
+    return process_pool
+
+
+def init_worker(path, module_files):
+    for p in path:
+        if p not in sys.path:
+            sys.path.append(p)
+    install_finder(module_files)
+
+
+# attributes of the NI that are never sent, the stand-in provides the ports and the main widget itself
+STAND_IN_ATTRIBUTES = ('parent_node', 'flow', 'inputs', 'outputs', 'main_widget', 'main_widget_proxy')
+
+# methods of the NodeInstance API whose calls get recorded in the worker, they don't return anything
+RECORDED_API = ('log_message', 'update_shape')
+
+
+class NotOffloadable(Exception):
+    """Raised in the worker if update_event() needs something the stand-in can't provide."""
+
+
+class OffloadedUpdate:
+    """Everything a worker process needs to run the update_event() of a NI."""
+
+    def __init__(self, ni_class, input_called, input_types, input_values, sent_inputs, output_types,
+                 has_main_widget, attributes, recorded_attributes):
+        self.ni_class = ni_class
+        self.input_called = input_called
+        self.input_types = input_types
+        self.input_values = input_values
+        self.sent_inputs = sent_inputs  # whether the value of each input has been sent
+        self.output_types = output_types
+        self.has_main_widget = has_main_widget
+        self.attributes = attributes  # {name: pickled value}
+        self.recorded_attributes = recorded_attributes  # names of the unpicklable attributes
+
+    @staticmethod
+    def prepare(ni, input_called):
+        """Returns the OffloadedUpdate for ni or None if the input values can't be pickled."""
+
+        # the inputs whose values would have to be computed first are not pulled, update_event() might not need them
+        executor = ni.flow.executor
+        sent_inputs = [inp.type_ == 'data' and executor.input_available(inp) for inp in ni.inputs]
+        input_values = [ni.input(i) if sent_inputs[i] else None for i in range(len(ni.inputs))]
+        try:
+            pickle.dumps(input_values)
+        except Exception:
+            return None
+
+        # the attributes that turned out to be unpicklable once are not tried again
+        unpicklable = getattr(ni, 'offload_unpicklable_attributes', None)
+        if unpicklable is None:
+            unpicklable = set(STAND_IN_ATTRIBUTES)
+            unpicklable.add('offload_unpicklable_attributes')
+            ni.offload_unpicklable_attributes = unpicklable
+
+        attributes = {}
+        for name, val in list(ni.__dict__.items()):
+            if name in unpicklable:
+                continue
+            try:
+                attributes[name] = pickle.dumps(val)
+            except Exception:
+                unpicklable.add(name)
+
+        recorded_attributes = [name for name in unpicklable if name not in STAND_IN_ATTRIBUTES and
+                               name != 'offload_unpicklable_attributes']
+
+        return OffloadedUpdate(type(ni), input_called, [inp.type_ for inp in ni.inputs], input_values, sent_inputs,
+                               [out.type_ for out in ni.outputs], ni.main_widget is not None, attributes,
+                               recorded_attributes)
+
+    def apply(self, ni, result):
+        """Replays the effects recorded by the worker on the real NI. Raises the exception update_event() raised in
+        the worker, if any."""
+
+        changed_attributes, effects, exception = result
+
+        for name, data in changed_attributes.items():
+            setattr(ni, name, pickle.loads(data))
+
+        for e in effects:
+            if e[0] == 'output':
+                ni.set_output_val(e[1], e[2])
+            elif e[0] == 'exec':
+                ni.exec_output(e[1])
+            else:  # 'call'
+                obj = ni
+                for name in e[1]:
+                    obj = getattr(obj, name)
+                obj(*e[2], **e[3])
+
+        if exception is not None:
+            raise exception
+
+
+def run_offloaded_update(task: OffloadedUpdate):
+    """Runs in the worker process. Returns None if the update has to happen in-process."""
+
+    stand_in = StandInNodeInstance(task)
+    exception = None
+    try:
+        task.ni_class.update_event(stand_in, task.input_called)
+    except Exception as e:
+        exception = e
+
+    # update_event() might have caught the NotOffloadable itself
+    if isinstance(exception, NotOffloadable) or len(stand_in._stand_in_not_offloadable) > 0:
+        return None
+
+    if exception is not None:
+        try:
+            pickle.dumps(exception)
+        except Exception:
+            exception = RuntimeError(repr(exception))
+
+    changed_attributes = {}
+    for name in stand_in.__dict__.keys():
+        if name.startswith('_stand_in_') or name in STAND_IN_ATTRIBUTES:
+            continue
+        val = getattr(stand_in, name)
+        if isinstance(val, CallRecorder):
+            continue
+        data = pickle.dumps(val)
+        if data != task.attributes.get(name):
+            changed_attributes[name] = data
+
+    return changed_attributes, stand_in._stand_in_effects, exception
+
+
+class CallRecorder:
+    """Stands for an object of the real NI (f.ex. its main widget or a log) in the worker. Calls listed in
+    offload_recorded_calls of the NI class get recorded and return None, everything else raises NotOffloadable."""
+
+    def __init__(self, stand_in, path: tuple):
+        self._stand_in = stand_in
+        self._path = path
+
+    def __getattr__(self, name):
+        path = self._path + (name,)
+        if not any(c[:len(path)] == path for c in self._stand_in._stand_in_recorded_calls):
+            self._stand_in._stand_in_refuse('.'.join(path))
+        return CallRecorder(self._stand_in, path)
+
+    def __call__(self, *args, **kwargs):
+        if self._path not in self._stand_in._stand_in_recorded_calls:
+            self._stand_in._stand_in_refuse('.'.join(self._path))
+        self._stand_in._stand_in_effects.append(('call', self._path, args, kwargs))
+
+
+class StandInInput:
+    def __init__(self, stand_in, index, type_, val, sent):
+        self.stand_in = stand_in
+        self.index = index
+        self.type_ = type_
+        self.val = val
+        self.sent = sent
+
+    def get_val(self):
+        if not self.sent:
+            self.stand_in._stand_in_refuse('input '+str(self.index))
+        return self.val
+
+
+class StandInOutput:
+    def __init__(self, effects: list, index, type_):
+        self.effects = effects
+        self.index = index
+        self.type_ = type_
+        self.val = None
+
+    def set_val(self, val):
+        self.val = val
+        self.effects.append(('output', self.index, val))
+
+    def exec(self):
+        self.effects.append(('exec', self.index))
+
+
+class StandInNodeInstance:
+    """Acts as the NI during an offloaded update_event(). Methods of the NI's class are run on the stand-in, of the
+    NodeInstance base class (the API) only the ones below and the recorded ones (RECORDED_API) are available."""
+
+    def __init__(self, task: OffloadedUpdate):
+        self._stand_in_class = task.ni_class
+        self._stand_in_effects = []
+        self._stand_in_not_offloadable = []  # what update_event() needed but couldn't get
+        self._stand_in_recorded_calls = {tuple(c.split('.')) for c in
+                                         getattr(task.ni_class, 'offload_recorded_calls', ())}
+
+        self.inputs = [StandInInput(self, i, task.input_types[i], task.input_values[i], task.sent_inputs[i])
+                       for i in range(len(task.input_values))]
+        self.outputs = [StandInOutput(self._stand_in_effects, i, task.output_types[i])
+                        for i in range(len(task.output_types))]
+        self.main_widget = CallRecorder(self, ('main_widget',)) if task.has_main_widget else None
+
+        for name, data in task.attributes.items():
+            setattr(self, name, pickle.loads(data))
+        for name in task.recorded_attributes:
+            setattr(self, name, CallRecorder(self, (name,)))
+
+        # the classes between the NI's class and NodeInstance, their methods can be called directly
+        mro = self._stand_in_class.__mro__
+        own_classes = []
+        for c in mro:
+            if c.__name__ == 'NodeInstance' and c.__module__ == 'custom_src.NodeInstance':
+                break
+            own_classes.append(c)
+        self._stand_in_own_classes = own_classes
+
+    def __getattr__(self, name):
+        if name.startswith('_stand_in_'):
+            raise AttributeError(name)
+
+        for c in self._stand_in_own_classes:
+            if name in c.__dict__:
+                attr = c.__dict__[name]
+                if hasattr(attr, '__get__'):
+                    return attr.__get__(self, self._stand_in_class)
+                return attr
+
+        if name in RECORDED_API:
+            self._stand_in_recorded_calls.add((name,))
+            return CallRecorder(self, (name,))
+
+        self._stand_in_refuse(name)
+
+    def _stand_in_refuse(self, name):
+        self._stand_in_not_offloadable.append(name)
+        raise NotOffloadable(name+' is not available in the worker process')
+
+    def input(self, index):
+        return self.inputs[index].get_val()
+
+    def set_output_val(self, index, val):
+        self.outputs[index].set_val(val)
+
+    def exec_output(self, index):
+        self.outputs[index].exec()
@@ -0,0 +1,51 @@
+"""Importing the modules of node packages (NI classes, main widgets, custom input widgets) without adding their
+directories to sys.path.
+
+Every node has a directory of its own, appending them all to sys.path would make it grow by hundreds of entries, and
+every import that isn't satisfied by an earlier entry (imports inside node modules, optional imports that fail, ...)
+would look into all of them. Instead, the location of every package module is registered in a finder on
+sys.meta_path, so finding a package module costs one dict lookup and other imports aren't affected.
+The module names stay the same as with sys.path (the file names, which are unique as they contain the package name),
+so f.ex. pickled references to NI classes (see NodeOffloading) keep working."""
+
+import importlib
+import importlib.abc
+import importlib.util
+import os
+import sys
+
+
+class PackageModuleFinder(importlib.abc.MetaPathFinder):
+    def __init__(self):
+        self.module_files = {}  # {module name: path of the module's file}
+
+    def register(self, module_name, file_path):
+        self.module_files[module_name] = file_path
+
+    def find_spec(self, fullname, path=None, target=None):
+        file_path = self.module_files.get(fullname)
+        if file_path is None or not os.path.isfile(file_path):
+            return None
+        return importlib.util.spec_from_file_location(fullname, file_path)
+
+
+package_module_finder = PackageModuleFinder()
+
+
+def install_finder(module_files=None):
+    """Puts the finder at the front of sys.meta_path if it isn't there yet, module_files: {module name: file path} to
+    register, f.ex. the ones of the parent process in a worker."""
+
+    if module_files is not None:
+        package_module_finder.module_files.update(module_files)
+    if package_module_finder not in sys.meta_path:
+        sys.meta_path.insert(0, package_module_finder)
+
+
+def import_package_module(file_path, file_name):
+    """Imports the module file_name (without .py) from the directory file_path. Raises ModuleNotFoundError if the file
+    doesn't exist, and everything the module raises itself when it gets executed."""
+
+    install_finder()
+    package_module_finder.register(file_name, os.path.join(file_path, file_name+'.py'))
+    return importlib.import_module(file_name)
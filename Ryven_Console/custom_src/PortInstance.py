@@ -18,21 +18,27 @@ class OutputPortInstance(PortInstance):
         super(OutputPortInstance, self).__init__(parent_node_instance, type_, label)
 
         self.val = None
+        self.val_wave = None  # the exec wave the current value was computed in, None if invalid (see FlowExecutor)
 
     def exec(self):
-        for cpi in self.connected_port_instances:
-            cpi.update()
+        self.parent_node_instance.flow.executor.exec_output(self)
 
     def set_val(self, val):
+        self.parent_node_instance.flow.executor.flush_execs()
+
         self.val = val
 
-        if Flow_AlgorithmMode.mode_data_flow and not self.parent_node_instance.initializing:
-            for cpi in self.connected_port_instances:
-                cpi.update()
+        if Flow_AlgorithmMode.mode_data_flow:
+            if not self.parent_node_instance.initializing:
+                self.parent_node_instance.flow.executor.data_output_updated(self)
+        else:
+            self.parent_node_instance.flow.executor.invalidate_downstream(self)
 
     def get_val(self):
+        self.parent_node_instance.flow.executor.flush_execs()
+
         if not Flow_AlgorithmMode.mode_data_flow:
-            self.parent_node_instance.update()
+            self.parent_node_instance.flow.executor.pull_output(self)
         return self.val
 
 
@@ -41,17 +47,21 @@ class InputPortInstance(PortInstance):
         super(InputPortInstance, self).__init__(parent_node_instance, type_, label)
 
         self.val = None
+        self.feedback = False  # whether the connection closes a cycle (see FlowReachability)
         try:
             self.val = eval(widget_data)
         except Exception as e:
             self.val = widget_data
 
     def get_val(self):
+        self.parent_node_instance.flow.executor.flush_execs()
+
         if len(self.connected_port_instances) == 0:
             return self.val
+        elif self.feedback:  # delayed, the value of the last step is never pulled
+            return self.connected_port_instances[0].val
         else:
             return self.connected_port_instances[0].get_val()
 
     def update(self):
-        if (self.parent_node_instance.is_active() and self.type_ == 'exec') or not self.parent_node_instance.is_active():
-            self.parent_node_instance.update(self.parent_node_instance.inputs.index(self))
\ No newline at end of file
+        self.parent_node_instance.flow.executor.input_updated(self)
\ No newline at end of file
@@ -7,9 +7,9 @@ from custom_src.script_variables.VariablesHandler import VariablesHandler
 
 
 class Script:
-    def __init__(self, config, nodes, node_instance_classes):
+    def __init__(self, config, nodes, node_instance_classes, nodes_index=None):
         self.name = config['name']
         self.variables = []
         self.variables_handler = VariablesHandler(self, config['variables'])
-        self.flow = Flow(self, config['flow'], nodes, node_instance_classes)
+        self.flow = Flow(self, config['flow'], nodes, node_instance_classes, nodes_index)
         self.variables_handler.flow = self.flow
\ No newline at end of file
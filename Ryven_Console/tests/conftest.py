@@ -0,0 +1,78 @@
+"""The tests run the flows headless with the console's custom_src, which doesn't need Qt. The flows get built from
+config data like the one in project files, with NI classes defined in the tests."""
+
+import os
+import sys
+
+import pytest
+
+CONSOLE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, CONSOLE_DIR)
+# VariablesHandler adds this directory relative to the console's directory, which isn't the working directory here
+sys.path.append(os.path.join(os.path.dirname(CONSOLE_DIR), 'Ryven', 'custom_src', 'script_variables'))
+
+from custom_src.GlobalAttributes import Flow_AlgorithmMode
+from custom_src.Node import Node
+from custom_src.Script import Script
+
+
+class FlowBuilder:
+    """Collects NIs and connections and creates a Script with them. Every added NI gets a node of its own."""
+
+    def __init__(self, mode='data flow', parallel=False):
+        self.mode = mode
+        self.parallel = parallel
+        self.nodes = []
+        self.node_instance_classes = {}
+        self.node_configs = []
+        self.connections = []
+
+    def add(self, node_instance_class, inputs=(), outputs=(), state=None) -> int:
+        """Adds a NI, inputs: port types or (port type, widget value), outputs: port types. Returns its index."""
+
+        node = Node()
+        node.title = 'node %d' % len(self.nodes)
+        node.package = 'tests'
+        self.nodes.append(node)
+        self.node_instance_classes[node] = node_instance_class
+
+        input_configs = []
+        for inp in inputs:
+            type_, val = inp if isinstance(inp, tuple) else (inp, None)
+            input_configs.append({'type': type_, 'label': '', 'has widget': val is not None, 'widget data': repr(val)})
+        self.node_configs.append({
+            'parent node package': node.package,
+            'parent node title': node.title,
+            'inputs': input_configs,
+            'outputs': [{'type': type_, 'label': ''} for type_ in outputs],
+            'state data': state,
+        })
+        return len(self.nodes)-1
+
+    def connect(self, output_ni, output_index, input_ni, input_index):
+        self.connections.append({'parent node instance index': output_ni, 'output port index': output_index,
+                                 'connected node instance': input_ni, 'connected input port index': input_index})
+
+    def build(self, variables=None) -> Script:
+        """variables: {name: value} of the script"""
+
+        flow = {'algorithm mode': self.mode, 'parallel data flow': self.parallel, 'nodes': self.node_configs,
+                'connections': self.connections}
+        config = {'name': 'test', 'variables': variables or {}, 'flow': flow}
+        return Script(config, self.nodes, self.node_instance_classes)
+
+
+@pytest.fixture(autouse=True)
+def console_dir(monkeypatch):
+    """Like Ryven_Console.py, the tests run in the console's directory."""
+
+    monkeypatch.chdir(CONSOLE_DIR)
+
+
+@pytest.fixture
+def flow_builder():
+    """Returns FlowBuilder, the global algorithm mode gets restored afterwards."""
+
+    mode_data_flow = Flow_AlgorithmMode.mode_data_flow
+    yield FlowBuilder
+    Flow_AlgorithmMode.mode_data_flow = mode_data_flow
@@ -0,0 +1,118 @@
+"""AutosaveJournal is part of the editor only, but it doesn't need Qt. It gets loaded from the editor's custom_src,
+its import of ProjectFile is satisfied by the console's copy, which is the same file."""
+
+import importlib.util
+import json
+import os
+
+import pytest
+
+from custom_src.ProjectFile import write_project
+
+
+RYVEN_SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'Ryven',
+                             'custom_src')
+
+
+@pytest.fixture(scope='module')
+def journal():
+    spec = importlib.util.spec_from_file_location('AutosaveJournal', os.path.join(RYVEN_SRC_DIR, 'AutosaveJournal.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def node(title, inputs=1, outputs=1, x=0, y=0):
+    return {'parent node title': title, 'position x': x, 'position y': y, 'state data': {},
+            'inputs': [{'label': 'in %d' % i} for i in range(inputs)],
+            'outputs': [{'label': 'out %d' % i} for i in range(outputs)]}
+
+
+def connection(output_ni, output_index, input_ni, input_index):
+    return {'parent node instance index': output_ni, 'output port index': output_index,
+            'connected node instance': input_ni, 'connected input port index': input_index}
+
+
+@pytest.fixture
+def autosave(tmp_path, journal):
+    """Writes a snapshot with one script (NIs a -> b), returns a function writing the journal (header generation,
+    entries as JSON lines or raw strings) which returns the recovered flow."""
+
+    snapshot_file = str(tmp_path / 'autosave.rpo')
+    journal_file = str(tmp_path / 'autosave.journal')
+    write_project(snapshot_file, {
+        'general info': {'type': 'Ryven project file', 'autosave generation': 'g1'},
+        'scripts': [{'name': 'script', 'variables': {},
+                     'flow': {'nodes': [node('a'), node('b')], 'connections': [connection(0, 0, 1, 0)],
+                              'drawings': []}}]})
+
+    def recover(entries, generation='g1'):
+        with open(journal_file, 'w') as f:
+            f.write(json.dumps({'generation': generation})+'\n')
+            for entry in entries:
+                f.write(entry if isinstance(entry, str) else json.dumps(dict(entry, script=0))+'\n')
+        return journal.recover_project(snapshot_file, journal_file)['scripts'][0]['flow']
+
+    return recover
+
+
+def test_changes_get_replayed(autosave):
+    flow = autosave([
+        {'op': 'add node', 'config': node('c', x=5)},
+        {'op': 'connect', 'output': [1, 0], 'input': [2, 0]},
+        {'op': 'move', 'nodes': [[0, 10, 20]]},
+        {'op': 'node state', 'node': 1, 'config': dict(node('b'), **{'state data': {'value': 3}})},
+        {'op': 'add drawing', 'config': {'points': [[0, 0]]}},
+        {'op': 'drawing', 'drawing': 0, 'config': {'points': [[1, 1]]}},
+    ])
+
+    assert [n['parent node title'] for n in flow['nodes']] == ['a', 'b', 'c']
+    assert flow['connections'] == [connection(0, 0, 1, 0), connection(1, 0, 2, 0)]
+    assert (flow['nodes'][0]['position x'], flow['nodes'][0]['position y']) == (10, 20)
+    assert flow['nodes'][1]['state data'] == {'value': 3}
+    assert flow['drawings'] == [{'points': [[1, 1]]}]
+
+
+def test_removing_nodes_and_ports_shifts_the_connections(autosave):
+    flow = autosave([
+        {'op': 'add node', 'config': node('c', inputs=2)},
+        {'op': 'connect', 'output': [1, 0], 'input': [2, 1]},
+        {'op': 'add port', 'node': 2, 'ports': 'inputs', 'index': 0, 'config': {'label': 'new'}},
+        {'op': 'remove node', 'node': 0},
+    ])
+
+    assert [n['parent node title'] for n in flow['nodes']] == ['b', 'c']
+    assert [p['label'] for p in flow['nodes'][1]['inputs']] == ['new', 'in 0', 'in 1']
+    assert flow['connections'] == [connection(0, 0, 1, 2)]
+
+
+def test_journal_of_another_snapshot_is_ignored(autosave):
+    flow = autosave([{'op': 'remove node', 'node': 0}], generation='g0')
+
+    assert len(flow['nodes']) == 2
+
+
+def test_replay_stops_at_a_partly_written_line(autosave):
+    flow = autosave([{'op': 'move', 'nodes': [[0, 1, 1]]}, '{"op": "remove node", "script": 0, "no'])
+
+    assert len(flow['nodes']) == 2
+    assert flow['nodes'][0]['position x'] == 1
+
+
+def test_replay_stops_at_an_entry_that_cant_be_applied(autosave):
+    flow = autosave([
+        {'op': 'move', 'nodes': [[0, 1, 1]]},
+        {'op': 'remove node', 'node': 7},
+        {'op': 'move', 'nodes': [[0, 2, 2]]},
+    ])
+
+    assert flow['nodes'][0]['position x'] == 1
+
+
+def test_snapshot_without_journal(journal, autosave, tmp_path):
+    autosave([])
+    os.remove(str(tmp_path / 'autosave.journal'))
+
+    project = journal.recover_project(str(tmp_path / 'autosave.rpo'), str(tmp_path / 'autosave.journal'))
+
+    assert len(project['scripts'][0]['flow']['nodes']) == 2
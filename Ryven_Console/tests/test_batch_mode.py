@@ -0,0 +1,100 @@
+import pytest
+
+from custom_src.NodeInstance import NodeInstance
+from FlowRunner import FlowRunner, FlowRunnerError, parse_assignment, parse_value
+import Ryven_Console
+
+
+class Record(NodeInstance):
+    """Appends the variable x to its log on every update, fails if the variable fail is set."""
+
+    def set_data(self, data):
+        self.log = []
+
+    def update_event(self, input_called=-1):
+        if self.get_var_val('fail'):
+            raise RuntimeError('failed on purpose')
+        self.log.append(self.get_var_val('x'))
+
+
+def runner_with_titles(flow_builder, *titles):
+    builder = flow_builder()
+    for i in range(len(titles)):
+        builder.add(Record)
+    runner = FlowRunner(builder.build(variables={'x': 0, 'fail': False}))
+    for ni, title in zip(runner.flow.all_node_instances, titles):
+        ni.parent_node.title = title
+    return runner
+
+
+@pytest.mark.parametrize('val_str, val', [('3', 3), ('2.5', 2.5), ('[1, "a"]', [1, 'a']), ('None', None),
+                                          ('text', 'text'), ('1 +', '1 +')])
+def test_parse_value(val_str, val):
+    assert parse_value(val_str) == val
+
+
+def test_parse_assignment():
+    assert parse_assignment(' x = 5') == ('x', 5)
+    assert parse_assignment('s=a=b') == ('s', 'a=b')
+    with pytest.raises(FlowRunnerError):
+        parse_assignment('x')
+    with pytest.raises(FlowRunnerError):
+        parse_assignment('=5')
+
+
+def test_find_node_instance(flow_builder):
+    runner = runner_with_titles(flow_builder, 'a', 'b', 'b')
+    nis = runner.flow.all_node_instances
+
+    assert runner.find_node_instance(1) is nis[1]
+    assert runner.find_node_instance('2') is nis[2]
+    assert runner.find_node_instance('a') is nis[0]
+    for ref in ['b', 'c', 3, -1, True, None]:  # ambiguous, missing, out of range, no reference
+        with pytest.raises(FlowRunnerError):
+            runner.find_node_instance(ref)
+
+
+def batch_args(*args):
+    return Ryven_Console.parse_args(['project', '--script', 'test'] + list(args))
+
+
+@pytest.fixture
+def runner(flow_builder, monkeypatch):
+    """The runner run_batch() uses, the loaded script is replaced by one with a Record NI titled 'record'."""
+
+    runner = runner_with_titles(flow_builder, 'record')
+
+    def load_runner(args):
+        return runner, dict([parse_assignment(a) for a in args.var]), {}, \
+               [runner.find_node_instance(ref) for ref in args.trigger]
+
+    monkeypatch.setattr(Ryven_Console, 'load_runner', load_runner)
+    runner.flow.all_node_instances[0].log.clear()
+    return runner
+
+
+def test_batch_runs_the_triggers_every_iteration(runner):
+    status = Ryven_Console.run_batch(batch_args('--var', 'x=7', '--trigger', 'record', '--iterations', '3'))
+
+    assert status == Ryven_Console.EXIT_OK
+    assert runner.flow.all_node_instances[0].log == [7, 7, 7]
+
+
+def test_batch_reports_failed_updates(runner):
+    status = Ryven_Console.run_batch(batch_args('--var', 'fail=True', '--trigger', '0'))
+
+    assert status == Ryven_Console.EXIT_UPDATES_FAILED
+
+
+def test_batch_reports_unknown_variables(runner, capsys):
+    status = Ryven_Console.run_batch(batch_args('--var', 'y=1', '--trigger', '0'))
+
+    assert status == Ryven_Console.EXIT_UPDATES_FAILED
+    assert 'there is no script variable \'y\'' in capsys.readouterr().err
+
+
+def test_batch_reports_loading_errors(runner, capsys):
+    status = Ryven_Console.run_batch(batch_args('--trigger', 'missing'))
+
+    assert status == Ryven_Console.EXIT_LOADING_FAILED
+    assert 'there is no node instance titled \'missing\'' in capsys.readouterr().err
@@ -0,0 +1,66 @@
+"""FlowExecutor.busy() tells whether a flow can be unloaded."""
+
+import asyncio
+import threading
+
+from custom_src import AsyncLoop
+from custom_src.NodeInstance import NodeInstance
+
+from test_data_flow import Source
+
+
+class Probe(NodeInstance):
+    """Records whether the executor was busy during its update."""
+
+    def set_data(self, data):
+        self.busy = []
+
+    def update_event(self, input_called=-1):
+        self.busy.append(self.flow.executor.busy())
+
+
+class Wait(NodeInstance):
+    """Async, waits for the event in its state data before setting its output."""
+
+    def set_data(self, data):
+        self.event = data
+
+    async def update_event(self, input_called=-1):
+        if self.event is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.event.wait, 10)
+        self.set_output_val(0, self.input(0))
+
+
+def test_flow_is_busy_during_updates(flow_builder):
+    builder = flow_builder()
+    source = builder.add(Source, outputs=['data'], state=1)
+    probe = builder.add(Probe, inputs=['data'])
+    builder.connect(source, 0, probe, 0)
+    flow = builder.build().flow
+    nis = flow.all_node_instances
+
+    nis[probe].busy.clear()
+    nis[source].send(2)
+
+    assert nis[probe].busy == [True]
+    assert not flow.executor.busy()
+
+
+def test_flow_is_busy_until_async_updates_finish(flow_builder):
+    builder = flow_builder()
+    source = builder.add(Source, outputs=['data'], state=1)
+    wait = builder.add(Wait, inputs=['data'], outputs=['data'])
+    builder.connect(source, 0, wait, 0)
+    flow = builder.build().flow
+    nis = flow.all_node_instances
+    assert AsyncLoop.get_async_loop().join(10)
+
+    event = threading.Event()
+    nis[wait].event = event
+    nis[source].send(3)
+    assert flow.executor.busy()
+
+    event.set()
+    assert AsyncLoop.get_async_loop().join(10)
+    assert not flow.executor.busy()
+    assert nis[wait].outputs[0].val == 3
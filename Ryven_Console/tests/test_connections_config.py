@@ -0,0 +1,44 @@
+from custom_src.ConnectionsConfig import connections_config_data
+
+from test_data_flow import Add, Source
+
+
+def chain(flow_builder):
+    """source -> first -> second, source -> second:1, first -> third"""
+
+    builder = flow_builder()
+    source = builder.add(Source, outputs=['data'], state=1)
+    first = builder.add(Add, inputs=['data'], outputs=['data'])
+    second = builder.add(Add, inputs=['data', 'data'], outputs=['data'])
+    third = builder.add(Add, inputs=['data'], outputs=['data'])
+    builder.connect(source, 0, first, 0)
+    builder.connect(source, 0, second, 1)
+    builder.connect(first, 0, second, 0)
+    builder.connect(first, 0, third, 0)
+    return builder.connections, builder.build().flow.all_node_instances
+
+
+def connection(ni, out_index, connected_ni, input_index):
+    return {'parent node instance index': ni, 'output port index': out_index, 'connected node instance': connected_ni,
+            'connected input port index': input_index}
+
+
+def test_saved_connections_match_the_loaded_ones(flow_builder):
+    connections, nis = chain(flow_builder)
+
+    assert connections_config_data(nis) == connections
+
+
+def test_connections_leaving_the_selection_have_no_target(flow_builder):
+    connections, (source, first, second, third) = chain(flow_builder)
+
+    assert connections_config_data([first, second]) == [connection(0, 0, 1, 0), connection(0, 0, None, None)]
+
+
+def test_only_connections_to_the_given_nis(flow_builder):
+    connections, nis = chain(flow_builder)
+    source, first, second, third = nis
+
+    assert connections_config_data(nis, only_with_connections_to=[third]) == [connection(1, 0, 3, 0)]
+    assert connections_config_data(nis, only_with_connections_to=[source]) == [connection(0, 0, 1, 0),
+                                                                               connection(0, 0, 2, 1)]
@@ -0,0 +1,101 @@
+import sys
+
+from custom_src.NodeInstance import NodeInstance
+
+
+class Source(NodeInstance):
+    def set_data(self, data):
+        self.value = data
+
+    def update_event(self, input_called=-1):
+        self.set_output_val(0, self.value)
+
+    def send(self, value):
+        self.value = value
+        self.set_output_val(0, value)
+
+
+class Add(NodeInstance):
+    """Adds its inputs and counts its updates."""
+
+    def set_data(self, data):
+        self.updates = 0
+
+    def update_event(self, input_called=-1):
+        self.updates += 1
+        self.set_output_val(0, sum(self.input(i) or 0 for i in range(len(self.inputs))))
+
+
+def test_diamond_join_updates_once(flow_builder):
+    builder = flow_builder()
+    source = builder.add(Source, outputs=['data'], state=1)
+    left = builder.add(Add, inputs=['data'], outputs=['data'])
+    right = builder.add(Add, inputs=['data'], outputs=['data'])
+    join = builder.add(Add, inputs=['data', 'data'], outputs=['data'])
+    builder.connect(source, 0, left, 0)
+    builder.connect(source, 0, right, 0)
+    builder.connect(left, 0, join, 0)
+    builder.connect(right, 0, join, 1)
+    nis = builder.build().flow.all_node_instances
+
+    nis[join].updates = 0
+    nis[source].send(5)
+
+    assert nis[join].updates == 1
+    assert nis[join].outputs[0].val == 10
+
+
+def test_join_sees_all_new_values_of_a_wave(flow_builder):
+    # the join lies behind a longer and a shorter path, it must only run once both have been updated
+    builder = flow_builder()
+    source = builder.add(Source, outputs=['data'], state=1)
+    long_path = [builder.add(Add, inputs=['data'], outputs=['data']) for i in range(3)]
+    join = builder.add(Add, inputs=['data', 'data'], outputs=['data'])
+    builder.connect(source, 0, long_path[0], 0)
+    builder.connect(long_path[0], 0, long_path[1], 0)
+    builder.connect(long_path[1], 0, long_path[2], 0)
+    builder.connect(long_path[2], 0, join, 0)
+    builder.connect(source, 0, join, 1)
+    nis = builder.build().flow.all_node_instances
+
+    nis[join].updates = 0
+    nis[source].send(2)
+
+    assert nis[join].updates == 1
+    assert nis[join].outputs[0].val == 4
+
+
+def test_long_chain_doesnt_recurse(flow_builder):
+    builder = flow_builder()
+    source = builder.add(Source, outputs=['data'], state=0)
+    previous = source
+    for i in range(2 * sys.getrecursionlimit()):
+        ni = builder.add(Add, inputs=['data'], outputs=['data'])
+        builder.connect(previous, 0, ni, 0)
+        previous = ni
+    nis = builder.build().flow.all_node_instances
+
+    nis[previous].updates = 0
+    nis[source].send(7)
+
+    assert nis[previous].outputs[0].val == 7
+    assert nis[previous].updates == 1
+
+
+def test_batched_outputs_cause_one_wave(flow_builder):
+    builder = flow_builder()
+    first = builder.add(Source, outputs=['data'], state=1)
+    second = builder.add(Source, outputs=['data'], state=1)
+    join = builder.add(Add, inputs=['data', 'data'], outputs=['data'])
+    builder.connect(first, 0, join, 0)
+    builder.connect(second, 0, join, 1)
+    flow = builder.build().flow
+    nis = flow.all_node_instances
+
+    nis[join].updates = 0
+    with flow.executor.output_batch():
+        nis[first].send(3)
+        nis[second].send(4)
+
+    assert nis[join].updates == 1
+    assert nis[join].outputs[0].val == 7
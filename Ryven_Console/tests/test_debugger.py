@@ -0,0 +1,43 @@
+import pytest
+
+from custom_src.global_tools.Debugger import Debugger
+
+
+class Recorder:
+    """Records whether it got converted to a string."""
+
+    def __init__(self):
+        self.converted = False
+
+    def __str__(self):
+        self.converted = True
+        return 'recorder'
+
+
+@pytest.fixture
+def debugger():
+    enabled = Debugger.enabled
+    yield Debugger
+    Debugger.enabled = enabled
+
+
+def test_disabled_debugger_doesnt_build_messages(debugger, capsys):
+    debugger.disable()
+    recorder = Recorder()
+
+    debugger.debug('value:', recorder)
+    debugger.debugerr('error:', recorder)
+
+    assert not recorder.converted
+    assert capsys.readouterr() == ('', '')
+
+
+def test_enabled_debugger_prints(debugger, capsys):
+    debugger.enable()
+
+    debugger.debug('value:', Recorder())
+    debugger.debugerr('error:', 1)
+
+    out, err = capsys.readouterr()
+    assert out == '--> DEBUG:  value: recorder\n'
+    assert err == ' error: 1'
@@ -0,0 +1,148 @@
+from custom_src.NodeInstance import NodeInstance
+
+
+class Loop(NodeInstance):
+    """Executes its body for every index, outputs: exec body, data index."""
+
+    def set_data(self, data):
+        self.iterations = data
+
+    def update_event(self, input_called=-1):
+        if input_called == 0:  # requests of the index only need its current value
+            for i in range(self.iterations):
+                self.set_output_val(1, i)
+                self.exec_output(0)
+
+
+class Double(NodeInstance):
+    """Passive, counts how often its output got computed."""
+
+    def set_data(self, data):
+        self.computations = 0
+
+    def update_event(self, input_called=-1):
+        self.computations += 1
+        self.set_output_val(0, 2 * (self.input(0) or 0))
+
+
+class Collect(NodeInstance):
+    """Active, stores the sum of its data inputs (all but the first, the exec input) whenever it's executed."""
+
+    def set_data(self, data):
+        self.values = []
+
+    def update_event(self, input_called=-1):
+        if input_called == 0:
+            self.values.append(sum(self.input(i) for i in range(1, len(self.inputs))))
+
+
+def loop_flow(flow_builder, iterations, double_class=Double, double_input=('data', 3), reads_index=False):
+    """loop -> collect, which reads the output of double twice (and the loop index if reads_index). If double_input is
+    None, double reads the loop index."""
+
+    builder = flow_builder('exec flow')
+    loop = builder.add(Loop, inputs=['exec'], outputs=['exec', 'data'], state=iterations)
+    double = builder.add(double_class, inputs=[double_input or 'data'], outputs=['data'])
+    collect = builder.add(Collect, inputs=['exec', 'data', 'data'] + (['data'] if reads_index else []))
+    builder.connect(loop, 0, collect, 0)
+    builder.connect(double, 0, collect, 1)
+    builder.connect(double, 0, collect, 2)
+    if double_input is None:
+        builder.connect(loop, 1, double, 0)
+    if reads_index:
+        builder.connect(loop, 1, collect, 3)
+    nis = builder.build().flow.all_node_instances
+
+    nis[double].computations = 0
+    nis[collect].values = []
+    return nis[loop], nis[double], nis[collect]
+
+
+def test_output_gets_computed_once_per_exec_wave(flow_builder):
+    loop, double, collect = loop_flow(flow_builder, 5, reads_index=True)
+
+    loop.update(0)
+
+    assert collect.values == [12 + i for i in range(5)]
+    assert double.computations == 1
+
+
+def test_next_exec_wave_computes_again(flow_builder):
+    loop, double, collect = loop_flow(flow_builder, 3)
+
+    loop.update(0)
+    loop.update(0)
+
+    assert double.computations == 2
+
+
+def test_changed_inputs_invalidate_the_output(flow_builder):
+    loop, double, collect = loop_flow(flow_builder, 4, double_input=None)
+
+    loop.update(0)
+
+    assert collect.values == [4 * i for i in range(4)]
+    assert double.computations == 4  # once per index, not once per read
+
+
+class Counter(Double):
+    memoize_outputs = False
+
+    def update_event(self, input_called=-1):
+        self.computations += 1
+        self.set_output_val(0, self.computations)
+
+
+def test_outputs_of_non_memoizing_nodes_get_computed_for_every_read(flow_builder):
+    loop, counter, collect = loop_flow(flow_builder, 2, double_class=Counter)
+
+    loop.update(0)
+
+    assert counter.computations == 4
+    assert collect.values == [1 + 2, 3 + 4]
+
+
+class Step(NodeInstance):
+    """Appends its name to the log (state data: (log, name)) and executes its exec outputs in order."""
+
+    def set_data(self, data):
+        self.log, self.name = data
+
+    def update_event(self, input_called=-1):
+        if input_called == 0:
+            self.log.append(self.name)
+            for i in range(len(self.outputs)):
+                self.exec_output(i)
+
+
+def test_long_exec_chain_runs_without_recursion(flow_builder):
+    log = []
+    builder = flow_builder('exec flow')
+    previous = builder.add(Step, inputs=['exec'], outputs=['exec'], state=(log, 0))
+    first = previous
+    for i in range(1, 20000):
+        ni = builder.add(Step, inputs=['exec'], outputs=['exec'], state=(log, i))
+        builder.connect(previous, 0, ni, 0)
+        previous = ni
+    nis = builder.build().flow.all_node_instances
+
+    nis[first].update(0)
+
+    assert log == list(range(20000))
+
+
+def test_exec_outputs_run_depth_first(flow_builder):
+    log = []
+    builder = flow_builder('exec flow')
+    root = builder.add(Step, inputs=['exec'], outputs=['exec', 'exec'], state=(log, 'root'))
+    a = builder.add(Step, inputs=['exec'], outputs=['exec'], state=(log, 'a'))
+    a_child = builder.add(Step, inputs=['exec'], outputs=[], state=(log, 'a child'))
+    b = builder.add(Step, inputs=['exec'], outputs=[], state=(log, 'b'))
+    builder.connect(root, 0, a, 0)
+    builder.connect(a, 0, a_child, 0)
+    builder.connect(root, 1, b, 0)
+    nis = builder.build().flow.all_node_instances
+
+    nis[root].update(0)
+
+    assert log == ['root', 'a', 'a child', 'b']
@@ -0,0 +1,66 @@
+from test_data_flow import Add, Source
+from test_exec_flow import Collect
+
+
+def diamond(flow_builder):
+    """source -> left, right -> join, returns the flow and the NIs"""
+
+    builder = flow_builder()
+    source = builder.add(Source, outputs=['data'], state=1)
+    left = builder.add(Add, inputs=['data'], outputs=['data'])
+    right = builder.add(Add, inputs=['data'], outputs=['data'])
+    join = builder.add(Add, inputs=['data', 'data'], outputs=['data'])
+    builder.connect(source, 0, left, 0)
+    builder.connect(source, 0, right, 0)
+    builder.connect(left, 0, join, 0)
+    builder.connect(right, 0, join, 1)
+    flow = builder.build().flow
+    return flow, flow.all_node_instances
+
+
+def test_downstream_order_is_topological_and_cached(flow_builder):
+    flow, (source, left, right, join) = diamond(flow_builder)
+    plan = flow.executor.get_plan()
+
+    order, positions = plan.downstream_order([source])
+
+    assert order[0] is source and order[-1] is join
+    assert set(order) == {source, left, right, join}
+    assert all(positions[order[i]] == i for i in range(len(order)))
+    assert plan.downstream_order([source]) == (order, positions)
+    assert plan.wave_predecessor_counts([source]) == {source: 0, left: 1, right: 1, join: 2}
+
+
+def test_plan_is_reused_until_the_graph_changes(flow_builder):
+    flow, (source, left, right, join) = diamond(flow_builder)
+    source.send(2)
+    plan = flow.executor.get_plan()
+
+    source.send(3)
+    assert flow.executor.get_plan() is plan
+
+    config = {'inputs': [{'type': 'data', 'label': '', 'has widget': False}],
+              'outputs': [{'type': 'data', 'label': ''}], 'state data': None}
+    extra = flow.create_node_instance(left.parent_node, config)
+    flow.connect_ports(join.outputs[0], extra.inputs[0])
+    assert flow.executor.get_plan() is not plan
+
+    source.send(4)
+    assert extra.outputs[0].val == 8
+
+
+def test_data_outputs_only_target_passive_nodes(flow_builder):
+    builder = flow_builder()
+    source = builder.add(Source, outputs=['data'], state=1)
+    passive = builder.add(Add, inputs=['data'], outputs=['data'])
+    active = builder.add(Collect, inputs=['exec', 'data'])
+    builder.connect(source, 0, passive, 0)
+    builder.connect(source, 0, active, 1)
+    flow = builder.build().flow
+    nis = flow.all_node_instances
+
+    plan = flow.executor.get_plan()
+
+    assert plan.output_targets(nis[source].outputs[0]) == [(nis[passive], 0)]
+    assert plan.data_consumers(nis[source]) == [nis[passive], nis[active]]
+    assert plan.is_active(nis[active]) and not plan.is_active(nis[passive])
@@ -0,0 +1,64 @@
+from custom_src.NodeInstance import NodeInstance
+
+from test_data_flow import Source
+
+
+class CountUp(NodeInstance):
+    """Inputs: start, the own output (feedback). Counts from start up to the limit in its state data by sending its
+    output back to itself, outputs nothing new once the limit is reached."""
+
+    def set_data(self, data):
+        self.limit = data
+        self.updates = 0
+
+    def update_event(self, input_called=-1):
+        self.updates += 1
+        if input_called == 0 or self.outputs[0].val is None:
+            self.set_output_val(0, self.input(0))
+        elif self.input(1) < self.limit:
+            self.set_output_val(0, self.input(1) + 1)
+
+
+def counter_flow(flow_builder, limit):
+    builder = flow_builder()
+    source = builder.add(Source, outputs=['data'], state=0)
+    counter = builder.add(CountUp, inputs=['data', 'data'], outputs=['data'], state=limit)
+    builder.connect(source, 0, counter, 0)
+    builder.connect(counter, 0, counter, 1)
+    flow = builder.build().flow
+    return flow, flow.all_node_instances[source], flow.all_node_instances[counter]
+
+
+def test_connection_closing_a_cycle_is_feedback(flow_builder):
+    builder = flow_builder()
+    a = builder.add(Source, inputs=['data'], outputs=['data'], state=0)
+    b = builder.add(Source, inputs=['data'], outputs=['data'], state=0)
+    c = builder.add(Source, inputs=['data'], outputs=['data'], state=0)
+    builder.connect(a, 0, b, 0)
+    builder.connect(b, 0, c, 0)
+    builder.connect(c, 0, a, 0)
+    nis = builder.build().flow.all_node_instances
+
+    assert [ni.inputs[0].feedback for ni in nis] == [True, False, False]
+
+
+def test_feedback_loop_runs_one_step_per_wave(flow_builder):
+    flow, source, counter = counter_flow(flow_builder, 10)
+
+    counter.updates = 0
+    source.send(3)
+
+    assert counter.outputs[0].val == 10
+    assert counter.updates == 1 + 7 + 1  # the new start, the steps up to the limit, the step that stops
+
+
+def test_endless_feedback_loop_gets_stopped(flow_builder):
+    flow, source, counter = counter_flow(flow_builder, float('inf'))
+    flow.executor.feedback_steps_limit = 50
+
+    counter.updates = 0
+    source.send(0)
+
+    assert counter.updates == 1 + 50
+    assert counter.outputs[0].val == 50
+    assert len(flow.executor.next_step) == 0
@@ -0,0 +1,49 @@
+import io
+import json
+from types import SimpleNamespace
+
+from conftest import FlowBuilder
+from custom_src.NodeInstance import NodeInstance
+from FlowMap import map_records
+from FlowRunner import FlowRunner
+
+
+class Sum(NodeInstance):
+    """Outputs the sum of its input and the variables a and b."""
+
+    def update_event(self, input_called=-1):
+        self.set_output_val(0, self.input(0) + self.get_var_val('a') + self.get_var_val('b'))
+
+
+def load_runner(args):
+    """Loads the script in a worker of the map mode."""
+
+    builder = FlowBuilder()
+    builder.add(Sum, inputs=[('data', 0)], outputs=['data'])
+    runner = FlowRunner(builder.build(variables={'a': 0, 'b': 0}))
+    return runner, {}, {}, [runner.find_node_instance(0)]
+
+
+def run_map(records):
+    records_file = io.StringIO(''.join(json.dumps(r)+'\n' for r in records))
+    results_file = io.StringIO()
+    succeeded = map_records(load_runner, SimpleNamespace(timeout=None), ['0:0'], records_file, results_file,
+                            workers=1)
+    return succeeded, [json.loads(line) for line in results_file.getvalue().splitlines()]
+
+
+def test_records_dont_see_the_changes_of_earlier_records(flow_builder):
+    # one worker processes all records on the same graph
+    succeeded, results = run_map([{'vars': {'a': 1}}, {'vars': {'b': 2}}, {'inputs': {'0:0': 4}}, {}])
+
+    assert succeeded
+    assert [r['outputs']['0:0'] for r in results] == [1, 2, 4, 0]
+    assert [r['index'] for r in results] == [0, 1, 2, 3]
+
+
+def test_invalid_records_get_reported(flow_builder):
+    succeeded, results = run_map([{'vars': {'unknown': 1}}, [1], {'vars': {'a': 3}}])
+
+    assert not succeeded
+    assert 'error' in results[0] and 'error' in results[1]
+    assert results[2]['outputs'] == {'0:0': 3}
@@ -0,0 +1,82 @@
+from http.client import HTTPConnection
+import json
+import threading
+
+import pytest
+
+from custom_src.NodeInstance import NodeInstance
+from FlowServer import FlowServer
+
+
+class AddVar(NodeInstance):
+    """Outputs its input plus the variable x, fails if the variable fail is set."""
+
+    def update_event(self, input_called=-1):
+        if self.get_var_val('fail'):
+            raise RuntimeError('failed on purpose')
+        self.set_output_val(0, self.input(0) + self.get_var_val('x'))
+
+
+@pytest.fixture
+def server(flow_builder):
+    builder = flow_builder()
+    builder.add(AddVar, inputs=[('data', 1)], outputs=['data'])
+    script = builder.build(variables={'x': 10, 'fail': False})
+    server = FlowServer(script, ('127.0.0.1', 0))
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.01})
+    thread.start()
+    yield server
+    server.shutdown()
+    thread.join()
+    server.server_close()
+
+
+def request(server, method, path, body=None):
+    """Returns (status, parsed response), body is sent as JSON if it isn't bytes."""
+
+    connection = HTTPConnection(*server.server_address, timeout=10)
+    try:
+        if body is not None and not isinstance(body, bytes):
+            body = json.dumps(body).encode('utf-8')
+        connection.request(method, path, body)
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def test_run(server):
+    status, result = request(server, 'POST', '/run', {'vars': {'x': 5}, 'inputs': {'0:0': 2}, 'triggers': [0],
+                                                      'outputs': ['node 0', '0:0', 0]})
+
+    assert status == 200
+    assert result == {'outputs': {'node 0': 7, '0:0': 7, '0': 7}, 'failed updates': []}
+    assert request(server, 'GET', '/vars') == (200, {'x': 5, 'fail': False})
+    assert request(server, 'GET', '/instances') == (200, [{'index': 0, 'title': 'node 0'}])
+
+
+@pytest.mark.parametrize('body', [
+    b'{"triggers": ', b'[1]', {'vars': 5}, {'inputs': []}, {'triggers': 5}, {'outputs': 'node 0'},
+    {'triggers': [None]}, {'triggers': [{}]}, {'triggers': [-1]}, {'triggers': [True]}, {'triggers': [1]},
+    {'triggers': ['unknown']}, {'outputs': [None]}, {'outputs': [{}]}, {'outputs': [False]}, {'outputs': ['0:3']},
+    {'vars': {'unknown': 1}},
+])
+def test_invalid_requests_get_rejected(server, body):
+    status, result = request(server, 'POST', '/run', body)
+
+    assert status == 400
+    assert 'error' in result
+
+
+def test_failed_updates_are_reported_per_run(server):
+    for i in range(2):
+        status, result = request(server, 'POST', '/run', {'vars': {'fail': True}, 'triggers': [0]})
+        assert status == 200
+        assert result['failed updates'] == ['node 0: RuntimeError(\'failed on purpose\')']
+
+    assert server.runner.flow.failed_updates == []
+
+
+def test_unknown_paths(server):
+    assert request(server, 'GET', '/run')[0] == 404
+    assert request(server, 'POST', '/vars', {})[0] == 404
@@ -0,0 +1,67 @@
+from custom_src import LoadTiming
+from custom_src.LoadTiming import add_import_time, import_times_report, load_phase, load_times_report
+from custom_src.Node import Node
+from custom_src.NodeInstance import NodeInstance
+from custom_src.Script import Script
+
+
+class First(NodeInstance):
+    pass
+
+
+class Second(NodeInstance):
+    pass
+
+
+def test_saved_node_instances_use_the_first_node_with_their_title():
+    nodes = []
+    for i in range(2):
+        node = Node()
+        node.package = 'tests'
+        node.title = 'twice'
+        nodes.append(node)
+    node_config = {'parent node package': 'tests', 'parent node title': 'twice', 'inputs': [], 'outputs': [],
+                   'state data': None}
+    config = {'name': 'test', 'variables': {}, 'flow': {'nodes': [node_config], 'connections': []}}
+
+    flow = Script(config, nodes, {nodes[0]: First, nodes[1]: Second}).flow
+
+    assert type(flow.all_node_instances[0]) is First
+    assert flow.nodes_index == {('tests', 'twice'): nodes[0]}
+
+
+def test_load_times_report_indents_nested_phases():
+    load_times_report()  # phases of other tests
+
+    with load_phase('project'):
+        with load_phase('script'):
+            pass
+        with load_phase('other script'):
+            pass
+
+    lines = load_times_report().splitlines()
+    assert [line.split(':')[0] for line in lines] == ['load times', 'project', '    script', '    other script']
+    assert load_times_report() == 'load times:'  # the report clears the phases
+
+
+def test_report_of_running_phases_doesnt_clear_them():
+    load_times_report()
+
+    with load_phase('project'):
+        with load_phase('script'):
+            pass
+        lines = load_times_report().splitlines()
+        assert len(lines) == 2 and lines[1].startswith('    script: ')  # the project phase isn't finished yet
+
+    assert [line.split(':')[0] for line in load_times_report().splitlines()] == ['load times', 'project', '    script']
+
+
+def test_import_times_are_summed_per_package(monkeypatch):
+    monkeypatch.setattr(LoadTiming, 'import_times', {})
+
+    add_import_time('small', 0.25)
+    add_import_time('large', 1.0)
+    add_import_time('small', 0.5)
+
+    assert import_times_report().splitlines() == ['import times of node classes by package:',
+                                                  '    large: 1.000s', '    small: 0.750s']
@@ -0,0 +1,119 @@
+import os
+import threading
+
+from custom_src import AsyncLoop
+from custom_src.NodeInstance import NodeInstance
+
+from test_data_flow import Source
+from test_exec_flow import Collect
+
+
+class Square(NodeInstance):
+    """Offloaded, squares its input and remembers the process it ran in."""
+
+    offload_update_event = True
+
+    def set_data(self, data):
+        self.pid = None
+
+    def update_event(self, input_called=-1):
+        self.pid = os.getpid()
+        self.set_output_val(0, (self.input(0) or 0) ** 2)
+
+
+class SquareVar(Square):
+    """Also reads a variable, which the worker process doesn't have."""
+
+    def update_event(self, input_called=-1):
+        self.pid = os.getpid()
+        self.set_output_val(0, (self.input(0) or 0) ** 2 + self.get_var_val('x'))
+
+
+def square_flow(flow_builder, mode='data flow', square_class=Square, variables=None):
+    builder = flow_builder(mode)
+    source = builder.add(Source, outputs=['data'], state=0)
+    square = builder.add(square_class, inputs=['data'], outputs=['data'])
+    builder.connect(source, 0, square, 0)
+    nis = builder.build(variables).flow.all_node_instances
+    AsyncLoop.get_async_loop().join(10)
+    return nis[source], nis[square]
+
+
+def test_update_runs_in_worker_process(flow_builder):
+    source, square = square_flow(flow_builder)
+
+    source.send(3)
+    assert AsyncLoop.get_async_loop().join(10)
+
+    assert square.outputs[0].val == 9
+    assert square.pid not in (None, os.getpid())
+
+
+def test_main_thread_doesnt_wait_for_the_worker(flow_builder):
+    source, square = square_flow(flow_builder)
+
+    with square.flow.executor.lock:  # the loop can't finish the update before the lock is released
+        source.send(4)
+        assert square.outputs[0].val == 0
+        assert square.flow.executor.busy()
+
+    assert AsyncLoop.get_async_loop().join(10)
+    assert square.outputs[0].val == 16
+
+
+def test_unpicklable_input_falls_back_in_process(flow_builder):
+    source, square = square_flow(flow_builder)
+
+    source.send(threading.Lock())  # can't be sent to the worker, and can't be squared either
+
+    assert square.pid == os.getpid()
+    assert square.flow.failed_updates[-1][0] is square
+
+
+def test_stand_in_refusal_falls_back_in_process(flow_builder):
+    source, square = square_flow(flow_builder, square_class=SquareVar, variables={'x': 1})
+
+    source.send(2)
+    assert AsyncLoop.get_async_loop().join(10)
+
+    assert square.outputs[0].val == 5
+    assert square.pid == os.getpid()
+
+
+def test_passive_updates_in_exec_flow_run_in_process(flow_builder):
+    # their outputs get pulled, so they are needed right away
+    builder = flow_builder('exec flow')
+    square = builder.add(Square, inputs=[('data', 5)], outputs=['data'])
+    collect = builder.add(Collect, inputs=['exec', 'data'])
+    builder.connect(square, 0, collect, 1)
+    nis = builder.build().flow.all_node_instances
+
+    nis[collect].update(0)
+
+    assert nis[collect].values == [25]
+    assert nis[square].pid == os.getpid()
+
+
+class ExecSquare(Square):
+    """Offloaded and active, outputs the square of its data input and executes its exec output."""
+
+    def update_event(self, input_called=-1):
+        if input_called == 0:
+            self.pid = os.getpid()
+            self.set_output_val(1, self.input(1) ** 2)
+            self.exec_output(0)
+
+
+def test_exec_triggered_updates_run_in_worker_process(flow_builder):
+    builder = flow_builder('exec flow')
+    square = builder.add(ExecSquare, inputs=['exec', ('data', 6)], outputs=['exec', 'data'])
+    collect = builder.add(Collect, inputs=['exec', 'data'])
+    builder.connect(square, 0, collect, 0)
+    builder.connect(square, 1, collect, 1)
+    nis = builder.build().flow.all_node_instances
+
+    nis[square].update(0)
+    assert AsyncLoop.get_async_loop().join(10)
+
+    assert nis[collect].values == [36]
+    assert nis[square].pid not in (None, os.getpid())
@@ -0,0 +1,101 @@
+"""Runs the Observation node of the OpenWeatherMap package in an exec flow, with a stand-in for the pyowm weather
+manager which requests the weather from a local HTTP server."""
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import importlib.util
+import json
+import os
+import threading
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+from urllib.request import urlopen
+
+import pytest
+
+from conftest import CONSOLE_DIR
+from custom_src.NodeInstance import NodeInstance
+
+OBSERVATION_FILE = os.path.join(os.path.dirname(CONSOLE_DIR), 'packages', 'OpenWeatherMap', 'nodes',
+                                'OpenWeatherMap___Observation0', 'OpenWeatherMap___Observation0.py')
+
+
+def load_observation_class():
+    spec = importlib.util.spec_from_file_location('OpenWeatherMap___Observation0', OBSERVATION_FILE)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.Observation_NodeInstance
+
+
+class WeatherHandler(BaseHTTPRequestHandler):
+    """Answers /weather?q=<place> with the place and the number of the request."""
+
+    def do_GET(self):
+        self.server.requests += 1
+        place = parse_qs(urlparse(self.path).query)['q'][0]
+        body = json.dumps({'place': place, 'request': self.server.requests}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class WeatherManager:
+    """Stand-in for pyowm's weather manager."""
+
+    def __init__(self, server):
+        self.url = 'http://%s:%d/weather?q=' % server.server_address
+
+    def weather_at_place(self, place):
+        with urlopen(self.url+place, timeout=10) as response:
+            return SimpleNamespace(weather=json.loads(response.read()))
+
+
+class Source(NodeInstance):
+    def set_data(self, data):
+        self.value = data
+
+    def update_event(self, input_called=-1):
+        self.set_output_val(0, self.value)
+
+
+class Collect(NodeInstance):
+    def set_data(self, data):
+        self.values = []
+
+    def update_event(self, input_called=-1):
+        if input_called == 0:
+            self.values.append(self.input(1))
+
+
+@pytest.fixture
+def weather_server():
+    server = HTTPServer(('127.0.0.1', 0), WeatherHandler)
+    server.requests = 0
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.01})
+    thread.start()
+    yield server
+    server.shutdown()
+    thread.join()
+    server.server_close()
+
+
+@pytest.mark.parametrize('country, place', [('', 'Berlin'), ('DE', 'Berlin,DE')])
+def test_observation_in_exec_flow(flow_builder, weather_server, country, place):
+    builder = flow_builder('exec flow')
+    manager = builder.add(Source, outputs=['data'], state=WeatherManager(weather_server))
+    observation = builder.add(load_observation_class(), inputs=['data', ('data', 'Berlin'), ('data', country)],
+                              outputs=['data'])
+    collect = builder.add(Collect, inputs=['exec', 'data'])
+    builder.connect(manager, 0, observation, 0)
+    builder.connect(observation, 0, collect, 1)
+    nis = builder.build().flow.all_node_instances
+
+    nis[collect].update(0)
+    nis[collect].update(0)
+
+    # the weather is requested while it's pulled, every exec wave gets the answer of a request of its own
+    assert nis[collect].values == [{'place': place, 'request': weather_server.requests-1},
+                                   {'place': place, 'request': weather_server.requests}]
@@ -0,0 +1,74 @@
+from custom_src.NodeInstance import NodeInstance
+
+from test_data_flow import Add, Source
+from test_exec_flow import Collect, Double
+
+
+class Split(NodeInstance):
+    """Sets both of its outputs to its input in one update."""
+
+    def update_event(self, input_called=-1):
+        self.set_output_val(0, self.input(0))
+        self.set_output_val(1, self.input(0))
+
+
+class Emit(NodeInstance):
+    """Active, sets its data output to its state data and executes its exec output."""
+
+    def set_data(self, data):
+        self.value = data
+
+    def update_event(self, input_called=-1):
+        if input_called == 0:
+            self.set_output_val(1, self.value)
+            self.exec_output(0)
+
+
+def test_outputs_of_one_update_cause_one_update_of_their_consumers(flow_builder):
+    builder = flow_builder()
+    source = builder.add(Source, outputs=['data'], state=1)
+    split = builder.add(Split, inputs=['data'], outputs=['data', 'data'])
+    join = builder.add(Add, inputs=['data', 'data'], outputs=['data'])
+    builder.connect(source, 0, split, 0)
+    builder.connect(split, 0, join, 0)
+    builder.connect(split, 1, join, 1)
+    nis = builder.build().flow.all_node_instances
+
+    nis[join].updates = 0
+    nis[source].send(3)
+
+    assert nis[join].updates == 1
+    assert nis[join].outputs[0].val == 6
+
+
+def test_data_arrives_before_the_exec_signal(flow_builder):
+    builder = flow_builder()
+    emit = builder.add(Emit, inputs=['exec'], outputs=['exec', 'data'], state=5)
+    double = builder.add(Double, inputs=['data'], outputs=['data'])
+    collect = builder.add(Collect, inputs=['exec', 'data'])
+    builder.connect(emit, 0, collect, 0)
+    builder.connect(emit, 1, double, 0)
+    builder.connect(double, 0, collect, 1)
+    nis = builder.build().flow.all_node_instances
+
+    nis[emit].update(0)
+
+    assert nis[collect].values == [10]
+
+
+def test_batch_outputs_outside_of_updates(flow_builder):
+    builder = flow_builder()
+    source = builder.add(Source, outputs=['data', 'data'], state=1)
+    join = builder.add(Add, inputs=['data', 'data'], outputs=['data'])
+    builder.connect(source, 0, join, 0)
+    builder.connect(source, 1, join, 1)
+    nis = builder.build().flow.all_node_instances
+
+    nis[join].updates = 0
+    with nis[source].batch_outputs():
+        nis[source].set_output_val(0, 2)
+        nis[source].set_output_val(1, 4)
+        assert nis[join].updates == 0
+
+    assert nis[join].updates == 1
+    assert nis[join].outputs[0].val == 6
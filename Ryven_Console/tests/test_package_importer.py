@@ -0,0 +1,61 @@
+import importlib
+import sys
+
+import pytest
+
+from custom_src.PackageImporter import import_package_module, install_finder, package_module_finder
+
+
+@pytest.fixture
+def finder():
+    """Restores the finder's registrations, sys.meta_path and sys.modules after the test."""
+
+    module_files = dict(package_module_finder.module_files)
+    meta_path = list(sys.meta_path)
+    modules = set(sys.modules)
+    yield package_module_finder
+    package_module_finder.module_files = module_files
+    sys.meta_path[:] = meta_path
+    for name in set(sys.modules) - modules:
+        del sys.modules[name]
+
+
+def write_module(directory, name, code):
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / (name+'.py')).write_text(code)
+    return str(directory)
+
+
+def test_package_modules_get_imported_without_sys_path(tmp_path, finder):
+    path = list(sys.path)
+    helper_dir = write_module(tmp_path / 'helper', 'pkg___helper', 'value = 2\n')
+    node_dir = write_module(tmp_path / 'node', 'pkg___Node0', 'import pkg___helper\nvalue = pkg___helper.value * 3\n')
+    finder.register('pkg___helper', helper_dir+'/pkg___helper.py')
+
+    module = import_package_module(node_dir, 'pkg___Node0')
+
+    assert module.__name__ == 'pkg___Node0' and module.value == 6
+    assert sys.modules['pkg___Node0'] is module
+    assert sys.path == path
+    assert sys.meta_path[0] is finder
+
+
+def test_missing_package_module_raises(tmp_path, finder):
+    with pytest.raises(ModuleNotFoundError):
+        import_package_module(str(tmp_path), 'pkg___Missing0')
+
+
+def test_unregistered_modules_are_left_to_the_other_finders(finder):
+    install_finder()
+
+    assert finder.find_spec('json') is None
+
+
+def test_registrations_passed_to_install_finder(tmp_path, finder):
+    """like in a worker process, which gets the registrations of the parent"""
+
+    node_dir = write_module(tmp_path, 'pkg___Node1', 'value = 1\n')
+
+    install_finder({'pkg___Node1': node_dir+'/pkg___Node1.py'})
+
+    assert importlib.import_module('pkg___Node1').value == 1
@@ -0,0 +1,92 @@
+import importlib.util
+import json
+import os
+
+import pytest
+
+from conftest import CONSOLE_DIR
+
+spec = importlib.util.spec_from_file_location(
+    'Ryven_PackageTranslator', os.path.join(os.path.dirname(CONSOLE_DIR), 'Ryven_PackageTranslator',
+                                            'Ryven_PackageTranslator.py'))
+Ryven_PackageTranslator = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(Ryven_PackageTranslator)
+PackageTranslator = Ryven_PackageTranslator.PackageTranslator
+
+MODULE = 'nodes/pkg___Node0/pkg___Node0.py'
+METACODE = 'nodes/pkg___Node0/pkg___Node0___METACODE.py'
+
+
+@pytest.fixture
+def package(tmp_path):
+    """A package with one node, returns its directory."""
+
+    package_dir = tmp_path / 'pkg'
+    (package_dir / 'nodes' / 'pkg___Node0').mkdir(parents=True)
+    node = {'module name': 'pkg___Node0', 'class name': 'Node', 'has main widget': False, 'custom input widgets': []}
+    (package_dir / 'pkg.rpc').write_text(json.dumps({'nodes': [node]}))
+    (package_dir / METACODE).write_text('class %CLASS%:  # %NODE_TITLE% of %PACKAGE_NAME%\n    pass\n')
+    return package_dir
+
+
+@pytest.fixture
+def translations(monkeypatch):
+    """Counts the translations."""
+
+    translate = PackageTranslator.translate
+    count = [0]
+
+    def counting_translate(self):
+        count[0] += 1
+        translate(self)
+
+    monkeypatch.setattr(PackageTranslator, 'translate', counting_translate)
+    return count
+
+
+def test_translation_creates_the_modules(package, translations):
+    PackageTranslator(str(package))
+
+    assert (package / MODULE).read_text() == 'class Node_NodeInstance:  # Node of pkg\n    pass\n'
+    manifest = json.loads((package / PackageTranslator.manifest_file_name).read_text())
+    assert sorted(manifest['files']) == sorted(['pkg.rpc', METACODE, MODULE])
+
+
+def test_unchanged_package_is_skipped(package, translations):
+    PackageTranslator(str(package))
+    PackageTranslator(str(package))
+
+    assert translations[0] == 1
+
+
+def test_changed_metacode_gets_translated(package, translations):
+    PackageTranslator(str(package))
+    (package / METACODE).write_text('class %CLASS%:\n    changed = True\n')
+    PackageTranslator(str(package))
+
+    assert translations[0] == 2
+    assert (package / MODULE).read_text() == 'class Node_NodeInstance:\n    changed = True\n'
+
+
+def test_modules_with_the_same_code_are_not_written(package, translations):
+    PackageTranslator(str(package))
+    module_stat = os.stat(package / MODULE)
+    rpc_stat = os.stat(package / 'pkg.rpc')
+    os.utime(package / 'pkg.rpc', ns=(rpc_stat.st_atime_ns, rpc_stat.st_mtime_ns + 10 ** 9))  # touched
+    PackageTranslator(str(package))
+
+    assert translations[0] == 2
+    assert os.stat(package / MODULE).st_mtime_ns == module_stat.st_mtime_ns
+
+
+@pytest.mark.parametrize('damage', ['remove module', 'invalid manifest'])
+def test_missing_module_or_invalid_manifest_cause_a_translation(package, translations, damage):
+    PackageTranslator(str(package))
+    if damage == 'remove module':
+        os.remove(package / MODULE)
+    else:
+        (package / PackageTranslator.manifest_file_name).write_text('[')
+    PackageTranslator(str(package))
+
+    assert translations[0] == 2
+    assert (package / MODULE).exists()
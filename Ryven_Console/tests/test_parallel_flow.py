@@ -0,0 +1,79 @@
+import threading
+import time
+
+from custom_src.NodeInstance import NodeInstance
+
+from test_data_flow import Add, Source
+
+
+SLEEP = 0.1  # seconds every branch takes
+
+
+class Widget:
+    """Stands in for a Qt widget, records the threads it gets used from."""
+
+    def __init__(self):
+        self.threads = set()
+
+    def get_val(self):
+        self.threads.add(threading.current_thread())
+        return 1
+
+
+class SlowAdd(Add):
+    """Adds its inputs after a short sleep, reads its widget and records the thread it got updated in."""
+
+    def set_data(self, data):
+        super().set_data(data)
+        self.widget = Widget()
+        self.threads = set()
+
+    def update_event(self, input_called=-1):
+        self.threads.add(threading.current_thread())
+        time.sleep(SLEEP)
+        widget_val = self.flow.executor.call_in_main_thread(self.widget.get_val)
+        if self.main_widget is not None:
+            self.main_widget.get_val()
+        self.updates += 1
+        self.set_output_val(0, sum(self.input(i) or 0 for i in range(len(self.inputs))) + widget_val)
+
+
+def diamond(flow_builder, branches):
+    builder = flow_builder(parallel=True)
+    source = builder.add(Source, outputs=['data'], state=1)
+    branch_nis = [builder.add(SlowAdd, inputs=['data'], outputs=['data']) for i in range(branches)]
+    join = builder.add(Add, inputs=['data'] * branches, outputs=['data'])
+    for i in range(branches):
+        builder.connect(source, 0, branch_nis[i], 0)
+        builder.connect(branch_nis[i], 0, join, i)
+    nis = builder.build().flow.all_node_instances
+    return nis[source], [nis[i] for i in branch_nis], nis[join]
+
+
+def test_parallel_wave_updates_every_ni_once(flow_builder):
+    source, branches, join = diamond(flow_builder, 4)
+    for ni in branches + [join]:
+        ni.updates = 0
+
+    t0 = time.perf_counter()
+    source.send(5)
+    seconds = time.perf_counter() - t0
+
+    assert [ni.updates for ni in branches] == [1] * 4
+    assert join.updates == 1
+    assert join.outputs[0].val == 4 * (5 + 1)
+    assert seconds < 3 * SLEEP  # the branches slept at the same time
+
+
+def test_workers_use_widgets_through_the_main_thread(flow_builder):
+    source, branches, join = diamond(flow_builder, 2)
+    widget = Widget()
+    branches[0].main_widget = widget
+    for ni in branches:
+        ni.threads.clear()
+        ni.widget.threads.clear()
+
+    source.send(2)
+
+    assert threading.main_thread() not in branches[0].threads | branches[1].threads
+    assert branches[0].widget.threads | branches[1].widget.threads | widget.threads == {threading.main_thread()}
@@ -0,0 +1,109 @@
+import glob
+import json
+import os
+import stat
+
+import pytest
+
+from custom_src import ProjectFile
+from custom_src.ProjectFile import StreamedDict, StreamedList, read_project, write_project
+
+
+SAVES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'saves')
+
+
+def project_data():
+    """Project data with streamed parts, and the plain data it has to be read back as."""
+
+    nodes = [{'title': 'node %d' % i, 'state data': {'text': 'a "quoted"\nline ' * i, 'value': i * 1.5, 'none': None},
+              'inputs': [[i, -i, 10 ** 20], [], {}]} for i in range(50)]
+    flow = {'nodes': nodes, 'connections': [[i, 0, i + 1, 0] for i in range(49)], 'drawings': []}
+    expected = {'general info': {'type': 'Ryven project file', 'unicode': 'äöü ∑ 😀'},
+                'scripts': [{'name': 'script', 'variables': {'v': 12345678901234567890}, 'flow': flow}],
+                'empty': {}, 'flag': True}
+
+    streamed = dict(expected)
+    streamed['scripts'] = StreamedList(
+        {'name': s['name'], 'variables': s['variables'],
+         'flow': StreamedDict([('nodes', StreamedList(n for n in s['flow']['nodes'])),
+                               ('connections', StreamedList(iter(s['flow']['connections']))),
+                               ('drawings', StreamedList([]))])}
+        for s in expected['scripts'])
+    return streamed, expected
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 7, 1 << 16])
+def test_round_trip(tmp_path, monkeypatch, chunk_size):
+    monkeypatch.setattr(ProjectFile, 'CHUNK_SIZE', chunk_size)
+    streamed, expected = project_data()
+    file_name = str(tmp_path / 'project.rpo')
+
+    write_project(file_name, streamed)
+
+    with open(file_name) as f:
+        assert json.load(f) == expected
+    assert read_project(file_name) == expected
+
+
+@pytest.mark.parametrize('file_name', sorted(glob.glob(os.path.join(SAVES_DIR, '*.rpo'))))
+def test_reader_reads_the_bundled_projects_like_json(monkeypatch, file_name):
+    monkeypatch.setattr(ProjectFile, 'CHUNK_SIZE', 1000)
+
+    with open(file_name) as f:
+        assert read_project(file_name) == json.load(f, strict=False)
+
+
+@pytest.mark.parametrize('content', ['', '{"scripts": [1, 2', '{"a": 1} {}', '{1: 2}', '[1 2]'])
+def test_reader_rejects_invalid_json(tmp_path, content):
+    file_name = tmp_path / 'project.rpo'
+    file_name.write_text(content)
+
+    with pytest.raises(ValueError):
+        read_project(str(file_name))
+
+
+def test_failed_write_keeps_the_old_file(tmp_path):
+    file_name = tmp_path / 'project.rpo'
+    file_name.write_text('{"old": true}')
+
+    def failing_nodes():
+        yield {}
+        raise RuntimeError('config data failed')
+
+    with pytest.raises(RuntimeError):
+        write_project(str(file_name), {'scripts': StreamedList(failing_nodes())})
+
+    assert file_name.read_text() == '{"old": true}'
+    assert os.listdir(str(tmp_path)) == ['project.rpo']
+
+
+def test_new_file_gets_the_default_permissions(tmp_path):
+    file_name = str(tmp_path / 'project.rpo')
+    umask = os.umask(0o022)
+    try:
+        write_project(file_name, {})
+    finally:
+        os.umask(umask)
+
+    assert stat.S_IMODE(os.stat(file_name).st_mode) == 0o644
+
+
+def test_existing_file_keeps_its_permissions(tmp_path):
+    file_name = str(tmp_path / 'project.rpo')
+    write_project(file_name, {})
+    os.chmod(file_name, 0o640)
+
+    write_project(file_name, {'saved': 'again'})
+
+    assert stat.S_IMODE(os.stat(file_name).st_mode) == 0o640
+    assert read_project(file_name) == {'saved': 'again'}
+
+
+def test_external_variables_get_the_project_dir(tmp_path):
+    file_name = str(tmp_path / 'project.rpo')
+    write_project(file_name, {'scripts': [{'variables': {'big': {'external': {'file': 'big.npy'}}, 'small': 1}}]})
+
+    variables = read_project(file_name)['scripts'][0]['variables']
+
+    assert variables['big']['external'] == {'file': 'big.npy', 'project dir': str(tmp_path)}
+    assert variables['small'] == 1
@@ -0,0 +1,79 @@
+import importlib.util
+import json
+import os
+import threading
+
+import pytest
+
+from conftest import CONSOLE_DIR
+from custom_src import LoadTiming
+from custom_src.LoadTiming import load_phase, trace_data, trace_phase, write_trace
+
+spec = importlib.util.spec_from_file_location(
+    'cold_start', os.path.join(os.path.dirname(CONSOLE_DIR), 'benchmarks', 'cold_start.py'))
+cold_start = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(cold_start)
+
+
+@pytest.fixture
+def trace(tmp_path, monkeypatch):
+    """Enables the trace with a new timeline, returns the trace file."""
+
+    trace_file = str(tmp_path / 'trace.json')
+    monkeypatch.setattr(LoadTiming, 'trace_events', [])
+    monkeypatch.setattr(LoadTiming, 'trace_file', None)
+    LoadTiming.enable_trace(trace_file)
+    return trace_file
+
+
+def test_phases_of_all_threads_get_traced(trace):
+    def worker():
+        with trace_phase('translation'):
+            pass
+
+    with load_phase('project'):
+        with load_phase('script'):
+            thread = threading.Thread(target=worker)
+            thread.start()
+            thread.join()
+
+    events = trace_data()['traceEvents']
+    assert sorted((e['name'], e['tid']) for e in events if e['ph'] == 'X') == \
+           [('project', 0), ('script', 0), ('translation', 1)]
+    assert {e['tid']: e['args']['name'] for e in events if e['ph'] == 'M'} == {0: 'main thread', 1: 'worker thread 1'}
+    project, script = [next(e for e in events if e['name'] == name) for name in ('project', 'script')]
+    assert project['ts'] <= script['ts'] and script['ts'] + script['dur'] <= project['ts'] + project['dur']
+
+
+def test_write_trace(trace):
+    with load_phase('project'):
+        pass
+
+    write_trace()
+
+    with open(trace) as f:
+        data = json.load(f)
+    assert [e['name'] for e in data['traceEvents'] if e['ph'] == 'X'] == ['project']
+
+
+def test_nothing_gets_traced_without_a_trace_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(LoadTiming, 'trace_events', [])
+    monkeypatch.setattr(LoadTiming, 'trace_file', None)
+
+    with load_phase('project'):
+        with trace_phase('translation'):
+            pass
+    write_trace()
+
+    assert LoadTiming.trace_events == [] and os.listdir(tmp_path) == []
+
+
+def test_top_level_phases_of_the_benchmark():
+    events = [{'name': 'thread_name', 'ph': 'M', 'tid': 0},
+              {'name': 'packages', 'ph': 'X', 'tid': 0, 'ts': 0, 'dur': 2e6},
+              {'name': 'package a', 'ph': 'X', 'tid': 0, 'ts': 0, 'dur': 1e6},
+              {'name': 'translation', 'ph': 'X', 'tid': 1, 'ts': 2.5e6, 'dur': 3e6},
+              {'name': 'script', 'ph': 'X', 'tid': 0, 'ts': 3e6, 'dur': 1e6},
+              {'name': 'script', 'ph': 'X', 'tid': 0, 'ts': 5e6, 'dur': 0.5e6}]
+
+    assert cold_start.top_level_phases({'traceEvents': events}) == {'packages': 2, 'script': 1.5}
@@ -0,0 +1,105 @@
+"""Saving variables like Ryven does (Variable.config_data() with a VariableStorage) and loading the project in the
+console."""
+
+import os
+import pickle
+
+import pytest
+
+from custom_src.ProjectFile import read_project, write_project
+from custom_src.Script import Script
+from Variable import EXTERNAL_STORAGE_THRESHOLD, Variable, VariableStorage
+
+
+class Blob:
+    """Pickles its data out-of-band with protocol 5, like NumPy arrays do."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def __reduce_ex__(self, protocol):
+        if protocol >= 5:
+            return Blob, (pickle.PickleBuffer(self.data),)
+        return Blob, (bytes(self.data),)
+
+
+def save_and_load(project_file, values: dict):
+    """Saves the values as variables of a script like Ryven and returns the variables of the script the console
+    loads."""
+
+    storage = VariableStorage(project_file)
+    variables = {name: Variable(name, None) for name in values}
+    for name, val in values.items():
+        variables[name].val = val
+    config = {'name': 'test', 'variables': {v.name: v.config_data(storage) for v in variables.values()},
+              'flow': {'nodes': [], 'connections': []}}
+    write_project(project_file, {'scripts': [config]})
+    storage.commit()
+
+    script = Script(read_project(project_file)['scripts'][0], [], {})
+    return {v.name: v.val for v in script.variables_handler.variables}
+
+
+def test_large_values_are_stored_next_to_the_project(tmp_path):
+    project_file = str(tmp_path / 'project.rpo')
+    large = bytes(range(256)) * (EXTERNAL_STORAGE_THRESHOLD // 256)
+
+    loaded = save_and_load(project_file, {'large': large, 'small': [1, 'a']})
+
+    assert loaded == {'large': large, 'small': [1, 'a']}
+    scripts = read_project(project_file)['scripts']
+    assert 'external' in scripts[0]['variables']['large'] and 'serialized' in scripts[0]['variables']['small']
+    assert len(os.listdir(tmp_path / 'project.rpo.data')) == 1
+
+
+def test_out_of_band_buffers_get_mapped(tmp_path):
+    project_file = str(tmp_path / 'project.rpo')
+    data = bytearray(os.urandom(EXTERNAL_STORAGE_THRESHOLD))
+
+    loaded = save_and_load(project_file, {'blob': Blob(data)})['blob']
+
+    assert bytes(loaded.data) == data
+    save_dir = os.listdir(tmp_path / 'project.rpo.data')[0]
+    assert sorted(os.listdir(tmp_path / 'project.rpo.data' / save_dir)) == ['var0.buf0', 'var0.pkl']
+
+
+def test_numpy_arrays_are_stored_as_npy(tmp_path):
+    numpy = pytest.importorskip('numpy')
+    project_file = str(tmp_path / 'project.rpo')
+    array = numpy.arange(EXTERNAL_STORAGE_THRESHOLD // 8, dtype=numpy.float64)
+
+    loaded = save_and_load(project_file, {'array': array})['array']
+
+    assert isinstance(loaded, numpy.memmap)
+    assert numpy.array_equal(loaded, array)
+    loaded[0] = -1  # copy-on-write, the file doesn't change
+    assert save_and_load(project_file, {'array': array})['array'][0] == 0
+
+
+def test_commit_removes_earlier_saves_and_discard_the_new_one(tmp_path):
+    project_file = str(tmp_path / 'project.rpo')
+    large = b'x' * EXTERNAL_STORAGE_THRESHOLD
+    data_dir = tmp_path / 'project.rpo.data'
+
+    first = VariableStorage(project_file)
+    first.store(large)
+    first.commit()
+    second = VariableStorage(project_file)
+    second.store(large)
+    assert len(os.listdir(data_dir)) == 2
+
+    second.commit()
+    assert os.listdir(data_dir) == [second.save_dir_name]
+
+    third = VariableStorage(project_file)
+    third.store(large)
+    third.discard()
+    assert os.listdir(data_dir) == [second.save_dir_name]
+
+
+def test_small_values_stay_in_the_project_file(tmp_path):
+    storage = VariableStorage(str(tmp_path / 'project.rpo'))
+
+    assert storage.store(b'x' * (EXTERNAL_STORAGE_THRESHOLD - 100)) is None
+    assert storage.store(lambda: None) is None  # can't be pickled, serialize() reports it
+    assert not os.path.exists(tmp_path / 'project.rpo.data')
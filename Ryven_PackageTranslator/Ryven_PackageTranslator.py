@@ -3,66 +3,102 @@ import os
 
 
 class PackageTranslator:
-    """The PackageTranslator creates working modules out of the metacode files."""
+    """The PackageTranslator creates working modules out of the metacode files.
+
+    The translation only depends on the package file (.rpc) and the metacode files, so it gets skipped if none of them
+    and none of the created modules changed since the last translation. This is checked with the modification times
+    and sizes stored in a manifest file in the package's directory. Modules whose code didn't change are not written
+    again, so their cached bytecode (__pycache__) stays valid."""
+
+    manifest_file_name = '.translation_manifest.json'
+    manifest_version = 1
 
     def __init__(self, package_dir):
         self.module_name_separator = '___'
 
+        self.package_dir = package_dir
         self.package_name = os.path.basename(package_dir)
+        self.files = []  # paths of all files the translation reads or writes, relative to the package dir
+
+        if self.up_to_date():
+            return
+
+        self.translate()
+        self.save_manifest()
+
+    def translate(self):
+        package_dir = self.package_dir
 
         f = open(package_dir+'/'+self.package_name+'.rpc', 'r')
         package_config = json.loads(f.read())
         f.close()
+        self.files.append(self.package_name+'.rpc')
 
 
         # translate nodes
         for n in package_config['nodes']:
+            node_dir = 'nodes/'+n['module name']+'/'
 
             # SRC CODE
-            f = open(package_dir+'/nodes/'+n['module name']+'/'+n['module name']+self.module_name_separator+'METACODE.py', 'r')
-            code = f.read()
-            f.close()
+            code = self.load(node_dir+n['module name']+self.module_name_separator+'METACODE.py')
             src_code_target_filename = n['module name']+'.py'
 
             code = code.replace('%NODE_TITLE%', n['class name'])
             code = code.replace('%CLASS%', n['class name']+'_NodeInstance')
             code = code.replace('%PACKAGE_NAME%', self.package_name)
 
-            self.save(package_dir+'/nodes/'+n['module name']+'/'+src_code_target_filename, code)
+            self.save(node_dir+src_code_target_filename, code)
 
 
             # MAIN WIDGET
             if n['has main widget']:
-                f = open(package_dir + '/nodes/' + n['module name'] + '/widgets/' + n['module name'] +
-                         self.module_name_separator + 'main_widget' +
-                         self.module_name_separator + 'METACODE.py', 'r')
-                code = f.read()
-                f.close()
+                code = self.load(node_dir+'widgets/'+n['module name'] +
+                                 self.module_name_separator + 'main_widget' +
+                                 self.module_name_separator + 'METACODE.py')
                 main_widget_target_filename = n['module name'] + self.module_name_separator + 'main_widget.py'
 
                 code = code.replace('%NODE_TITLE%', n['class name'])
                 code = code.replace('%CLASS%', n['class name']+'_NodeInstance_MainWidget')
 
-                self.save(package_dir + '/nodes/' + n['module name'] + '/widgets/' + main_widget_target_filename, code)
+                self.save(node_dir+'widgets/'+main_widget_target_filename, code)
 
 
             # INPUT WIDGETS
             for i_w in n['custom input widgets']:
-                f = open(package_dir + '/nodes/' + n['module name'] + '/widgets/' + n['module name'] +
-                         self.module_name_separator + i_w +
-                         self.module_name_separator + 'METACODE.py', 'r')
-                code = f.read()
-                f.close()
+                code = self.load(node_dir+'widgets/'+n['module name'] +
+                                 self.module_name_separator + i_w +
+                                 self.module_name_separator + 'METACODE.py')
                 input_widget_target_filename = n['module name'] + self.module_name_separator + i_w + '.py'
 
                 code = code.replace('%INPUT_WIDGET_TITLE%', i_w)  # i_w is already class name legal
                 code = code.replace('%CLASS%', i_w+'_PortInstanceWidget')
 
-                self.save(package_dir + '/nodes/' + n['module name'] + '/widgets/' + input_widget_target_filename, code)
+                self.save(node_dir+'widgets/'+input_widget_target_filename, code)
 
 
-    def save(self, target_file_path, code):
-        """Saves the working Python module"""
+    def load(self, file_path):
+        """Reads a metacode file, file_path is relative to the package dir"""
+
+        f = open(self.package_dir+'/'+file_path, 'r')
+        code = f.read()
+        f.close()
+        self.files.append(file_path)
+        return code
+
+    def save(self, file_path, code):
+        """Saves the working Python module if its code changed, file_path is relative to the package dir"""
+
+        self.files.append(file_path)
+        target_file_path = self.package_dir+'/'+file_path
+
+        try:
+            f = open(target_file_path, 'r')
+            old_code = f.read()
+            f.close()
+            if old_code == code:
+                return
+        except (OSError, UnicodeDecodeError):
+            pass
 
         try:
             os.remove(target_file_path)
@@ -72,3 +108,36 @@ class PackageTranslator:
         f = open(target_file_path, 'w')
         f.write(code)
         f.close()
+
+
+    # MANIFEST
+    def file_stats(self, file_path):
+        stat = os.stat(self.package_dir+'/'+file_path)
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def up_to_date(self) -> bool:
+        """Checks whether all files the last translation read or wrote are unchanged"""
+
+        try:
+            f = open(self.package_dir+'/'+self.manifest_file_name, 'r')
+            manifest = json.loads(f.read())
+            f.close()
+            if manifest['version'] != self.manifest_version:
+                return False
+            for file_path, stats in manifest['files'].items():
+                if self.file_stats(file_path) != stats:
+                    return False
+        except (OSError, ValueError, KeyError, AttributeError):  # no manifest, a file is missing, invalid manifest
+            return False
+
+        return True
+
+    def save_manifest(self):
+        try:
+            manifest = {'version': self.manifest_version,
+                        'files': {file_path: self.file_stats(file_path) for file_path in self.files}}
+            f = open(self.package_dir+'/'+self.manifest_file_name, 'w')
+            f.write(json.dumps(manifest, indent=1))
+            f.close()
+        except OSError:
+            pass  # f.ex. read-only package dirs get translated every time
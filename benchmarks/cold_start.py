@@ -0,0 +1,137 @@
+"""Measures the startup time of Ryven and Ryven_Console with the bundled projects (saves/*.rpo).
+
+    python cold_start.py [--runs N] [--entry {ryven,console}] [--clear-caches] [PROJECT ...]
+
+Every run starts a fresh interpreter which loads the project and exits:
+    ryven     Ryven.py --project <project> --quit-after-startup, opens the project like the startup dialog and quits
+              once the main window is shown (Qt runs with the offscreen platform unless QT_QPA_PLATFORM is set)
+    console   Ryven_Console.py <project> --script <first script> --iterations 0, loads the project's first script
+
+The runs write a startup trace (--trace, see custom_src.LoadTiming), the report shows the median wall time of the
+process and the medians of the top level phases of the trace. With --clear-caches, the translation manifests and the
+__pycache__ directories of the packages get removed before every run, so every run has to translate and compile
+everything again. The operating system's file cache isn't affected."""
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRY_POINTS = ('ryven', 'console')
+
+
+def first_script_name(project_file):
+    sys.path.insert(0, os.path.join(ROOT_DIR, 'Ryven'))
+    try:
+        from custom_src.ProjectFile import read_project
+    finally:
+        sys.path.pop(0)
+    return read_project(project_file)['scripts'][0]['name']
+
+
+def command(entry, project_file, trace_file):
+    """Returns the command line and the working directory of a run."""
+
+    if entry == 'ryven':
+        return [sys.executable, 'Ryven.py', '--project', project_file, '--quit-after-startup', '--trace', trace_file], \
+               os.path.join(ROOT_DIR, 'Ryven')
+    else:
+        return [sys.executable, 'Ryven_Console.py', project_file, '--script', first_script_name(project_file),
+                '--iterations', '0', '--trace', trace_file], os.path.join(ROOT_DIR, 'Ryven_Console')
+
+
+def clear_caches():
+    for path in glob.glob(os.path.join(ROOT_DIR, 'packages', '**', '.translation_manifest.json'), recursive=True):
+        os.remove(path)
+    for path in glob.glob(os.path.join(ROOT_DIR, 'packages', '**', '__pycache__'), recursive=True):
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def top_level_phases(trace) -> dict:
+    """{phase name: seconds} of the phases of the main thread that aren't part of another phase."""
+
+    events = sorted([e for e in trace['traceEvents'] if e['ph'] == 'X' and e['tid'] == 0],
+                    key=lambda e: (e['ts'], -e['dur']))
+    phases = {}
+    end = None
+    for e in events:
+        if end is not None and e['ts'] + e['dur'] <= end:
+            continue  # nested
+        phases[e['name']] = phases.get(e['name'], 0) + e['dur'] / 1e6
+        end = e['ts'] + e['dur']
+    return phases
+
+
+def run(entry, project_file, trace_file, timeout):
+    """Returns the wall time and the top level phases of one run, raises RuntimeError if the run failed."""
+
+    args, cwd = command(entry, project_file, trace_file)
+    env = dict(os.environ)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    t0 = time.perf_counter()
+    result = subprocess.run(args, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+                            timeout=timeout)
+    seconds = time.perf_counter() - t0
+
+    # the console exits with 1 if updates failed while loading, the project got loaded anyway
+    if result.returncode not in (0, 1) or not os.path.isfile(trace_file):
+        lines = result.stderr.strip().splitlines()
+        raise RuntimeError(lines[-1] if len(lines) > 0 else 'exit status %d' % result.returncode)
+
+    with open(trace_file) as f:
+        phases = top_level_phases(json.load(f))
+    os.remove(trace_file)
+    return seconds, phases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('projects', nargs='*', metavar='PROJECT',
+                        help='project files (default: the .rpo files in the saves folder)')
+    parser.add_argument('--runs', type=int, default=5, help='runs per entry point and project (default: 5)')
+    parser.add_argument('--entry', choices=ENTRY_POINTS, action='append',
+                        help='entry point to measure, can be repeated (default: both)')
+    parser.add_argument('--clear-caches', action='store_true', help='removes the caches before every run')
+    parser.add_argument('--timeout', type=float, default=300, help='seconds after which a run fails (default: 300)')
+    args = parser.parse_args()
+
+    projects = [os.path.abspath(p) for p in args.projects] or \
+               sorted(glob.glob(os.path.join(ROOT_DIR, 'saves', '*.rpo')))
+    trace_file = os.path.join(tempfile.mkdtemp(), 'trace.json')
+
+    for entry in args.entry or ENTRY_POINTS:
+        for project_file in projects:
+            print('%s, %s' % (entry, os.path.basename(project_file)))
+            times = []
+            phases = {}  # {phase name: [seconds of every run]}
+            try:
+                for i in range(args.runs):
+                    if args.clear_caches:
+                        clear_caches()
+                    seconds, run_phases = run(entry, project_file, trace_file, args.timeout)
+                    times.append(seconds)
+                    for name, phase_seconds in run_phases.items():
+                        phases.setdefault(name, []).append(phase_seconds)
+            except (RuntimeError, OSError, subprocess.TimeoutExpired) as e:
+                print('    failed:', e)
+                continue
+
+            print('    %-40s %8.3fs  (min %.3fs, max %.3fs)' % ('process', statistics.median(times), min(times),
+                                                                max(times)))
+            for name, phase_times in phases.items():
+                print('    %-40s %8.3fs' % (name, statistics.median(phase_times)))
+
+    shutil.rmtree(os.path.dirname(trace_file), ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
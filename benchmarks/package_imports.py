@@ -0,0 +1,107 @@
+"""Measures what finding a module costs once the modules of all bundled packages are importable, with the node
+directories appended to sys.path (as Ryven did before) and with the isolated importer (custom_src.PackageImporter).
+
+    python package_imports.py [--repeat N]
+
+Only finding the modules is measured, executing the node modules would need all their dependencies (PySide2, cv2,
+...). Three lookups are timed:
+    node module     a package module, what every node import costs before the module is executed
+    missing module  an import that fails, f.ex. an optional dependency, anywhere in the process
+    stdlib module   a module found in the standard library
+
+Every mode runs in a fresh interpreter, so the modes don't affect each other."""
+
+import argparse
+import importlib
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGES_DIR = os.path.join(ROOT_DIR, 'packages')
+MODES = ('sys.path', 'importer')
+
+
+def package_modules():
+    """Returns [(directory, module name)] of all node and widget modules of the bundled packages."""
+
+    modules = []
+    for package_name in sorted(os.listdir(PACKAGES_DIR)):
+        rpc_file = os.path.join(PACKAGES_DIR, package_name, package_name+'.rpc')
+        if not os.path.isfile(rpc_file):
+            continue
+        with open(rpc_file) as f:
+            package_config = json.loads(f.read(), strict=False)
+
+        for n in package_config['nodes']:
+            node_dir = os.path.join(PACKAGES_DIR, package_name, 'nodes', n['module name'])
+            widgets_dir = os.path.join(node_dir, 'widgets')
+            modules.append((node_dir, n['module name']))
+            if n['has main widget']:
+                modules.append((widgets_dir, n['module name']+'___main_widget'))
+            for w_name in n['custom input widgets']:
+                modules.append((widgets_dir, n['module name']+'___'+w_name))
+    return modules
+
+
+def time_lookup(module_name, repeat):
+    """Median seconds of importlib.util.find_spec(module_name), which is what an import does before executing the
+    module (sys.modules is not involved)."""
+
+    times = []
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        importlib.util.find_spec(module_name)
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+
+def run_mode(mode, repeat):
+    modules = package_modules()
+
+    if mode == 'sys.path':
+        for directory, module_name in modules:
+            if directory not in sys.path:
+                sys.path.append(directory)
+    else:
+        sys.path.insert(0, os.path.join(ROOT_DIR, 'Ryven'))
+        from custom_src.PackageImporter import install_finder
+        install_finder({module_name: os.path.join(directory, module_name+'.py') for directory, module_name in modules})
+
+    node_module = modules[len(modules) // 2][1]
+    results = {'sys.path entries': len(sys.path),
+               'node module': time_lookup(node_module, repeat),
+               'missing module': time_lookup('no_such_module_for_benchmark', repeat),
+               'stdlib module': time_lookup('xml.dom.minidom', repeat)}
+    print(json.dumps(results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=1000, help='lookups per measurement (default: 1000)')
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)  # runs one mode in this interpreter
+    args = parser.parse_args()
+
+    if args.mode is not None:
+        run_mode(args.mode, args.repeat)
+        return
+
+    print('%d package modules' % len(package_modules()))
+    print('%-10s %16s %16s %16s %16s' % ('mode', 'sys.path entries', 'node module', 'missing module', 'stdlib module'))
+    for mode in MODES:
+        command = [sys.executable, os.path.abspath(__file__), '--mode', mode, '--repeat', str(args.repeat)]
+        output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+        results = json.loads(output)
+        print('%-10s %16d %14.1fus %14.1fus %14.1fus' % (mode, results['sys.path entries'],
+                                                         results['node module'] * 1e6,
+                                                         results['missing module'] * 1e6,
+                                                         results['stdlib module'] * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 from NIENV import *
 
+import asyncio
 import imaplib
 import email
 
@@ -36,42 +37,49 @@ class GetLastGmail_NodeInstance(NodeInstance):
         # ...
 
 
-    def update_event(self, input_called=-1):
+    async def update_event(self, input_called=-1):
         if input_called == 0:
             email_user = self.input(1)
             email_pass = self.input(2)
 
-            mail = imaplib.IMAP4_SSL('imap.gmail.com')
+            # imaplib blocks, so the fetching runs in a thread while the flow goes on
+            subject, date, message = await asyncio.get_running_loop().run_in_executor(
+                None, self.fetch_last_mail, email_user, email_pass)
 
-            mail.login(email_user, email_pass)
-            mail.select('INBOX') #
+            self.set_output_val(1, subject)
+            self.set_output_val(2, date)
+            self.set_output_val(3, message)
+            self.exec_output(0)
 
-            subject = ''
-            date = ''
-            message = ''
-            mail.select()
+    def fetch_last_mail(self, email_user, email_pass):
+        mail = imaplib.IMAP4_SSL('imap.gmail.com')
 
-            t, data = mail.search(None, 'ALL')
-            mail_ids = data[0]
-            id_list = mail_ids.split()
+        mail.login(email_user, email_pass)
+        mail.select('INBOX') #
 
-            num = data[0].split()[-1]
+        subject = ''
+        date = ''
+        message = ''
+        mail.select()
 
-            t, data = mail.fetch(num, '(RFC822)' )
-            raw_email = data[0][1]
-            raw_email_string = raw_email.decode('ISO-8859-1')
-            email_message = email.message_from_string(raw_email_string)
+        t, data = mail.search(None, 'ALL')
+        mail_ids = data[0]
+        id_list = mail_ids.split()
 
-            date = email_message['date']
-            subject = email_message['Subject']
-            message = self.get_body(email_message)
+        num = data[0].split()[-1]
 
+        t, data = mail.fetch(num, '(RFC822)' )
+        raw_email = data[0][1]
+        raw_email_string = raw_email.decode('ISO-8859-1')
+        email_message = email.message_from_string(raw_email_string)
 
-            mail.close()
-            self.set_output_val(1, subject)
-            self.set_output_val(2, date)
-            self.set_output_val(3, message)
-            self.exec_output(0)
+        date = email_message['date']
+        subject = email_message['Subject']
+        message = self.get_body(email_message)
+
+
+        mail.close()
+        return subject, date, message
 
     def get_body(self, msg):
         if msg.is_multipart():
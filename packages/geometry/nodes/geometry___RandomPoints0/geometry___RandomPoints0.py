@@ -14,6 +14,9 @@ from random import random
 
 
 class RandomPoints_NodeInstance(NodeInstance):
+    # memoizing the output is fine, new points are only generated through the exec input, pulling the output just
+    # returns the current ones
+
     def __init__(self, params):
         super(RandomPoints_NodeInstance, self).__init__(params)
 
@@ -29,6 +29,8 @@ import random
 
 
 class RandomMatrix_NodeInstance(NodeInstance):
+    memoize_outputs = False  # every request must produce new random values
+
     def __init__(self, params):
         super(RandomMatrix_NodeInstance, self).__init__(params)
 
@@ -28,6 +28,8 @@ import random
 
 
 class RandInt_NodeInstance(NodeInstance):
+    memoize_outputs = False  # every request must produce new random values
+
     def __init__(self, params):
         super(RandInt_NodeInstance, self).__init__(params)
 
@@ -29,6 +29,8 @@ import random
 
 
 class RandInts_NodeInstance(NodeInstance):
+    memoize_outputs = False  # every request must produce new random values
+
     def __init__(self, params):
         super(RandInts_NodeInstance, self).__init__(params)
 
@@ -28,6 +28,8 @@ import random
 
 
 class Random_NodeInstance(NodeInstance):
+    memoize_outputs = False  # every request must produce new random values
+
     def __init__(self, params):
         super(Random_NodeInstance, self).__init__(params)
 
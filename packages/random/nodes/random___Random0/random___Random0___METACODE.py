@@ -28,6 +28,8 @@ import random
 
 
 class %CLASS%(NodeInstance):
+    memoize_outputs = False  # every request must produce new random values
+
     def __init__(self, params):
         super(%CLASS%, self).__init__(params)
 
@@ -28,6 +28,8 @@ import random
 
 
 class Shuffle_NodeInstance(NodeInstance):
+    memoize_outputs = False  # every request must produce new random values
+
     def __init__(self, params):
         super(Shuffle_NodeInstance, self).__init__(params)
 